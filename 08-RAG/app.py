@@ -6,8 +6,11 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter ## Splits lon
 from langchain.chains.combine_documents import create_stuff_documents_chain ## This takes a) LLM b) your prompt c) the retrieved documents and stuffs them together before asking the model to answer
 from langchain_core.prompts import ChatPromptTemplate ## Lets you create prompts with placeholders like {input} and {context}
 from langchain.chains import create_retrieval_chain ## It combines retriever and LLM chain. This our main RAG pipeling
-from langchain_community.vectorstores import FAISS ## FAISS stores vector embeddings for fast similarity search
-from langchain_community.document_loaders import PyPDFDirectoryLoader ## Loads all PDF files from a folder automatically
+from ingestPipeline import pdf_loaders, iter_pages, iter_chunks, ingest, file_fingerprint ## Streams PDF pages -> chunks -> embeddings -> FAISS in micro-batches
+from semanticCache import MemoizedEmbeddings, RESPONSE_CACHE ## Returns stored answers for near-identical questions without calling the LLM
+from faissIndex import QuantizedFAISS, TunableFAISS ## Compressed FAISS (int8/PQ codes in RAM, float32 re-scoring from disk) and Flat/HNSW/IVF index factory
+import glob
+import tempfile
 
 from dotenv import load_dotenv ## Loads variables from .env (like your Groq API key)
 
@@ -42,16 +45,41 @@ Question:{input}
 
 def create_vector_embedding(): ## This creates a function that will prepare your RAG database (embeddings + FAISS).
     if "vectors" not in st.session_state: ## If the user hasn’t created the vector database yet, then run the following steps. (Streamlit’s session_state keeps data in memory while the app runs.)
-        st.session_state.embeddings=OllamaEmbeddings(model="nomic-embed-text:latest") ## This loads the Ollama embedding model (nomic-embed-text) that will convert text → numbers.
-        st.session_state.loader=PyPDFDirectoryLoader("research_papers") ## Data ingestion --> This points to your folder research_papers/ that contains your PDFs.
-        st.session_state.docs=st.session_state.loader.load() ## Document loader --> This loads all PDF pages into a list of documents.
+        st.session_state.embeddings=MemoizedEmbeddings(OllamaEmbeddings(model="nomic-embed-text:latest")) ## This loads the Ollama embedding model (nomic-embed-text) that will convert text → numbers. Query vectors are remembered so the cache lookup and FAISS search share one embedding call.
+        st.session_state.corpus_version=file_fingerprint(glob.glob("research_papers/*.pdf")) ## Cached answers are only reused for the same set of PDFs
         st.session_state.text_splitter=RecursiveCharacterTextSplitter(chunk_size=1000,chunk_overlap=20) ## Text splitter --> This splits long PDF text into smaller chunks of 1000 characters with 20 characters overlap.
-        st.session_state.final_documents=st.session_state.text_splitter.split_documents(st.session_state.docs[:50]) ## Takes only first 50 documents → splits them → stores chunks.
-        st.session_state.vectors=FAISS.from_documents(st.session_state.final_documents,st.session_state.embeddings) ## Converts each chunk into embeddings → stores them in FAISS vector database. --> Stores it in session_state for later use.Now RAG retriever have something to search!
+        index_kind=FACTORY_KINDS.get(index_choice) ## auto / flat / hnsw / ivf_flat / ivf_sq8 / ivf_pq, or None for the compressed stores
+        index_dir=os.path.join("faiss_index",f"{st.session_state.corpus_version}-{index_kind}") ## Trained index + parameters saved per PDF set and index kind
+        if index_kind and os.path.exists(index_dir): ## Same PDFs, same index kind → load the saved index instead of re-embedding everything
+            st.session_state.vectors=TunableFAISS.load_local(index_dir,st.session_state.embeddings,allow_dangerous_deserialization=True) ## We wrote this folder ourselves
+            return
+        pages=iter_pages(pdf_loaders("research_papers"),max_pages=50) ## Data ingestion --> Lazily reads pages from the PDFs in research_papers/, stopping after the first 50 pages.
+        chunks=iter_chunks(pages,st.session_state.text_splitter) ## Splits each page as soon as it is parsed, so all pages are never held in memory at once.
+        status=st.empty() ## Placeholder that shows ingestion progress
+        vectorstore=None ## None --> ingest builds a plain float32 FAISS index
+        if not index_kind: ## Compressed index for large corpora: int8 = 4x less RAM, PQ = ~25x less; full vectors stay on disk for exact re-scoring
+            vectorstore=QuantizedFAISS(st.session_state.embeddings,tempfile.mkdtemp(prefix="faiss_"),
+                                       quantizer="sq8" if index_choice.startswith("int8") else "pq")
+        vectors=ingest(chunks,st.session_state.embeddings,vectorstore=vectorstore,batch_size=32,
+                       on_batch=lambda batch,total:status.write(f"Embedded {total} chunks...")) ## Embeds chunks in micro-batches while the next pages are still being parsed --> upserts them into FAISS
+        status.empty()
+        if vectors is None or not vectors.index_to_docstore_id: ## No chunks (no PDFs, or no extractable text) → nothing to search; stop before any retriever is built
+            st.error("No text found in research_papers/*.pdf. Add PDFs with selectable text and click 'Document Embedding' again.")
+            st.stop()
+        st.session_state.vectors=vectors ## Stores it in session_state for later use.Now RAG retriever have something to search!
+        if isinstance(vectors,QuantizedFAISS) and not vectors.is_trained: ## Too few chunks to train the codes: searches scan the full float32 vectors, same as a flat index
+            st.info(f"{len(vectors.index_to_docstore_id)} chunks is fewer than the {vectors.train_size:,} needed to train the "
+                    f"{'int8' if vectors.quantizer=='sq8' else 'PQ'} codes, so this index searches full-precision vectors like Flat (float32).")
+        if index_kind: ## Now the corpus size is known: rebuild into the picked kind, or for Auto Flat (<10k chunks), HNSW (<1M) or IVF-SQ8 (>=1M, trained on a sample)
+            st.session_state.vectors=TunableFAISS.from_store(st.session_state.vectors,index_kind)
+            st.session_state.vectors.save_local(index_dir)
 
 st.title("RAG document Q&A with GROQ and Ollama Embedding model nomic-embed-text:latest") ## Title of the web app
 
 user_prompt=st.text_input("Enter your query from the research paper")
+FACTORY_KINDS={"Auto (by corpus size)":"auto","Flat (float32)":"flat","HNSW":"hnsw","IVF-Flat":"ivf_flat","IVF-SQ8":"ivf_sq8","IVF-PQ":"ivf_pq"}
+index_choice=st.sidebar.selectbox("Vector index",[*FACTORY_KINDS,"int8 (SQ8) + re-score","PQ + re-score"]) ## Picked before clicking "Document Embedding"
+search_breadth=st.sidebar.number_input("Search breadth (nprobe / efSearch, 0 = index default)",min_value=0,max_value=4096,value=0) ## Higher = better recall, slower queries; only used by IVF / HNSW indexes
 
 ## Create a button named as Document Embedding.When the user clicks the button:create_vector_embedding() runs -->After creation → display message: “Vector database is ready”
 if st.button("Document Embedding"):
@@ -65,12 +93,17 @@ if user_prompt: ## If user typed something in the text box…
         st.error("Please click 'Document Embedding' first to create the vector database.")
     else: 
         document_chain = create_stuff_documents_chain(llm, prompt) ## Creates a chain that can pass documents + question into the LLM.
-        retriever = st.session_state.vectors.as_retriever() ## This allows searching inside FAISS based on similarity by converting FAISS into a retriever object.
+        retriever = st.session_state.vectors.as_retriever(search_kwargs={"nprobe":search_breadth,"ef_search":search_breadth}) ## This allows searching inside FAISS based on similarity by converting FAISS into a retriever object.
         retrieval_chain = create_retrieval_chain(retriever, document_chain) ## Combine retriever + LLM chain → RAG pipeline. This create : retrieve relevant chunks ---> pass them with the prompt -->get answer from LLM
 
         start = time.process_time()
-        response = retrieval_chain.invoke({'input': user_prompt}) ## Searches FAISS for relevant chunks --> Passes them to LLM --> Returns answer + context chunks
+        query_vector = st.session_state.embeddings.embed_query(user_prompt) ## Embed the question once; the retriever below reuses this vector
+        response = RESPONSE_CACHE.lookup(st.session_state.corpus_version, query_vector) ## Near-identical question asked before → reuse its answer + chunks, no Groq call
+        if response is None:
+            response = retrieval_chain.invoke({'input': user_prompt}) ## Searches FAISS for relevant chunks --> Passes them to LLM --> Returns answer + context chunks
+            RESPONSE_CACHE.store(st.session_state.corpus_version, query_vector, {'answer': response['answer'], 'context': response['context']})
         print(f"Response time: {time.process_time() - start}") ## Print how fast it was
+        st.caption(RESPONSE_CACHE.summary())
 
         st.write(response['answer']) ## Show answer to user
 
@@ -0,0 +1,72 @@
+import sys
+import time
+
+import faiss
+import numpy as np
+
+from benchQuantizedIndex import synthetic_embeddings
+from faissIndex import INDEX_KINDS, apply_search_params, build_trained_index, choose_index_kind
+
+# -------------------------
+# QPS / recall@10 for Flat, HNSW and IVF indexes at several corpus sizes
+#
+# Usage: python benchFaissIndex.py [sizes] [dim]
+#        python benchFaissIndex.py 10000,100000,1000000 384
+#
+# Embeddings are topic-clustered (real chunk embeddings are: many chunks per
+# paper / build / test), built from benchQuantizedIndex.synthetic_embeddings
+# centres plus per-chunk noise. Indexes are built on all cores; queries are
+# issued one at a time (like the RAG apps do) on one thread. Ground truth is
+# an exact flat search. Each approximate index is measured at
+# its default search breadth and at 4x that (nprobe / ef_search), and the
+# kind that choose_index_kind() would pick for that size is marked "*".
+# -------------------------
+
+
+def clustered_embeddings(rng: np.random.Generator, centres: np.ndarray, n: int) -> np.ndarray:
+    vectors = centres[rng.integers(len(centres), size=n)]
+    vectors = vectors + 0.6 * synthetic_embeddings(rng, n, centres.shape[1])
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def measure(index, queries: np.ndarray, truth: np.ndarray, k: int):
+    start = time.perf_counter()
+    found = np.vstack([index.search(query[None, :], k)[1] for query in queries])
+    seconds = time.perf_counter() - start
+    recall = np.mean([len(set(row) & set(expected)) / k for row, expected in zip(found, truth)])
+    return len(queries) / seconds, recall
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10_000, 100_000, 1_000_000]
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    k = 10
+    rng = np.random.default_rng(42)
+    threads = faiss.omp_get_max_threads()
+
+    print(f"dim={dim}, 500 single queries per run, recall@{k}")
+    print(f"{'chunks':>9}  {'index':<20}{'params':<16}{'build s':>9}{'QPS':>10}{'recall':>9}")
+    for n in sizes:
+        centres = synthetic_embeddings(rng, max(10, n // 100), dim)
+        vectors = clustered_embeddings(rng, centres, n)
+        queries = clustered_embeddings(rng, centres, 500)
+        exact = faiss.IndexFlatL2(dim)
+        exact.add(vectors)
+        truth = exact.search(queries, k)[1]
+
+        for kind in INDEX_KINDS[1:]:
+            faiss.omp_set_num_threads(threads)
+            start = time.perf_counter()
+            index, params = build_trained_index(vectors, kind)
+            index.add(vectors)
+            build = time.perf_counter() - start
+            mark = "*" if kind == choose_index_kind(n) else " "
+
+            faiss.omp_set_num_threads(1)
+            knobs = {key: params[key] for key in ("nprobe", "ef_search") if key in params}
+            for scale in (1, 4) if knobs else (1,):
+                scaled = {key: value * scale for key, value in knobs.items()}
+                apply_search_params(index, **scaled)
+                qps, recall = measure(index, queries, truth, k)
+                label = ", ".join(f"{key}={value}" for key, value in scaled.items()) or "-"
+                print(f"{n:>9}{mark} {params['spec']:<20}{label:<16}{build:>9.1f}{qps:>10.0f}{recall:>9.3f}")
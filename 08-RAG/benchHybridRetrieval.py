@@ -0,0 +1,95 @@
+import random
+import statistics
+import sys
+import time
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from hybridRetriever import BM25Index, HybridRetriever
+
+# -------------------------
+# Labeled recall@k / latency benchmark over jenkins.log-style builds
+#
+# Usage: python benchHybridRetrieval.py [n_builds] [k]
+#
+# Every synthetic build log fails with its own exception class, error code and
+# agent hostname; each query asks about exactly one of those tokens and the
+# build chunk that contains it is the single relevant answer.
+# -------------------------
+
+EXCEPTIONS = [
+    "java.net.ConnectException", "java.net.SocketTimeoutException",
+    "org.openqa.selenium.NoSuchElementException", "org.openqa.selenium.StaleElementReferenceException",
+    "java.lang.NullPointerException", "java.sql.SQLTransientConnectionException",
+    "io.restassured.internal.http.HttpResponseException", "org.testng.TestNGException",
+]
+MESSAGES = [
+    "Connection refused", "Read timed out", "Unable to locate element",
+    "Element is not attached to the page document", "Cannot invoke method on null object",
+    "Connection is not available, request timed out", "Bad Gateway", "Cannot find class in classpath",
+]
+
+
+def build_log(rng: random.Random, build: int):
+    exception_idx = rng.randrange(len(EXCEPTIONS))
+    code = f"ERR-{rng.randrange(1000, 9999)}"
+    host = f"ci-agent-{rng.randrange(100, 999)}.build.local"
+    text = (
+        f"Started by user admin\n"
+        f"Running on {host} in /var/lib/jenkins/workspace/regression-{build}\n"
+        f"[INFO] Running test suite regression-{build}\n"
+        f"ERROR: {MESSAGES[exception_idx]} ({code})\n"
+        f"Caused by: {EXCEPTIONS[exception_idx]}: {MESSAGES[exception_idx]}\n"
+        f"\tat com.example.tests.Suite{build}.run(Suite{build}.java:{rng.randrange(20, 400)})\n"
+        f"Finished: FAILURE\n"
+    )
+    queries = [
+        f"Which build failed with {code}?",
+        f"What went wrong on {host}?",
+    ]
+    return Document(page_content=text, metadata={"build": build}), queries
+
+
+def recall_and_latency(search, labeled, k):
+    hits, latencies = 0, []
+    for query, build in labeled:
+        start = time.perf_counter()
+        docs = search(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += any(doc.metadata.get("build") == build for doc in docs[:k])
+    return hits / len(labeled), statistics.median(latencies), max(latencies)
+
+
+if __name__ == "__main__":
+    n_builds = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = random.Random(42)
+
+    docs, labeled = [], []
+    for build in range(n_builds):
+        doc, queries = build_log(rng, build)
+        docs.append(doc)
+        labeled.extend((query, build) for query in queries)
+
+    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    vectorstore = Chroma(embedding_function=embeddings)
+    sparse_index = BM25Index()
+    for start in range(0, len(docs), 64):
+        batch = docs[start:start + 64]
+        vectorstore.add_documents(batch)
+        sparse_index.add_documents(batch)
+
+    hybrid = HybridRetriever(vectorstore=vectorstore, sparse_index=sparse_index, k=k)
+    runs = {
+        "dense": lambda q, k: vectorstore.similarity_search(q, k=k),
+        "bm25": lambda q, k: [doc for doc, _ in sparse_index.search(q, k=k)],
+        "hybrid": lambda q, k: hybrid.invoke(q),
+    }
+
+    print(f"{n_builds} builds, {len(labeled)} labeled queries, k={k}")
+    print(f"{'retriever':<10}{'recall@k':>10}{'p50 ms':>10}{'max ms':>10}")
+    for name, search in runs.items():
+        recall, p50, worst = recall_and_latency(search, labeled, k)
+        print(f"{name:<10}{recall:>10.3f}{p50:>10.2f}{worst:>10.2f}")
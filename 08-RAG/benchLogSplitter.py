@@ -0,0 +1,82 @@
+import random
+import sys
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from logSplitter import LogTextSplitter
+
+# -------------------------
+# LogTextSplitter vs RecursiveCharacterTextSplitter on a large log
+#
+# Usage: python benchLogSplitter.py [size_mb | path/to/file.log]
+#
+# "embedded chars" (sum of chunk lengths, overlap included) is what the
+# embedding model has to process; "cut traces" counts chunks that start in
+# the middle of a stack trace, i.e. frames separated from their exception.
+# -------------------------
+
+CHUNK_SIZE = 1500
+CHUNK_OVERLAP = 200
+
+
+def synthetic_log(size_mb: int) -> str:
+    rng = random.Random(7)
+    target = size_mb * 1024 * 1024
+    parts, size, second = [], 0, 0
+    while size < target:
+        second += 1
+        stamp = f"2024-05-{1 + second // 86400 % 28:02d} {second // 3600 % 24:02d}:{second // 60 % 60:02d}:{second % 60:02d}"
+        if rng.random() < 0.1:
+            frames = "".join(
+                f"\tat com.example.tests.Suite{rng.randrange(50)}.step{i}(Suite.java:{rng.randrange(20, 400)})\n"
+                for i in range(rng.randrange(8, 40))
+            )
+            record = (
+                f"{stamp} ERROR [TestRunner] Test failed on ci-agent-{rng.randrange(100)}\n"
+                f"org.openqa.selenium.TimeoutException: Expected condition failed\n{frames}"
+                f"Caused by: java.net.SocketTimeoutException: Read timed out\n\t... {rng.randrange(5, 30)} more\n"
+            )
+        else:
+            record = f"{stamp} INFO  [Worker-{rng.randrange(16)}] step {rng.randrange(10_000)} completed in {rng.randrange(900)} ms\n"
+        parts.append(record)
+        size += len(record)
+    return "".join(parts)
+
+
+def check_bracket_logs():
+    # Bracket-prefixed plain-text logs ending in "]" must not take the JSON path
+    splitter = LogTextSplitter(chunk_size=200, chunk_overlap=0)
+    maven = "".join(f"[INFO] Building module-{i} ................ SUCCESS [{i}.2 s]\n" for i in range(20))
+    stamped = "".join(f"[2024-01-01 10:00:{i:02d}] job step {i} finished [ok]\n" for i in range(20))
+    for text in (maven, stamped):
+        chunks = splitter.split_text(text)
+        assert len(chunks) > 1 and all(line.startswith("[") for c in chunks for line in c.splitlines()), chunks
+    assert splitter.split_text('[{"a": 1}, {"b": 2}]') == ['{"a": 1},\n{"b": 2}']
+
+
+def run(name, splitter, text):
+    start = time.perf_counter()
+    chunks = splitter.split_text(text)
+    elapsed = time.perf_counter() - start
+    embedded = sum(len(chunk) for chunk in chunks)
+    cut_traces = sum(chunk.lstrip().startswith(("at ", "Caused by", "...")) for chunk in chunks)
+    mb_per_s = len(text) / 1024 / 1024 / elapsed
+    print(f"{name:<12}{len(chunks):>10}{embedded / len(text):>12.2f}x{cut_traces:>12}{elapsed:>10.2f}{mb_per_s:>10.1f}")
+
+
+if __name__ == "__main__":
+    check_bracket_logs()
+    arg = sys.argv[1] if len(sys.argv) > 1 else "100"
+    if arg.isdigit():
+        text = synthetic_log(int(arg))
+    else:
+        with open(arg, "r", errors="ignore") as f:
+            text = f.read()
+
+    print(f"input: {len(text) / 1024 / 1024:.1f} MB, chunk_size={CHUNK_SIZE}, chunk_overlap={CHUNK_OVERLAP}")
+    print(f"{'splitter':<12}{'chunks':>10}{'embedded':>13}{'cut traces':>12}{'sec':>10}{'MB/s':>10}")
+    run("recursive", RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP), text)
+    run("log-aware", LogTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP), text)
+    # ragAppLogsReader.py setting: records are whole, so no overlap is carried
+    run("log-aware/0", LogTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=0), text)
@@ -0,0 +1,75 @@
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from langchain_community.embeddings import FakeEmbeddings
+
+from faissIndex import QuantizedFAISS
+
+# -------------------------
+# Recall vs memory for quantized / dimension-reduced FAISS indexes
+#
+# Usage: python benchQuantizedIndex.py [n_vectors] [dim] [k]
+#
+# Synthetic embeddings: a 64-dim latent signal projected to `dim` with
+# decaying per-dimension scale (early dims carry most of the variance, like a
+# Matryoshka-trained model) plus noise, L2-normalised. Ground truth is exact
+# float32 top-k. "x1" rows skip re-scoring (candidates == k); "x4" / "x16"
+# rows re-score 4k / 16k candidates against the memory-mapped float32 file.
+# -------------------------
+
+
+def synthetic_embeddings(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    projection = rng.standard_normal((64, dim)) * np.linspace(1.0, 0.1, dim)
+    vectors = rng.standard_normal((n, 64)) @ projection + 0.05 * rng.standard_normal((n, dim))
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    distances = (queries ** 2).sum(1)[:, None] - 2 * queries @ vectors.T + (vectors ** 2).sum(1)[None, :]
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 384
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    rng = np.random.default_rng(42)
+
+    vectors = synthetic_embeddings(rng, n, dim)
+    queries = synthetic_embeddings(rng, 200, dim)
+    truth = exact_top_k(vectors, queries, k)
+    texts = [str(i) for i in range(n)]
+
+    configs = [
+        ("flat float32", dict(quantizer="flat")),
+        ("sq8", dict(quantizer="sq8")),
+        ("pq", dict(quantizer="pq")),
+        ("pca/2 + sq8", dict(quantizer="sq8", reduce_dim=dim // 2, reduction="pca")),
+        ("matryoshka/2 + sq8", dict(quantizer="sq8", reduce_dim=dim // 2, reduction="matryoshka")),
+        ("pca/2 + pq", dict(quantizer="pq", reduce_dim=dim // 2, reduction="pca")),
+    ]
+
+    print(f"{n} vectors, dim={dim}, {len(queries)} queries, recall@{k}")
+    print(f"{'index':<22}{'MB in RAM':>10}{'B/vector':>10}{'rescore':>9}{'recall':>9}{'p50 ms':>9}")
+    for name, options in configs:
+        with tempfile.TemporaryDirectory() as directory:
+            store = QuantizedFAISS(FakeEmbeddings(size=dim), directory, train_size=min(n, 20_000), **options)
+            for start in range(0, n, 4096):
+                store.add_embeddings(zip(texts[start:start + 4096], vectors[start:start + 4096]))
+            size = store.memory_bytes()
+
+            for factor in (1, 4, 16):
+                store.rescore_factor = factor
+                hits, latencies = 0, []
+                for query, expected in zip(queries, truth):
+                    begin = time.perf_counter()
+                    found = store.similarity_search_with_score_by_vector(query, k=k)
+                    latencies.append((time.perf_counter() - begin) * 1000)
+                    hits += len({int(doc.page_content) for doc, _ in found} & set(expected.tolist()))
+                recall = hits / (len(queries) * k)
+                print(f"{name:<22}{size / 1e6:>10.1f}{size / n:>10.1f}{'x' + str(factor):>9}"
+                      f"{recall:>9.3f}{statistics.median(latencies):>9.2f}")
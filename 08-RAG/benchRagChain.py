@@ -0,0 +1,91 @@
+import os
+import random
+import statistics
+import sys
+import time
+
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain_chroma import Chroma
+from langchain_community.chat_models import ChatOllama
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from benchHybridRetrieval import build_log
+from contextCompressor import CompressingRetriever
+from hybridRetriever import BM25Index, HybridRetriever
+from reranker import RerankingRetriever
+from llmCassette import with_cassette  # shared package: pip install -e shared
+
+# -------------------------
+# Triage RAG chain timing with a recorded LLM: pipeline overhead vs model time
+#
+# Usage: python benchRagChain.py [cassette.jsonl] [auto|record|replay] [n_questions] [ollama model]
+#        (defaults: rag_cassette.jsonl, auto, 20, gemma3:1b; needs pip install -e shared)
+#
+# Runs ragAppLogsReader's retrieval stack (hybrid -> rerank -> compress) and a
+# stuff chain over synthetic builds. The first run records the model's answers
+# in the cassette (see shared/llmCassette.py); replays skip the model entirely, so
+# their time is all ours: retrieval, prompt building, parsing.
+# -------------------------
+
+TRIAGE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are a senior QA automation engineer. Use ONLY the log chunks below to answer; "
+     "give the root cause category, the 2-5 critical log lines and next steps.\n\n{context}"),
+    ("human", "{input}"),
+])
+
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    cassette_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, "rag_cassette.jsonl")
+    mode = sys.argv[2] if len(sys.argv) > 2 else "auto"
+    n_questions = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    model = sys.argv[4] if len(sys.argv) > 4 else "gemma3:1b"
+    rng = random.Random(42)
+
+    docs, questions = [], []
+    for build in range(200):
+        doc, queries = build_log(rng, build)
+        docs.append(doc)
+        questions.extend(queries)
+    questions = questions[:n_questions]
+
+    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    vectorstore = Chroma(embedding_function=embeddings)
+    sparse_index = BM25Index()
+    vectorstore.add_documents(docs)
+    sparse_index.add_documents(docs)
+    retriever = CompressingRetriever(
+        base_retriever=RerankingRetriever(
+            base_retriever=HybridRetriever(vectorstore=vectorstore, sparse_index=sparse_index, k=20),
+            top_n=4,
+        ),
+        token_budget=800,
+    )
+
+    llm = with_cassette(ChatOllama(model=model, temperature=0), cassette_path, mode)
+    chain = create_stuff_documents_chain(llm, TRIAGE_PROMPT)
+
+    rows = []
+    for question in questions:
+        waited_before, model_before = llm.waited_seconds, llm.model_seconds
+        start = time.perf_counter()
+        context = retriever.invoke(question)
+        retrieved = time.perf_counter()
+        chain.invoke({"input": question, "context": context})
+        end = time.perf_counter()
+        waited = llm.waited_seconds - waited_before
+        rows.append((
+            (retrieved - start) * 1000,
+            (end - retrieved - waited) * 1000,
+            llm.model_seconds - model_before,
+            end - start - waited,
+        ))
+
+    print(f"{len(questions)} questions, {len(docs)} builds; {llm.summary()}")
+    print(f"{'':<14}{'retrieval ms':>13}{'chain ms':>10}{'model s':>9}{'overhead s':>11}")
+    for label, pick in (("p50", statistics.median), ("mean", statistics.mean), ("max", max)):
+        print(f"{label:<14}" + "".join(
+            f"{pick(row[i] for row in rows):>{w}.{p}f}" for i, w, p in ((0, 13, 1), (1, 10, 1), (2, 9, 2), (3, 11, 3))
+        ))
+    print("chain ms = prompt + parsing, excluding time spent waiting on the model")
@@ -0,0 +1,157 @@
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+# -------------------------
+# Bounded chat history for RunnableWithMessageHistory
+#
+# Only the most recent turns that fit in a token budget are replayed into the
+# prompts. Turns that fall out of the window are folded into a rolling summary
+# on a background thread, so the user's request never waits on it; until the
+# summary is ready the previous one is used. The full transcript (capped) is
+# kept separately for rendering the chat UI.
+# -------------------------
+
+Summarizer = Callable[[str, List[BaseMessage]], str]
+
+SUMMARY_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "You maintain a running summary of a conversation. Merge the new lines into the summary. "
+        "Keep error names, log lines, root causes, decisions and open questions. "
+        "Reply with the updated summary only, at most 150 words.",
+    ),
+    ("human", "Current summary:\n{summary}\n\nNew lines:\n{lines}"),
+])
+
+
+def approx_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting
+    return max(1, len(text) // 4)
+
+
+def llm_summarizer(llm) -> Summarizer:
+    chain = SUMMARY_PROMPT | llm | StrOutputParser()
+
+    def summarize(previous: str, messages: List[BaseMessage]) -> str:
+        lines = "\n".join(f"{message.type}: {message.content}" for message in messages)
+        return chain.invoke({"summary": previous or "(none)", "lines": lines})
+
+    return summarize
+
+
+class BoundedChatHistory(BaseChatMessageHistory):
+    """Token-budgeted message window plus a rolling summary of older turns."""
+
+    def __init__(self, max_tokens: int = 1500, summarize: Optional[Summarizer] = None, max_transcript: int = 200):
+        self.max_tokens = max_tokens
+        self.summarize = summarize
+        self.summary = ""
+        self.window: List[BaseMessage] = []
+        self.transcript = deque(maxlen=max_transcript)
+        self._window_tokens = 0
+        self._pending: List[BaseMessage] = []
+        self._summarizing = False
+        self._generation = 0  # bumped by clear(); a summary started before it is dropped
+        self._lock = threading.Lock()
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        with self._lock:
+            window, summary = list(self.window), self.summary
+        if summary:
+            return [SystemMessage(content=f"Summary of the earlier conversation: {summary}")] + window
+        return window
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        with self._lock:
+            for message in messages:
+                self.window.append(message)
+                self.transcript.append(message)
+                self._window_tokens += approx_tokens(str(message.content))
+
+            # Always keep the latest exchange, even if it alone is over budget
+            while self._window_tokens > self.max_tokens and len(self.window) > 2:
+                evicted = self.window.pop(0)
+                self._window_tokens -= approx_tokens(str(evicted.content))
+                if self.summarize is not None:
+                    self._pending.append(evicted)
+
+            if self._pending and not self._summarizing:
+                self._summarizing = True
+                SUMMARY_POOL.submit(self._summarize_pending)
+
+    def _summarize_pending(self):
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                previous, generation = self.summary, self._generation
+                if not batch or self.summarize is None:
+                    self._summarizing = False
+                    return
+            try:
+                summary = self.summarize(previous, batch)
+            except Exception:
+                # Keep the old summary; a failed summary must not break the chat
+                summary = previous
+            with self._lock:
+                # Cleared while the summary was written: it describes the old conversation
+                if generation == self._generation:
+                    self.summary = summary
+
+    def clear(self) -> None:
+        with self._lock:
+            self.summary = ""
+            self.window = []
+            self.transcript.clear()
+            self._window_tokens = 0
+            self._pending = []
+            self._generation += 1
+
+
+class SessionHistoryStore:
+    """Per-session histories with LRU eviction; pass it as get_session_history."""
+
+    def __init__(self, max_sessions: int = 50, max_tokens: int = 1500, summarize: Optional[Summarizer] = None):
+        self.max_sessions = max_sessions
+        self.max_tokens = max_tokens
+        self.summarize = summarize
+        self.sessions: "OrderedDict[str, BaseChatMessageHistory]" = OrderedDict()
+
+    def __call__(self, session_id: str) -> BaseChatMessageHistory:
+        return self.get(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.sessions
+
+    def __getitem__(self, session_id: str) -> BaseChatMessageHistory:
+        history = self.sessions[session_id]
+        self.sessions.move_to_end(session_id)
+        return history
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def new_history(self) -> BaseChatMessageHistory:
+        return BoundedChatHistory(max_tokens=self.max_tokens, summarize=self.summarize)
+
+    def get(self, session_id: str) -> BaseChatMessageHistory:
+        if session_id in self.sessions:
+            history = self[session_id]
+        else:
+            history = self.new_history()
+            self.sessions[session_id] = history
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        # The LLM (and so the summarizer) can change between Streamlit reruns
+        if isinstance(history, BoundedChatHistory):
+            history.summarize = self.summarize
+        return history
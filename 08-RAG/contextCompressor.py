@@ -0,0 +1,97 @@
+import re
+from typing import List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from chatHistory import approx_tokens
+from hybridRetriever import BM25Index
+
+# -------------------------
+# Extractive context compression before create_stuff_documents_chain
+#
+# Retrieved chunks are cut into units (log lines, or sentences for prose),
+# the units are BM25-scored against the question, and the best ones (plus
+# `neighbours` lines around each hit, so a stack frame keeps its exception)
+# are kept until the token budget is spent. Kept units stay in their
+# original order; gaps are marked with "...". Each returned chunk records its
+# original size in metadata["original_chars"] for compression reporting.
+# -------------------------
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_units(text: str) -> List[str]:
+    lines = [line for line in text.split("\n") if line.strip()]
+    # Logs / stack traces / JSON: one unit per line. Prose: one per sentence.
+    if len(lines) >= 3:
+        return lines
+    return [sentence for sentence in SENTENCE_END.split(text) if sentence.strip()]
+
+
+def compression_ratio(docs: List[Document]) -> float:
+    original = sum(doc.metadata.get("original_chars", len(doc.page_content)) for doc in docs)
+    kept = sum(len(doc.page_content) for doc in docs)
+    return kept / original if original else 1.0
+
+
+def compression_summary(docs: List[Document]) -> str:
+    original = sum(doc.metadata.get("original_chars", len(doc.page_content)) for doc in docs)
+    kept = sum(len(doc.page_content) for doc in docs)
+    return f"Context compressed to {compression_ratio(docs):.0%} ({kept:,} of {original:,} chars)"
+
+
+class CompressingRetriever(BaseRetriever):
+    """Keeps only the query-relevant lines/sentences of retrieved chunks."""
+
+    base_retriever: BaseRetriever
+    token_budget: int = 800
+    neighbours: int = 1
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        docs = self.base_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        units = [split_units(doc.page_content) for doc in docs]
+
+        index = BM25Index()
+        positions = []
+        for doc_idx, doc_units in enumerate(units):
+            index.add_documents([
+                Document(page_content=unit, metadata={"position": len(positions) + unit_idx})
+                for unit_idx, unit in enumerate(doc_units)
+            ])
+            positions.extend((doc_idx, unit_idx) for unit_idx in range(len(doc_units)))
+
+        # Best-scoring units first; if nothing matches, fall back to reading order
+        hits = index.search(query, k=len(positions))
+        order = [unit.metadata["position"] for unit, _ in hits] if hits else range(len(positions))
+
+        selected = [set() for _ in docs]
+        used = 0
+        for flat_idx in order:
+            doc_idx, unit_idx = positions[flat_idx]
+            window = range(max(0, unit_idx - self.neighbours), min(len(units[doc_idx]), unit_idx + self.neighbours + 1))
+            new = [i for i in window if i not in selected[doc_idx]]
+            cost = sum(approx_tokens(units[doc_idx][i]) for i in new)
+            if used + cost > self.token_budget:
+                if used:
+                    break
+                new, cost = [unit_idx], approx_tokens(units[doc_idx][unit_idx])
+            selected[doc_idx].update(new)
+            used += cost
+
+        compressed = []
+        for doc, doc_units, keep in zip(docs, units, selected):
+            if not keep:
+                continue
+            parts, previous = [], None
+            for i in sorted(keep):
+                if previous is not None and i != previous + 1:
+                    parts.append("...")
+                parts.append(doc_units[i])
+                previous = i
+            metadata = dict(doc.metadata, original_chars=len(doc.page_content))
+            compressed.append(Document(page_content="\n".join(parts), metadata=metadata))
+        return compressed
@@ -0,0 +1,326 @@
+import json
+import math
+import os
+import threading
+import uuid
+from typing import Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+# -------------------------
+# Quantized / dimension-reduced FAISS store with full-precision re-scoring
+#
+# The in-memory index holds compressed vectors only:
+#   quantizer="sq8"  -> int8 scalar quantization (4x smaller than float32)
+#   quantizer="pq"   -> product quantization, 8 dims per 1-byte code (32x smaller)
+#   quantizer="flat" -> float32 (useful together with reduce_dim)
+# optionally after reduce_dim with reduction="pca" (learned) or
+# reduction="matryoshka" (keep the first dims; for Matryoshka-trained models
+# such as nomic-embed-text).
+#
+# Full float32 vectors are appended to a file on disk and memory-mapped. A
+# query fetches rescore_factor * k candidates from the compressed index and
+# re-ranks just those rows by exact L2 distance, which recovers most of the
+# recall lost to compression. Until `train_size` vectors have arrived the
+# compressed index is untrained and queries scan the memory-mapped file
+# (i.e. behave like a flat float32 index; is_trained tells). int8 only learns
+# per-dimension ranges and trains from 256 vectors; PQ's k-means needs
+# 39 x 256 points per codebook, so it waits for ~10k.
+#
+# `filter` may be a metadata dict or a callable, and `score_threshold` is a
+# maximum L2 distance, as for LangChain's FAISS store.
+# -------------------------
+
+
+def make_compressed_index(dim: int, quantizer: str = "sq8", reduce_dim: Optional[int] = None, reduction: str = "pca"):
+    inner_dim = reduce_dim or dim
+    if quantizer == "sq8":
+        index = faiss.IndexScalarQuantizer(inner_dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    elif quantizer == "pq":
+        sub_quantizers = max(m for m in range(1, inner_dim // 8 + 1) if inner_dim % m == 0)
+        index = faiss.IndexPQ(inner_dim, sub_quantizers, 8)
+    elif quantizer == "flat":
+        index = faiss.IndexFlatL2(inner_dim)
+    else:
+        raise ValueError(f"Unknown quantizer: {quantizer}")
+
+    if reduce_dim and reduction == "pca":
+        return faiss.IndexPreTransform(faiss.PCAMatrix(dim, reduce_dim), index)
+    return index
+
+
+class FullPrecisionVectors:
+    """Append-only float32 matrix in a file, read back through np.memmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dim = None
+        self.count = 0
+        self._mmap = None
+        open(path, "wb").close()  # a new store starts from an empty file
+
+    def append(self, vectors: np.ndarray):
+        self.dim = vectors.shape[1]
+        with open(self.path, "ab") as f:
+            np.ascontiguousarray(vectors, dtype=np.float32).tofile(f)
+        self.count += len(vectors)
+        self._mmap = None
+
+    def matrix(self) -> np.ndarray:
+        if self._mmap is None:
+            self._mmap = np.memmap(self.path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+        return self._mmap
+
+
+class QuantizedFAISS(FAISS):
+    """LangChain FAISS store with a compressed index and on-disk re-scoring."""
+
+    def __init__(
+        self,
+        embedding_function,
+        directory: str,
+        quantizer: str = "sq8",
+        reduce_dim: Optional[int] = None,
+        reduction: str = "pca",
+        rescore_factor: int = 4,
+        train_size: Optional[int] = None,
+    ):
+        super().__init__(embedding_function, None, InMemoryDocstore(), {})
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.quantizer = quantizer
+        self.reduce_dim = reduce_dim
+        self.reduction = reduction
+        self.rescore_factor = rescore_factor
+        self.train_size = train_size or (10_000 if quantizer == "pq" else 256)
+        self.full_vectors = FullPrecisionVectors(os.path.join(directory, "full_vectors.f32"))
+        self._untrained = 0  # rows in full_vectors not yet added to the compressed index
+
+    def _reduce(self, vectors: np.ndarray) -> np.ndarray:
+        if self.reduce_dim and self.reduction == "matryoshka":
+            vectors = np.ascontiguousarray(vectors[:, : self.reduce_dim])
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def _train_if_ready(self):
+        if self.index is not None or self._untrained < self.train_size:
+            return
+        full = np.asarray(self.full_vectors.matrix())
+        self.index = make_compressed_index(full.shape[1], self.quantizer, self.reduce_dim, self.reduction)
+        sample = self._reduce(full)
+        self.index.train(sample)
+        self.index.add(sample)
+        self._untrained = 0
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[Iterable[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs,
+    ) -> List[str]:
+        texts, embeddings = zip(*text_embeddings)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+
+        start = len(self.index_to_docstore_id)
+        self.docstore.add({
+            id_: Document(page_content=text, metadata=metadata)
+            for id_, text, metadata in zip(ids, texts, metadatas)
+        })
+        for offset, id_ in enumerate(ids):
+            self.index_to_docstore_id[start + offset] = id_
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        self.full_vectors.append(vectors)
+        if self.index is None:
+            self._untrained += len(vectors)
+            self._train_if_ready()
+        else:
+            self.index.add(self._reduce(vectors))
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids=None, **kwargs) -> List[str]:
+        texts = list(texts)
+        embeddings = self.embedding_function.embed_documents(texts)
+        return self.add_embeddings(zip(texts, embeddings), metadatas=metadatas, ids=ids)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.index is not None
+
+    def memory_bytes(self) -> int:
+        return faiss.serialize_index(self.index).nbytes if self.index is not None else 0
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, fetch_k: int = 20, **kwargs
+    ) -> List[Tuple[Document, float]]:
+        total = self.full_vectors.count
+        if not total:
+            return []
+        query = np.asarray([embedding], dtype=np.float32)
+        filter_func = self._create_filter_func(filter) if filter is not None else None
+        score_threshold = kwargs.get("score_threshold")
+
+        if self.index is not None:
+            want = (fetch_k if filter is not None else k) * self.rescore_factor
+            _, found = self.index.search(self._reduce(query.copy()), min(want, total))
+            candidates = found[0][found[0] >= 0]
+        else:
+            candidates = np.arange(total)
+
+        # Exact re-scoring: only the candidate rows are read from disk
+        candidates = np.sort(candidates)
+        full = self.full_vectors.matrix()[candidates]
+        distances = ((full - query) ** 2).sum(axis=1)
+
+        results = []
+        for position in np.argsort(distances):
+            if score_threshold is not None and distances[position] > score_threshold:
+                break  # ascending distances: the rest are further away
+            doc = self.docstore.search(self.index_to_docstore_id[int(candidates[position])])
+            if filter_func is not None and not filter_func(doc.metadata):
+                continue
+            results.append((doc, float(distances[position])))
+            if len(results) == k:
+                break
+        return results
+
+
+# -------------------------
+# Index factory: Flat / HNSW / IVF-Flat / IVF-SQ8 / IVF-PQ, chosen by corpus size
+#
+# A flat index is an exact brute-force scan; past ~10k chunks an approximate
+# index answers in a fraction of the time at ~0.99 recall@10:
+#   < 10k chunks   -> Flat              (exact, no training)
+#   < 1M chunks    -> HNSW32            (graph, no training, +256 B/vector)
+#   >= 1M chunks   -> IVF{nlist},SQ8    (k-means lists + int8 codes, 4x less RAM)
+# IVF-Flat and IVF-PQ (smallest, but lowest recall and slow to train) can be
+# picked explicitly. IVF indexes are trained on a sample of the corpus. The
+# trained centroids / codebooks / graph are saved by save_local together
+# with index_params.json (kind, spec, search defaults). Search breadth
+# (nprobe for IVF, ef_search for HNSW) can be passed per query:
+# store.similarity_search(q, k=10, nprobe=32) or
+# store.as_retriever(search_kwargs={"k": 4, "nprobe": 32}).
+# -------------------------
+
+INDEX_KINDS = ("auto", "flat", "hnsw", "ivf_flat", "ivf_sq8", "ivf_pq")
+TRAIN_SAMPLE = 100_000  # enough for nlist up to ~2.5k at 39 points per centroid
+
+
+def choose_index_kind(n_vectors: int) -> str:
+    if n_vectors < 10_000:
+        return "flat"
+    if n_vectors < 1_000_000:
+        return "hnsw"
+    return "ivf_sq8"
+
+
+def index_spec(kind: str, n_vectors: int, dim: int) -> str:
+    # faiss.index_factory description string for `kind` at this corpus size
+    # ~4*sqrt(n) lists, but no more than k-means can train (39 points per list)
+    nlist = max(16, min(4 * int(math.sqrt(n_vectors)), n_vectors // 39))
+    if kind == "flat":
+        return "Flat"
+    if kind == "hnsw":
+        return "HNSW32,Flat"
+    if kind == "ivf_flat":
+        return f"IVF{nlist},Flat"
+    if kind == "ivf_sq8":
+        return f"IVF{nlist},SQ8"
+    if kind == "ivf_pq":
+        sub_quantizers = max(m for m in range(1, dim // 8 + 1) if dim % m == 0)
+        return f"IVF{nlist},PQ{sub_quantizers}x8"
+    raise ValueError(f"Unknown index kind: {kind}")
+
+
+def default_search_params(kind: str, spec: str) -> dict:
+    if kind == "hnsw":
+        return {"ef_search": 64}
+    if kind.startswith("ivf"):
+        nlist = int(spec.split(",")[0][3:])
+        return {"nprobe": max(8, nlist // 64)}
+    return {}
+
+
+def build_trained_index(vectors: np.ndarray, kind: str = "auto", seed: int = 0):
+    n_vectors, dim = vectors.shape
+    if kind == "auto":
+        kind = choose_index_kind(n_vectors)
+    spec = index_spec(kind, n_vectors, dim)
+    index = faiss.index_factory(dim, spec)
+    if not index.is_trained:
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(n_vectors, min(n_vectors, TRAIN_SAMPLE), replace=False)]
+        index.train(np.ascontiguousarray(sample, dtype=np.float32))
+    params = default_search_params(kind, spec)
+    apply_search_params(index, **params)
+    return index, {"kind": kind, "spec": spec, "n_vectors": n_vectors, "dim": dim, **params}
+
+
+def apply_search_params(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    # ParameterSpace also reaches through IndexPreTransform / IndexIDMap wrappers
+    space = faiss.ParameterSpace()
+    if nprobe is not None:
+        space.set_index_parameter(index, "nprobe", nprobe)
+    if ef_search is not None:
+        space.set_index_parameter(index, "efSearch", ef_search)
+
+
+class TunableFAISS(FAISS):
+    """FAISS store over a factory-built index with per-query nprobe / ef_search."""
+
+    def __init__(self, *args, index_params: Optional[dict] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index_params = index_params or {"kind": "flat", "spec": "Flat"}
+        self._search_lock = threading.Lock()
+        apply_search_params(self.index, **{key: self.index_params.get(key) for key in ("nprobe", "ef_search")})
+
+    @classmethod
+    def from_store(cls, store: FAISS, kind: str = "auto") -> "TunableFAISS":
+        """Rebuild a (flat) FAISS store's vectors into the index chosen for its size."""
+        # ingest() returns None when there were no chunks to embed
+        if store is None or store.index is None or store.index.ntotal == 0:
+            raise ValueError("No vectors to build an index from: the corpus produced no chunks")
+        vectors = store.index.reconstruct_n(0, store.index.ntotal)
+        index, params = build_trained_index(vectors, kind)
+        index.add(vectors)
+        return cls(store.embedding_function, index, store.docstore, dict(store.index_to_docstore_id), index_params=params)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, fetch_k: int = 20, **kwargs
+    ) -> List[Tuple[Document, float]]:
+        nprobe, ef_search = kwargs.pop("nprobe", None), kwargs.pop("ef_search", None)
+        kind = self.index_params["kind"]
+        knobs = {}
+        if nprobe and kind.startswith("ivf"):
+            knobs["nprobe"] = nprobe
+        if ef_search and kind == "hnsw":
+            knobs["ef_search"] = ef_search
+
+        # Search parameters live on the shared index: set, search, restore.
+        # Plain searches take the lock too so they never see another query's knobs.
+        defaults = {key: self.index_params[key] for key in knobs}
+        with self._search_lock:
+            apply_search_params(self.index, **knobs)
+            try:
+                return super().similarity_search_with_score_by_vector(embedding, k, filter=filter, fetch_k=fetch_k, **kwargs)
+            finally:
+                apply_search_params(self.index, **defaults)
+
+    def save_local(self, folder_path: str, index_name: str = "index") -> None:
+        super().save_local(folder_path, index_name)
+        with open(os.path.join(folder_path, f"{index_name}_params.json"), "w") as f:
+            json.dump(self.index_params, f)
+
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings, *, allow_dangerous_deserialization: bool = False,
+                   index_name: str = "index", **kwargs) -> "TunableFAISS":
+        with open(os.path.join(folder_path, f"{index_name}_params.json")) as f:
+            params = json.load(f)
+        return super().load_local(folder_path, embeddings, index_name=index_name, index_params=params,
+                                  allow_dangerous_deserialization=allow_dangerous_deserialization, **kwargs)
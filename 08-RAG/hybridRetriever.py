@@ -0,0 +1,142 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import List, Optional, Set
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from metadataIndex import MetadataIndex, chroma_where
+
+# -------------------------
+# Hybrid retrieval: BM25 (exact tokens) + vector search, fused with RRF
+#
+# Dense MiniLM vectors are good at "what does this failure mean", but poor at
+# exact tokens such as exception class names, error codes and hostnames.
+# The in-process inverted index below keeps those tokens intact and is filled
+# batch by batch alongside the vector store (see ingestPipeline.ingest).
+#
+# With a metadata_index and metadata_filter (test name / environment / time
+# range, see metadataIndex.py) both searches only ever score chunks that pass
+# the filter, so latency tracks the filtered slice, not the whole index.
+#
+# A shared index (logIndex.LogIndex) is searched by one session while
+# another adds a batch, so add_documents and search take the index's lock.
+# -------------------------
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_][A-Za-z0-9_.:/\-]*")
+SUBTOKEN_SPLIT = re.compile(r"[.:/\-]+")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group().rstrip(".:/-")
+        if not token:
+            continue
+        tokens.append(token)
+        # java.net.ConnectException -> also java, net, connectexception
+        parts = SUBTOKEN_SPLIT.split(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+
+class BM25Index:
+    """Incremental Okapi BM25 inverted index over LangChain Documents."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs: List[Document] = []
+        self.doc_lengths: List[int] = []
+        self.postings = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self.total_length = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add_documents(self, docs: List[Document]):
+        # Tokenize outside the lock; searches only wait for the postings update
+        counted = [(doc, Counter(tokenize(doc.page_content))) for doc in docs]
+        with self.lock:
+            for doc, counts in counted:
+                doc_id = len(self.docs)
+                for term, tf in counts.items():
+                    self.postings[term][doc_id] = tf
+                length = sum(counts.values())
+                self.docs.append(doc)
+                self.doc_lengths.append(length)
+                self.total_length += length
+
+    def search(self, query: str, k: int = 4, allowed: Optional[Set[int]] = None):
+        terms = set(tokenize(query))
+        with self.lock:
+            n_docs = len(self.docs)
+            if not n_docs:
+                return []
+            avg_length = self.total_length / n_docs
+
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                if allowed is not None:
+                    if len(allowed) < len(postings):
+                        postings = {doc_id: postings[doc_id] for doc_id in allowed if doc_id in postings}
+                    else:
+                        postings = {doc_id: tf for doc_id, tf in postings.items() if doc_id in allowed}
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            return [(self.docs[doc_id], score) for doc_id, score in ranked]
+
+
+def reciprocal_rank_fusion(ranked_lists, k: int = 60):
+    # Each list is a ranking of Documents; same chunk text counts as the same hit
+    scores = defaultdict(float)
+    docs = {}
+    for ranking in ranked_lists:
+        for rank, doc in enumerate(ranking):
+            key = doc.page_content
+            scores[key] += 1.0 / (k + rank + 1)
+            docs.setdefault(key, doc)
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ordered]
+
+
+class HybridRetriever(BaseRetriever):
+    """Vector store search and BM25 search fused with reciprocal-rank fusion."""
+
+    vectorstore: VectorStore
+    sparse_index: BM25Index
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    metadata_index: Optional[MetadataIndex] = None
+    metadata_filter: Optional[dict] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        allowed = self.metadata_index.matching(self.metadata_filter) if self.metadata_index else None
+        if allowed is not None and not allowed:
+            return []
+        sparse = [doc for doc, _ in self.sparse_index.search(query, k=self.fetch_k, allowed=allowed)]
+
+        if allowed is not None:
+            # The same filter in Chroma's where syntax; Chroma applies it before the ANN search.
+            # A slice smaller than fetch_k still needs the dense ranking: a query with no
+            # lexical hit must get the closest chunks, not the first ones in reading order
+            dense = self.vectorstore.similarity_search(query, k=self.fetch_k, filter=chroma_where(self.metadata_filter))
+        else:
+            dense = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        return reciprocal_rank_fusion([dense, sparse], k=self.rrf_k)[: self.k]
@@ -0,0 +1,241 @@
+import glob
+import hashlib
+import os
+import queue
+import shutil
+import threading
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from langchain_community.document_loaders import PyPDFLoader, TextLoader
+from langchain_community.vectorstores import FAISS
+
+# -------------------------
+# Streaming ingestion: load -> split -> embed (micro-batches) -> upsert
+#
+# Pages are parsed lazily and split one at a time on a background thread.
+# Chunks are grouped into micro-batches and handed to the embedder through a
+# bounded queue, so parsing of the next PDF overlaps with embedding of the
+# previous batch, and at most `max_pending` batches are ever held in memory
+# (the parser blocks when the embedder falls behind).
+# -------------------------
+
+
+def pdf_loaders(directory: str):
+    for path in sorted(glob.glob(os.path.join(directory, "*.pdf"))):
+        yield PyPDFLoader(path)
+
+
+def upload_batch_id(files) -> str:
+    # Content hash of a set of Streamlit uploads; same files -> same id
+    digest = hashlib.sha1()
+    for file in sorted(files, key=lambda f: f.name):
+        digest.update(file.name.encode())
+        digest.update(file.getvalue())
+    return digest.hexdigest()[:16]
+
+
+def upload_collection_name(session_id: str, batch_id: str) -> str:
+    # One Chroma collection per browser session and upload batch; without a name every
+    # Chroma() in the process opens the shared default "langchain" collection
+    return f"upload-{session_id[:12]}-{batch_id}"
+
+
+def _discard_upload(upload_dir: str, current: dict):
+    vectorstore = current.pop("vectorstore", None)
+    current.pop("batch_id", None)
+    if vectorstore is not None:
+        vectorstore.delete_collection()
+    shutil.rmtree(upload_dir, ignore_errors=True)
+
+
+class UploadSession:
+    """One browser session's upload folder and its current batch's Chroma collection.
+
+    clear() drops both; it runs when a batch is replaced or the uploads are
+    cleared, and again when Streamlit discards the session state (or the
+    process exits), so neither outlives the session.
+    """
+
+    def __init__(self, root: str = "./temp_pdfs"):
+        self.id = uuid.uuid4().hex
+        self.dir = os.path.join(root, self.id)
+        self._current = {}
+        self._finalizer = weakref.finalize(self, _discard_upload, self.dir, self._current)
+
+    @property
+    def batch_id(self):
+        return self._current.get("batch_id")
+
+    @property
+    def vectorstore(self):
+        return self._current.get("vectorstore")
+
+    def batch_dir(self, batch_id: str) -> str:
+        path = os.path.join(self.dir, batch_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def collection_name(self, batch_id: str) -> str:
+        return upload_collection_name(self.id, batch_id)
+
+    def keep(self, batch_id: str, vectorstore):
+        self._current.update(batch_id=batch_id, vectorstore=vectorstore)
+
+    def clear(self):
+        _discard_upload(self.dir, self._current)
+
+
+def file_fingerprint(paths) -> str:
+    # Cheap version id for files on disk (name, size, mtime)
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def loader_for(path: str):
+    # PDFs page by page; .txt / .json are loaded as raw text
+    if path.lower().endswith(".pdf"):
+        return PyPDFLoader(path)
+    return TextLoader(path, autodetect_encoding=True)
+
+
+def iter_pages_parallel(loaders, max_workers: int = 4, max_pending: int = 64):
+    # Parse several files at once; every page is queued as soon as lazy_load() yields it,
+    # so pages stream into the splitter instead of waiting for whole files. pypdf is
+    # GIL-bound, so the workers mostly overlap file I/O and the embedder downstream;
+    # the bounded queue keeps at most `max_pending` parsed pages in memory.
+    loaders = list(loaders)
+    q = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+
+    def parse(loader):
+        try:
+            for page in loader.lazy_load():
+                if not _put(q, page, stop):
+                    return
+        except BaseException as e:
+            _put(q, e, stop)
+        finally:
+            _put(q, _DONE, stop)
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    for loader in loaders:
+        pool.submit(parse, loader)
+    remaining = len(loaders)
+    try:
+        while remaining:
+            item = q.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_pages(loaders, max_pages=None):
+    pages = (page for loader in loaders for page in loader.lazy_load())
+    if max_pages is not None:
+        pages = islice(pages, max_pages)
+    yield from pages
+
+
+def iter_chunks(pages, text_splitter):
+    for page in pages:
+        yield from text_splitter.split_documents([page])
+
+
+def micro_batches(items, batch_size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+_DONE = object()
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    # Blocking put that gives up once the consumer has stopped listening
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(batches, q: queue.Queue, stop: threading.Event):
+    try:
+        for batch in batches:
+            if not _put(q, batch, stop):
+                return
+    except BaseException as e:
+        _put(q, e, stop)
+    finally:
+        _put(q, _DONE, stop)
+
+
+def _upsert(vectorstore, embeddings, batch):
+    texts = [doc.page_content for doc in batch]
+    metadatas = [doc.metadata for doc in batch]
+
+    # FAISS accepts precomputed vectors; other stores embed on add
+    if vectorstore is None:
+        vectors = embeddings.embed_documents(texts)
+        return FAISS.from_embeddings(list(zip(texts, vectors)), embeddings, metadatas=metadatas)
+    if isinstance(vectorstore, FAISS):
+        vectors = embeddings.embed_documents(texts)
+        vectorstore.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas)
+    else:
+        vectorstore.add_documents(batch)
+    return vectorstore
+
+
+def ingest(chunks, embeddings, vectorstore=None, batch_size: int = 64, max_pending: int = 4, on_batch=None):
+    """Embed and upsert `chunks` (any iterable of Documents) in micro-batches.
+
+    If `vectorstore` is None a FAISS index is built from the first batch;
+    with no chunks at all the result is then None, so callers must check it.
+    `on_batch(batch, total_chunks)` is called after every upsert, e.g. to
+    update a progress bar or feed a sparse index built alongside.
+    """
+    q = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_produce,
+        args=(micro_batches(chunks, batch_size), q, stop),
+        daemon=True,
+    )
+    producer.start()
+
+    total = 0
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            vectorstore = _upsert(vectorstore, embeddings, item)
+            total += len(item)
+            if on_batch is not None:
+                on_batch(item, total)
+    finally:
+        stop.set()
+        producer.join()
+
+    return vectorstore
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Dict, List
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from hybridRetriever import BM25Index
+from ingestPipeline import ingest
+from metadataIndex import FILTER_FIELDS, MetadataIndex
+
+# -------------------------
+# Shared, namespaced log indexes for ragAppLogsReader
+#
+# One persistent Chroma collection per namespace (a session id or a test run
+# id), opened once per process and shared by every session that uses the
+# namespace, with its BM25 and metadata indexes alongside. Chunks get a
+# content-hash id, so re-indexing the same logs is a no-op instead of a
+# duplicate.
+#
+# Sessions hold a lease: acquire() on every rerun refreshes it, close()
+# gives it up. gc() expires leases not refreshed for `idle_seconds` and
+# unloads namespaces nobody holds; their data stays on disk and is reloaded
+# by the next acquire(). close(delete=True) by the last holder drops the
+# collection.
+# -------------------------
+
+INDEX_DIR = os.getenv(
+    "LOG_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "log_index"),
+)
+
+
+def collection_name(namespace: str) -> str:
+    # Chroma names: 3-63 chars of [a-zA-Z0-9._-]; the hash keeps them unique
+    slug = re.sub(r"[^a-zA-Z0-9_-]+", "-", namespace).strip("-_")[:40]
+    return f"logs-{slug}-{hashlib.sha1(namespace.encode()).hexdigest()[:8]}"
+
+
+def chunk_id(doc: Document) -> str:
+    digest = hashlib.sha1(doc.page_content.encode())
+    for field in FILTER_FIELDS:
+        digest.update(f"\0{doc.metadata.get(field, '')}".encode())
+    return digest.hexdigest()
+
+
+def process_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+class LogIndex:
+    """Chroma collection + BM25 + metadata index for one namespace."""
+
+    def __init__(self, namespace: str, embeddings, persist_directory: str = INDEX_DIR):
+        self.namespace = namespace
+        self.vectorstore = Chroma(
+            collection_name=collection_name(namespace),
+            embedding_function=embeddings,
+            persist_directory=persist_directory,
+        )
+        self.sparse_index = BM25Index()
+        self.metadata_index = MetadataIndex()
+        self.ids = set()
+        self.text_bytes = 0
+        self.holders: Dict[str, float] = {}  # holder id -> last seen
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+        # Reopened namespace: rebuild the in-memory indexes from the collection
+        stored = self.vectorstore.get(include=["documents", "metadatas"])
+        docs = [
+            Document(page_content=text, metadata=metadata or {}, id=id_)
+            for id_, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        ]
+        self._track(sorted(docs, key=lambda doc: doc.metadata.get("indexed_at", 0)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _track(self, docs: List[Document]):
+        self.sparse_index.add_documents(docs)
+        self.metadata_index.add_documents(docs)
+        self.ids.update(doc.id for doc in docs)
+        self.text_bytes += sum(len(doc.page_content) for doc in docs)
+
+    def upsert(self, docs: List[Document], embeddings) -> int:
+        """Index chunks not seen before in this namespace; returns how many were new."""
+        with self.lock:
+            new = {}
+            for doc in docs:
+                id_ = chunk_id(doc)
+                if id_ not in self.ids and id_ not in new:
+                    new[id_] = Document(page_content=doc.page_content, metadata=doc.metadata, id=id_)
+            if new:
+                ingest(list(new.values()), embeddings, vectorstore=self.vectorstore,
+                       on_batch=lambda batch, total: self._track(batch))
+            return len(new)
+
+
+class LogIndexRegistry:
+    """Process-wide namespace -> LogIndex map with leases and idle GC."""
+
+    def __init__(self, persist_directory: str = INDEX_DIR, idle_seconds: float = 1800, vector_dim: int = 384):
+        self.persist_directory = persist_directory
+        self.idle_seconds = idle_seconds
+        self.vector_dim = vector_dim  # for the memory estimate only
+        self.indexes: Dict[str, LogIndex] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, namespace: str, holder: str, embeddings) -> LogIndex:
+        with self._lock:
+            self.gc()
+            index = self.indexes.get(namespace)
+            if index is None:
+                index = LogIndex(namespace, embeddings, self.persist_directory)
+                self.indexes[namespace] = index
+            index.holders[holder] = index.last_used = time.time()
+            return index
+
+    def close(self, namespace: str, holder: str, delete: bool = False):
+        with self._lock:
+            index = self.indexes.get(namespace)
+            if index is None:
+                return
+            index.holders.pop(holder, None)
+            index.last_used = time.time()
+            if delete and not index.holders:
+                index.vectorstore.delete_collection()
+                del self.indexes[namespace]
+
+    def gc(self) -> List[str]:
+        # Called with self._lock held (from acquire) or on its own
+        now = time.time()
+        unloaded = []
+        for namespace, index in list(self.indexes.items()):
+            for holder, seen in list(index.holders.items()):
+                if now - seen > self.idle_seconds:
+                    del index.holders[holder]
+            if not index.holders and now - index.last_used > self.idle_seconds:
+                del self.indexes[namespace]
+                unloaded.append(namespace)
+        return unloaded
+
+    def memory_summary(self) -> str:
+        chunks = sum(len(index) for index in self.indexes.values())
+        text = sum(index.text_bytes for index in self.indexes.values())
+        estimate = text * 2 + chunks * self.vector_dim * 4  # text in BM25 + Chroma, float32 vectors
+        holders = sum(len(index.holders) for index in self.indexes.values())
+        return (
+            f"Log indexes: {len(self.indexes)} loaded ({holders} sessions), {chunks:,} chunks, "
+            f"~{estimate / 1e6:.1f} MB; process RSS {process_rss_bytes() / 1e6:.0f} MB"
+        )
+
+
+LOG_INDEXES = LogIndexRegistry()
@@ -0,0 +1,143 @@
+import json
+from typing import Iterable, List
+
+from langchain_text_splitters import TextSplitter
+
+# -------------------------
+# Log-aware splitter: chunk on log-record, stack-trace and JSON boundaries
+#
+# One linear pass over the lines groups them into whole records:
+# - a timestamped / level-prefixed line starts a record, everything until the
+#   next one (stack frames, "Caused by:", wrapped messages) belongs to it;
+# - logs without timestamps fall back to "indented / 'at ' / 'Caused by' /
+#   open-bracket lines continue the previous record";
+# - a JSON document is split into its top-level elements; bracket-prefixed
+#   logs ("[INFO] ...", "[2024-01-31 10:00:00] ...") are not JSON even when
+#   the last line happens to end in "]".
+# Records are then packed into chunks; only a single record larger than
+# chunk_size is cut, and then only between lines.
+# No regexes are used, so there is nothing to backtrack on.
+# -------------------------
+
+LOG_LEVELS = {"TRACE", "DEBUG", "INFO", "NOTICE", "WARN", "WARNING", "ERROR", "SEVERE", "FATAL", "CRITICAL"}
+CONTINUATION_PREFIXES = ("at ", "Caused by", "...", "Suppressed:", "}", "]", "File \"")
+SNIFF_LINES = 50
+
+
+def _has_timestamp(line: str) -> bool:
+    s = line.lstrip("[")
+    # 2024-01-31 / 2024/01/31 / 2024-01-31T...
+    if len(s) >= 10 and s[:4].isdigit() and s[4] in "-/." and s[5:7].isdigit() and s[7] == s[4]:
+        return True
+    # 12:34:56 (Jenkins timestamper, syslog time part)
+    if len(s) >= 8 and s[:2].isdigit() and s[2] == ":" and s[3:5].isdigit() and s[5] == ":":
+        return True
+    # Jan 31 12:34:56 (syslog)
+    return len(s) >= 15 and s[:3].isalpha() and s[3] == " " and s[7:9].isdigit() and s[9] == ":"
+
+
+def _has_level(line: str) -> bool:
+    head = line.split(None, 1)
+    return bool(head) and head[0].strip("[]:").upper() in LOG_LEVELS
+
+
+def _is_continuation(line: str) -> bool:
+    return line[0] in " \t" or line.startswith(CONTINUATION_PREFIXES)
+
+
+def _bracket_delta(line: str) -> int:
+    return line.count("{") + line.count("[") - line.count("}") - line.count("]")
+
+
+def _is_json(text: str) -> bool:
+    if text[:1] not in ("{", "[") or text.rstrip()[-1:] not in ("}", "]"):
+        return False
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        # Truncated/invalid JSON is still split as JSON unless it reads as a log
+        first = text.split("\n", 1)[0]
+        return not (_has_timestamp(first) or _has_level(first))
+
+
+def _json_elements(text: str) -> List[str]:
+    # Split a JSON object/array into its top-level members/elements
+    body = text.strip()
+    inner = body[1:-1] if body[-1:] in "}]" else body[1:]
+    elements, depth, in_string, escaped, start = [], 0, False, False, 0
+    for i, ch in enumerate(inner):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            elements.append(inner[start:i].strip())
+            start = i + 1
+    elements.append(inner[start:].strip())
+    return [element for element in elements if element]
+
+
+class LogTextSplitter(TextSplitter):
+    """Splits logs, stack traces and JSON into semantically whole chunks."""
+
+    def _log_records(self, lines: List[str]) -> Iterable[str]:
+        sniff = [line for line in lines[:SNIFF_LINES] if line.strip()]
+        structured = any(_has_timestamp(line) or _has_level(line) for line in sniff)
+
+        record: List[str] = []
+        size, depth = 0, 0
+        for line in lines:
+            if not line.strip():
+                if depth <= 0 and record:
+                    yield "".join(record)
+                    record, size = [], 0
+                continue
+
+            if structured:
+                starts = _has_timestamp(line) or _has_level(line)
+            else:
+                starts = depth <= 0 and not _is_continuation(line)
+            # An unbalanced bracket never swallows more than one chunk
+            if starts or size > self._chunk_size:
+                if record:
+                    yield "".join(record)
+                record, size, depth = [], 0, 0
+
+            record.append(line)
+            size += len(line)
+            if "{" in line or "[" in line or depth > 0:
+                depth += _bracket_delta(line)
+        if record:
+            yield "".join(record)
+
+    def _fit(self, record: str) -> List[str]:
+        # Keep records whole; cut an oversized one only between lines
+        record = record.rstrip("\n")
+        if self._length_function(record) <= self._chunk_size:
+            return [record]
+        pieces = []
+        for line in record.split("\n"):
+            while self._length_function(line) > self._chunk_size:
+                pieces.append(line[: self._chunk_size])
+                line = line[self._chunk_size:]
+            pieces.append(line)
+        return self._merge_splits(pieces, "\n")
+
+    def split_text(self, text: str) -> List[str]:
+        stripped = text.lstrip()
+        if _is_json(stripped):
+            units = [piece for element in _json_elements(stripped) for piece in self._fit(element)]
+            return self._merge_splits(units, ",\n")
+
+        units = [piece for record in self._log_records(text.splitlines(keepends=True)) for piece in self._fit(record)]
+        return self._merge_splits(units, "\n")
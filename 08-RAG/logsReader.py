@@ -1,10 +1,8 @@
 import os
-import re
 
 import streamlit as st
 from dotenv import load_dotenv
 
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
@@ -13,6 +11,10 @@ from langchain_core.runnables import RunnableWithMessageHistory
 from langchain_groq import ChatGroq
 from langchain_community.chat_models import ChatOllama  # for local fallback
 
+from redaction import Redactor
+from chatHistory import llm_summarizer
+from sqliteHistory import SQLiteChatMessageHistory
+
 # -------------------------
 # Setup
 # -------------------------
@@ -49,22 +51,7 @@ else:
 # Redaction: strip obvious secrets/PII
 # -------------------------
 
-SENSITIVE_PATTERNS = [
-    r"Authorization:\s*Bearer\s+[^\s]+",
-    r"Authorization:\s*[^\n]+",
-    r"Set-Cookie:\s*[^\n]+",
-    r"(?i)password\s*=\s*['\"][^'\"\n]+['\"]",
-    r"(?i)pwd\s*=\s*['\"][^'\"\n]+['\"]",
-    r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+",
-    r"[A-Za-z0-9-_]+\.[A-Za-z0-9-_]+\.[A-Za-z0-9-_]+",
-    r"\b[0-9a-fA-F]{32,64}\b",
-]
-
-def redact_sensitive(text: str) -> str:
-    redacted = text
-    for pattern in SENSITIVE_PATTERNS:
-        redacted = re.sub(pattern, "[REDACTED]", redacted, flags=re.IGNORECASE)
-    return redacted
+# Single compiled pass over the logs; see redaction.py for the rules
 
 # -------------------------
 # Prompt + chain (LLM only, no RAG)
@@ -107,16 +94,14 @@ output_parser = StrOutputParser()
 base_chain = prompt | llm | output_parser
 
 # -------------------------
-# Chat history store (per session_id)
+# Chat history store (per session_id, persisted in SQLite)
 # -------------------------
 
-if "store" not in st.session_state:
-    st.session_state.store = {}
+summarize = llm_summarizer(llm)
 
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
-    if session_id not in st.session_state.store:
-        st.session_state.store[session_id] = ChatMessageHistory()
-    return st.session_state.store[session_id]
+    # Durable: stored in SQLite, shared by every app process using the same DB file
+    return SQLiteChatMessageHistory(session_id, summarize=summarize)
 
 conversation_chain = RunnableWithMessageHistory(
     base_chain,
@@ -146,14 +131,21 @@ raw_logs = st.text_area(
 if st.button("Set / Update logs for this session"):
     st.session_state["environment"] = environment
     st.session_state["logs"] = raw_logs
+    # Redact once here instead of on every chat turn
+    redactor = Redactor()
+    st.session_state["safe_logs"] = redactor.redact(raw_logs)
+    st.session_state["redaction_hits"] = dict(redactor.hits)
     st.success("Logs and context updated for this session.")
 
+if st.session_state.get("redaction_hits"):
+    st.caption(f"Redacted: {st.session_state['redaction_hits']}")
+
 st.subheader("2️⃣ Ask questions about this failure")
 
 session_history = get_session_history(session_id)
 
 # Render existing chat history
-for msg in session_history.messages:
+for msg in session_history.transcript:
     if msg.type == "human":
         with st.chat_message("user"):
             st.markdown(msg.content)
@@ -172,7 +164,7 @@ if user_input:
         with st.chat_message("user"):
             st.markdown(user_input)
 
-        safe_logs = redact_sensitive(st.session_state["logs"])
+        safe_logs = st.session_state.get("safe_logs", "")
 
         # Call LLM with spinner so it doesn't feel stuck
         with st.chat_message("assistant"):
@@ -0,0 +1,151 @@
+import re
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+
+# -------------------------
+# Inverted metadata index for pre-filtered retrieval
+#
+# Maps field -> value -> chunk positions (test_name, environment) and keeps
+# sorted (timestamp, position) columns for time ranges. Positions follow the
+# order chunks are added, i.e. the same ids BM25Index uses when both are fed
+# the same batches from ingest(on_batch=...).
+#
+# A filter is a plain dict:
+#   {"test_name": ["LoginTest"], "environment": ["QA", "STG"], "since": ts, "until": ts}
+# Empty / missing entries do not restrict. Times are those of the log records
+# in a chunk (add_record_times: ts_min / ts_max from the records' own
+# timestamps), and a chunk matches when [ts_min, ts_max] overlaps the range;
+# chunks without any dated record never match a time filter. matching()
+# narrows to the allowed positions before any scoring happens;
+# chroma_where() expresses the same filter for Chroma, which applies it
+# before its own vector search.
+# Reads and adds take the index's lock: a LogIndex is shared by sessions.
+# -------------------------
+
+FILTER_FIELDS = ("test_name", "environment")
+TIME_MIN_FIELD = "ts_min"
+TIME_MAX_FIELD = "ts_max"
+
+# 2024-05-01 10:00:00,123 / [2024/05/01T10:00:00.123Z] / 2024-05-01 10:00:00+02:00 at the start of a line
+RECORD_TIME = re.compile(
+    r"^\s*\[?(\d{4})[-/.](\d{2})[-/.](\d{2})[ T](\d{2}):(\d{2}):(\d{2})(?:[.,](\d+))?\s*(Z|[+-]\d{2}:?\d{2})?",
+    re.MULTILINE,
+)
+
+
+def record_times(text: str) -> List[float]:
+    """Epoch seconds of the dated log records in `text`; times without a zone are local time."""
+    times = []
+    for match in RECORD_TIME.finditer(text):
+        year, month, day, hour, minute, second = (int(part) for part in match.groups()[:6])
+        fraction, zone = match.group(7), match.group(8)
+        stamp = f"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{second:02d}"
+        if zone:
+            stamp += "+00:00" if zone == "Z" else f"{zone[:3]}:{zone[-2:]}"
+        try:
+            times.append(datetime.fromisoformat(stamp).timestamp() + (float(f"0.{fraction}") if fraction else 0.0))
+        except ValueError:
+            continue
+    return times
+
+
+def add_record_times(docs: Iterable[Document]) -> None:
+    """Set ts_min / ts_max on chunks of one log, in order, from their records' timestamps.
+
+    A chunk without a dated record (the rest of a long stack trace) continues the
+    previous chunk's last record, so it gets that time.
+    """
+    previous: Optional[float] = None
+    for doc in docs:
+        times = record_times(doc.page_content)
+        if times:
+            doc.metadata[TIME_MIN_FIELD], doc.metadata[TIME_MAX_FIELD] = min(times), max(times)
+            previous = max(times)
+        elif previous is not None:
+            doc.metadata[TIME_MIN_FIELD] = doc.metadata[TIME_MAX_FIELD] = previous
+
+
+def is_empty_filter(metadata_filter: Optional[dict]) -> bool:
+    if not metadata_filter:
+        return True
+    return not any(metadata_filter.get(field) for field in FILTER_FIELDS) and \
+        metadata_filter.get("since") is None and metadata_filter.get("until") is None
+
+
+def chroma_where(metadata_filter: Optional[dict]) -> Optional[dict]:
+    if is_empty_filter(metadata_filter):
+        return None
+    clauses = [
+        {field: {"$in": list(metadata_filter[field])}}
+        for field in FILTER_FIELDS if metadata_filter.get(field)
+    ]
+    # Overlap of [ts_min, ts_max] with [since, until]
+    if metadata_filter.get("since") is not None:
+        clauses.append({TIME_MAX_FIELD: {"$gte": metadata_filter["since"]}})
+    if metadata_filter.get("until") is not None:
+        clauses.append({TIME_MIN_FIELD: {"$lte": metadata_filter["until"]}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class MetadataIndex:
+    """field -> value -> chunk positions, plus sorted record-time columns."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, Set[int]]] = {field: defaultdict(set) for field in FILTER_FIELDS}
+        self.starts: List[tuple] = []  # sorted (ts_min, position)
+        self.ends: List[tuple] = []  # sorted (ts_max, position)
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def add_documents(self, docs: List[Document]):
+        with self.lock:
+            for doc in docs:
+                for field in FILTER_FIELDS:
+                    self.postings[field][doc.metadata.get(field, "N/A")].add(self.size)
+                if TIME_MIN_FIELD in doc.metadata and TIME_MAX_FIELD in doc.metadata:
+                    insort(self.starts, (doc.metadata[TIME_MIN_FIELD], self.size))
+                    insort(self.ends, (doc.metadata[TIME_MAX_FIELD], self.size))
+                self.size += 1
+
+    def values(self, field: str) -> List[str]:
+        with self.lock:
+            return sorted(value for value, positions in self.postings[field].items() if positions)
+
+    def time_range(self) -> Optional[Tuple[float, float]]:
+        """Earliest and latest record time indexed, or None without dated records."""
+        with self.lock:
+            return (self.starts[0][0], self.ends[-1][0]) if self.starts else None
+
+    def matching(self, metadata_filter: Optional[dict]) -> Optional[Set[int]]:
+        """Allowed chunk positions, or None when the filter does not restrict."""
+        if is_empty_filter(metadata_filter):
+            return None
+
+        candidate_sets = []
+        with self.lock:
+            for field in FILTER_FIELDS:
+                wanted = metadata_filter.get(field)
+                if wanted:
+                    candidate_sets.append(set().union(*(self.postings[field].get(value, set()) for value in wanted)))
+
+            # Overlap: the chunk ends at/after `since` and starts at/before `until`
+            since, until = metadata_filter.get("since"), metadata_filter.get("until")
+            if since is not None:
+                candidate_sets.append({position for _, position in self.ends[bisect_left(self.ends, (since, -1)):]})
+            if until is not None:
+                candidate_sets.append({position for _, position in self.starts[:bisect_right(self.starts, (until, self.size))]})
+
+        # Intersect smallest first so the work is bounded by the most selective field
+        candidate_sets.sort(key=len)
+        allowed = candidate_sets[0]
+        for other in candidate_sets[1:]:
+            allowed = allowed & other
+        return allowed
@@ -1,10 +1,9 @@
 ## RAG Q&A with pdf uploads including chat history
 
 import streamlit as st
-from langchain.chains import create_history_aware_retriever ,create_retrieval_chain
+from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_chroma import Chroma
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.prompts import ChatPromptTemplate,MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
@@ -13,6 +12,8 @@ from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFDirectoryLoader
 from langchain_core.runnables import RunnableWithMessageHistory
+from chatHistory import SessionHistoryStore, llm_summarizer
+from rewriteGate import create_gated_history_aware_retriever
 
 import os
 from dotenv import load_dotenv
@@ -40,7 +41,8 @@ if api_key:
 
   ## statefully manage chat history
     if 'store' not in st.session_state:
-      st.session_state.store={}
+      st.session_state.store=SessionHistoryStore() ## bounded history per session, oldest sessions evicted
+    st.session_state.store.summarize=llm_summarizer(llm) ## older turns get summarised in the background
 
     uploaded_files=st.file_uploader("Upload PDF files",type=["pdf"],accept_multiple_files=True)
 
@@ -76,7 +78,7 @@ if api_key:
             MessagesPlaceholder("chat_history"),
             ("human","{input}")])
 
-        history_aware_retriever=create_history_aware_retriever(llm,retriever,contextualise_q_prompt)
+        history_aware_retriever=create_gated_history_aware_retriever(llm,retriever,contextualise_q_prompt) ## skips the rewrite LLM call when there is no history or the question is self-contained
 
         ## Answer question
 
@@ -97,9 +99,7 @@ if api_key:
         rag_chain=create_retrieval_chain(history_aware_retriever,question_answer_chain)
 
         def get_session_history(session_id:str)->BaseChatMessageHistory:
-            if session_id not in st.session_state.store:
-                st.session_state.store[session_id]=ChatMessageHistory()
-                return st.session_state.store[session_id]
+            return st.session_state.store.get(session_id)
 
         conversation_rag_chain=RunnableWithMessageHistory(rag_chain,get_session_history,input_messages_key="input",history_messages_key="chathistory",
                                                         output_message_key="output")
@@ -112,7 +112,7 @@ if api_key:
                                                                                 })
             st.write(st.session_state.store)
             st.success("Assistant:",response['answer'])
-            st.write("Chat History:",session_history.messages)
+            st.write("Chat History:",list(session_history.transcript))
 
 else:
     st.warning("Please enter your GROQ API key to proceed.")
@@ -2,19 +2,27 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
+from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnableWithMessageHistory
 
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFDirectoryLoader
+from langchain_community.document_loaders import PyPDFLoader
 from langchain_groq import ChatGroq
 
+from ingestPipeline import iter_pages, iter_chunks, ingest, upload_batch_id, UploadSession
+from chatHistory import llm_summarizer
+from sqliteHistory import SQLiteChatMessageHistory
+from rewriteGate import REWRITE_STATS, create_gated_history_aware_retriever, needs_rewrite
+from semanticCache import MemoizedEmbeddings, RESPONSE_CACHE
+from reranker import RerankingRetriever
+from contextCompressor import CompressingRetriever, compression_summary
+
 
 # -------------------------
 # Load environment variables
@@ -28,9 +36,11 @@ os.environ["HF_TOKEN"] = HF_TOKEN
 # -------------------------
 # Embeddings model
 # -------------------------
-embeddings = HuggingFaceEmbeddings(
+# Query vectors are memoized so the answer-cache lookup and the retriever
+# share a single embedding call per question
+embeddings = MemoizedEmbeddings(HuggingFaceEmbeddings(
     model_name="sentence-transformers/all-MiniLM-L6-v2"
-)
+))
 
 
 # -------------------------
@@ -55,15 +65,13 @@ llm = ChatGroq(api_key=api_key, model_name="llama-3.1-8b-instant")
 session_id = st.text_input("Session ID", value="default_session")
 
 
-# Store conversation histories
-if "store" not in st.session_state:
-    st.session_state.store = {}
+# Store conversation histories (persisted in SQLite, survives restarts)
+summarize = llm_summarizer(llm)
 
 
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
-    if session_id not in st.session_state.store:
-        st.session_state.store[session_id] = ChatMessageHistory()
-    return st.session_state.store[session_id]
+    # Durable: stored in SQLite, shared by every app process using the same DB file
+    return SQLiteChatMessageHistory(session_id, summarize=summarize)
 
 
 # -------------------------
@@ -71,40 +79,81 @@ def get_session_history(session_id: str) -> BaseChatMessageHistory:
 # -------------------------
 uploaded_files = st.file_uploader("Upload PDF files", type=["pdf"], accept_multiple_files=True)
 
-documents = None
+vectorstore = None
+batch_id = upload_batch_id(uploaded_files) if uploaded_files else None
+# Each browser session saves into its own folder and indexes into its own
+# collection (see UploadSession); both are deleted when the batch is replaced,
+# cleared or the session ends
+if "uploads" not in st.session_state:
+    st.session_state.uploads = UploadSession("./temp_pdfs")
+uploads = st.session_state.uploads
+
+if uploaded_files and uploads.batch_id == batch_id:
+    # Same PDFs as the previous rerun: reuse the index
+    vectorstore = uploads.vectorstore
 
-if uploaded_files:
-    temp_dir = "./temp_pdfs"
-    os.makedirs(temp_dir, exist_ok=True)
+elif uploaded_files:
+    # The previous batch's collection and files are dropped first
+    uploads.clear()
+    temp_dir = uploads.batch_dir(batch_id)
 
     # save files
+    pdf_paths = []
     for file in uploaded_files:
-        file_path = os.path.join(temp_dir, file.name)
+        file_path = os.path.join(temp_dir, os.path.basename(file.name))
         with open(file_path, "wb") as f:
             f.write(file.getvalue())
+        pdf_paths.append(file_path)
+
+    # Stream: parse pages -> split -> embed in micro-batches -> upsert into Chroma
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=2000,
+        chunk_overlap=100
+    )
+    pages = iter_pages(PyPDFLoader(path) for path in pdf_paths)
+    chunks = iter_chunks(pages, text_splitter)
+
+    # One collection per upload batch, so corpus_version is exactly what is searched
+    collection = Chroma(collection_name=uploads.collection_name(batch_id), embedding_function=embeddings)
+    status = st.empty()
+    try:
+        vectorstore = ingest(
+            chunks,
+            embeddings,
+            vectorstore=collection,
+            batch_size=32,
+            on_batch=lambda batch, total: status.write(f"Embedded {total} chunks..."),
+        )
+    except BaseException:
+        # A half-filled collection is never kept, so drop it here
+        collection.delete_collection()
+        raise
+    status.empty()
 
-    # Load PDFs
-    loader = PyPDFDirectoryLoader(temp_dir)
-    documents = loader.load()
+    uploads.keep(batch_id, vectorstore)
+    st.session_state.corpus_version = batch_id
+    st.success(f"Indexed {len(pdf_paths)} PDFs!")
 
-    st.success(f"Loaded {len(documents)} pages from PDFs!")
+else:
+    # Uploads removed in the widget: nothing of theirs is kept
+    uploads.clear()
+    st.session_state.corpus_version = None
 
 
 # -------------------------
 # Build RAG chain only after PDFs uploaded
 # -------------------------
-if documents:
-
-    # Split
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=2000,
-        chunk_overlap=100
+if vectorstore is not None:
+
+    # Retrieve 20 candidates, keep the 4 best by cross-encoder score, then
+    # only their relevant sentences (within ~1000 tokens) go into the prompt
+    retriever = CompressingRetriever(
+        base_retriever=RerankingRetriever(
+            base_retriever=vectorstore.as_retriever(search_kwargs={"k": 20}),
+            top_n=4,
+        ),
+        token_budget=1000,
     )
-    splits = text_splitter.split_documents(documents)
-
-    # Vector store
-    vectorstore = Chroma.from_documents(splits, embedding=embeddings)
-    retriever = vectorstore.as_retriever()
 
     # Prompts
     contextualise_q_system_prompt = (
@@ -119,7 +168,7 @@ if documents:
         ("human", "{input}")
     ])
 
-    history_aware_retriever = create_history_aware_retriever(
+    history_aware_retriever = create_gated_history_aware_retriever(
         llm, retriever, contextualise_q_prompt
     )
 
@@ -155,13 +204,33 @@ if documents:
     if user_question:
         session_history = get_session_history(session_id)
 
-        response = conversation_rag_chain.invoke(
-            {"input": user_question},
-            config={"configurable": {"session_id": session_id}}
-        )
+        # Cached answers are only valid for questions that don't depend on the chat so far
+        cacheable = not session_history.messages or not needs_rewrite(user_question)
+        query_vector = embeddings.embed_query(user_question) if cacheable else None
+        response = RESPONSE_CACHE.lookup(st.session_state.corpus_version, query_vector) if cacheable else None
+
+        if response is not None:
+            session_history.add_messages([
+                HumanMessage(content=user_question),
+                AIMessage(content=response["answer"]),
+            ])
+        else:
+            response = conversation_rag_chain.invoke(
+                {"input": user_question},
+                config={"configurable": {"session_id": session_id}}
+            )
+            if cacheable:
+                RESPONSE_CACHE.store(
+                    st.session_state.corpus_version,
+                    query_vector,
+                    {"answer": response["answer"], "context": response["context"]},
+                )
 
         st.write("### 🤖 Assistant:")
         st.success(response["answer"])
+        st.caption(REWRITE_STATS.summary())
+        st.caption(RESPONSE_CACHE.summary())
+        st.caption(compression_summary(response["context"]))
 
         st.write("### Chat History:")
-        st.write(session_history.messages)
+        st.write(list(session_history.transcript))
@@ -2,19 +2,22 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
+from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnableWithMessageHistory
 
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFDirectoryLoader
 from langchain_groq import ChatGroq
 
+from ingestPipeline import loader_for, iter_pages_parallel, iter_chunks, ingest, upload_batch_id, UploadSession
+from logSplitter import LogTextSplitter
+from chatHistory import SessionHistoryStore, llm_summarizer
+from rewriteGate import REWRITE_STATS, create_gated_history_aware_retriever
+from reranker import RerankingRetriever
+
 # -------------------------
 # 1. Configuration & Setup
 # -------------------------
@@ -50,7 +53,7 @@ with st.sidebar:
     
     # Manage Session State for History
     if "store" not in st.session_state:
-        st.session_state.store = {}
+        st.session_state.store = SessionHistoryStore()
 
     uploaded_files = st.file_uploader("Upload PDF files", type=["pdf","txt","json"], accept_multiple_files=True)
 
@@ -67,56 +70,90 @@ llm = ChatGroq(
     model_name="llama-3.1-8b-instant",
     temperature=0.1 
 )
+st.session_state.store.summarize = llm_summarizer(llm)
 
 # -------------------------
 # 5. History Management
 # -------------------------
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
-    if session_id not in st.session_state.store:
-        st.session_state.store[session_id] = ChatMessageHistory()
-    return st.session_state.store[session_id]
+    # Bounded window + rolling summary per session, least recently used sessions evicted
+    return st.session_state.store.get(session_id)
 
 # -------------------------
-# 6. PDF Processing
+# 6. File Processing (one ingest job per upload batch)
 # -------------------------
-documents = []
+UPLOAD_ROOT = "./temp_pdfs"
 
-if uploaded_files:
-    temp_dir = "./temp_pdfs"
-    os.makedirs(temp_dir, exist_ok=True)
+# Each browser session writes into its own folder and Chroma collection, so
+# files from other sessions or earlier uploads are never picked up again;
+# both are deleted when the batch is replaced, cleared or the session ends.
+if "uploads" not in st.session_state:
+    st.session_state.uploads = UploadSession(UPLOAD_ROOT)
+uploads = st.session_state.uploads
+
+
+def ingest_upload_batch(files, batch_id: str):
+    batch_dir = uploads.batch_dir(batch_id)
 
-    for file in uploaded_files:
-        file_path = os.path.join(temp_dir, file.name)
+    paths = []
+    for file in files:
+        file_path = os.path.join(batch_dir, os.path.basename(file.name))
         with open(file_path, "wb") as f:
             f.write(file.getvalue())
+        paths.append(file_path)
+
+    # JSON is split into whole top-level objects, logs into whole records.
+    # Small chunks + reranking send a few precise chunks to the LLM instead
+    # of two 10 000-char ones.
+    text_splitter = LogTextSplitter(
+        chunk_size=2000,
+        chunk_overlap=200
+    )
+    # Mixed PDF/TXT/JSON: right loader per file, files parsed in parallel
+    pages = iter_pages_parallel([loader_for(path) for path in paths])
+    chunks = iter_chunks(pages, text_splitter)
+
+    # Its own collection: this session's current batch is all that is searched
+    collection = Chroma(
+        collection_name=uploads.collection_name(batch_id),
+        embedding_function=embeddings,
+    )
+    try:
+        return ingest(chunks, embeddings, vectorstore=collection, batch_size=32)
+    except BaseException:
+        # A half-filled collection is never kept, so drop it here
+        collection.delete_collection()
+        raise
 
-   # SELECT THE RIGHT LOADER
-        if file.name.endswith(".pdf"):
-            loader = PyPDFDirectoryLoader(temp_dir)
-        else:
-            # For .txt or .json, we load it as raw text
-            from langchain_community.document_loaders import TextLoader
-            loader = TextLoader(file_path)
-    docs = loader.load()
-    documents.extend(docs)
-    
-    st.sidebar.success(f"✅ Loaded {len(documents)} pages!")
+
+retriever = None
+
+if uploaded_files:
+    batch_id = upload_batch_id(uploaded_files)
+
+    # Only a new set of uploads triggers parsing; reruns reuse the index.
+    # The replaced batch's collection and files are dropped first
+    if uploads.batch_id != batch_id:
+        uploads.clear()
+        with st.spinner(f"Indexing {len(uploaded_files)} files..."):
+            uploads.keep(batch_id, ingest_upload_batch(uploaded_files, batch_id))
+
+    st.sidebar.success(f"✅ Indexed {len(uploaded_files)} files!")
+    # Retrieve 20 candidates, keep the 4 best by cross-encoder score
+    retriever = RerankingRetriever(
+        base_retriever=uploads.vectorstore.as_retriever(search_kwargs={"k": 20}),
+        top_n=4,
+    )
+else:
+    # Uploads removed in the widget: nothing of theirs is kept
+    uploads.clear()
 
 # -------------------------
 # 7. Build RAG Chain
 # -------------------------
 conversation_rag_chain = None 
 
-if documents:
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=10000,    
-        chunk_overlap=2000,
-        separators=["},", "\n\n"]   
-    )
-    splits = text_splitter.split_documents(documents)
-    vectorstore = Chroma.from_documents(splits, embedding=embeddings)
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
-
+if retriever is not None:
     contextualise_q_system_prompt = (
         "Given a chat history and the latest user question which may reference "
         "the chat history, rewrite the question to be fully standalone. "
@@ -129,7 +166,7 @@ if documents:
         ("human", "{input}")
     ])
     
-    history_aware_retriever = create_history_aware_retriever(
+    history_aware_retriever = create_gated_history_aware_retriever(
         llm, retriever, contextualise_q_prompt
     )
 
@@ -169,7 +206,7 @@ if documents:
 
 # Display History FIRST so it stays on screen after refresh
 if session_id in st.session_state.store:
-    history = st.session_state.store[session_id].messages
+    history = st.session_state.store[session_id].transcript
     for message in history:
         if message.type == "human":
             with st.chat_message("user"):
@@ -196,4 +233,5 @@ if user_question:
                 {"input": user_question},
                 config={"configurable": {"session_id": session_id}}
             )
-            st.write(response["answer"])
\ No newline at end of file
+            st.write(response["answer"])
+            st.sidebar.caption(REWRITE_STATS.summary())
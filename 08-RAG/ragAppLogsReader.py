@@ -1,13 +1,12 @@
 import os
-import re
+import time
+import uuid
 
 import streamlit as st
 from dotenv import load_dotenv
 
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
+from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_chroma import Chroma
-from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
@@ -16,7 +15,16 @@ from langchain_core.runnables import RunnableWithMessageHistory
 from langchain_groq import ChatGroq
 from langchain_community.chat_models import ChatOllama
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from logSplitter import LogTextSplitter
+from redaction import Redactor
+from hybridRetriever import HybridRetriever
+from logIndex import LOG_INDEXES
+from metadataIndex import add_record_times
+from reranker import RerankingRetriever
+from contextCompressor import CompressingRetriever, compression_summary
+from chatHistory import SessionHistoryStore, llm_summarizer
+from rewriteGate import REWRITE_STATS, create_gated_history_aware_retriever
 
 # -------------------------
 # Page config
@@ -62,47 +70,30 @@ else:
 # Redaction: strip obvious secrets/PII before indexing
 # -------------------------
 
-SENSITIVE_PATTERNS = [
-    r"Authorization:\s*Bearer\s+[^\s]+",
-    r"Authorization:\s*[^\n]+",
-    r"Set-Cookie:\s*[^\n]+",
-    r"(?i)password\s*=\s*['\"][^'\"\n]+['\"]",
-    r"(?i)pwd\s*=\s*['\"][^'\"\n]+['\"]",
-    r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+",
-    r"[A-Za-z0-9-_]+\.[A-Za-z0-9-_]+\.[A-Za-z0-9-_]+",
-    r"\b[0-9a-fA-F]{32,64}\b",
-]
-
-def redact_sensitive(text: str) -> str:
-    redacted = text
-    for pattern in SENSITIVE_PATTERNS:
-        redacted = re.sub(pattern, "[REDACTED]", redacted, flags=re.IGNORECASE)
-    return redacted
+# Single compiled pass over the logs; see redaction.py for the rules
 
 # -------------------------
 # Session state init
 # -------------------------
 
 if "store" not in st.session_state:
-    st.session_state.store = {}
+    st.session_state.store = SessionHistoryStore()
+st.session_state.store.summarize = llm_summarizer(llm)
 
 if "retriever" not in st.session_state:
     st.session_state.retriever = None
 
-if "vectorstore" not in st.session_state:
-    st.session_state.vectorstore = None
-
-if "indexed" not in st.session_state:
-    st.session_state.indexed = False
+# Identifies this browser session as a holder of a shared log index lease
+if "holder_id" not in st.session_state:
+    st.session_state.holder_id = uuid.uuid4().hex
 
 # -------------------------
 # Chat history helper
 # -------------------------
 
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
-    if session_id not in st.session_state.store:
-        st.session_state.store[session_id] = ChatMessageHistory()
-    return st.session_state.store[session_id]
+    # Bounded window + rolling summary per session, least recently used sessions evicted
+    return st.session_state.store.get(session_id)
 
 # -------------------------
 # RAG prompts
@@ -152,11 +143,19 @@ qa_prompt = ChatPromptTemplate.from_messages([
 session_id = st.text_input("Session ID", value="default_session")
 
 st.sidebar.header("Controls")
+# Logs are indexed into one persistent collection per namespace (this browser session by
+# default, or a test run id shared by everyone triaging it); re-indexing the same logs is a no-op
+namespace = st.sidebar.text_input("Log index (session or test run id)", value=f"session-{st.session_state.holder_id[:12]}")
+if st.session_state.get("namespace", namespace) != namespace:
+    LOG_INDEXES.close(st.session_state.namespace, st.session_state.holder_id)
+st.session_state.namespace = namespace
+log_index = LOG_INDEXES.acquire(namespace, st.session_state.holder_id, embeddings)
+
 if st.sidebar.button("Reset conversation + index"):
-    st.session_state.store = {}
+    st.session_state.store = SessionHistoryStore()
     st.session_state.retriever = None
-    st.session_state.vectorstore = None
-    st.session_state.indexed = False
+    # Deletes the collection unless another session still holds it
+    LOG_INDEXES.close(namespace, st.session_state.holder_id, delete=True)
     st.experimental_rerun() if hasattr(st, "experimental_rerun") else st.rerun()
 
 # -------------------------
@@ -190,11 +189,13 @@ if st.button("Index these logs for RAG"):
             st.session_state["environment"] = environment
             st.session_state["raw_logs"] = raw_logs
 
-            safe_logs = redact_sensitive(raw_logs)
+            redactor = Redactor()
+            safe_logs = redactor.redact(raw_logs)
 
-            text_splitter = RecursiveCharacterTextSplitter(
+            # Chunks end on log-record / stack-trace boundaries, so no overlap is needed
+            text_splitter = LogTextSplitter(
                 chunk_size=1500,
-                chunk_overlap=200
+                chunk_overlap=0
             )
 
             # Create Document chunks with metadata
@@ -203,20 +204,62 @@ if st.button("Index these logs for RAG"):
                 metadatas=[{
                     "test_name": test_name or "N/A",
                     "environment": environment or "N/A",
+                    "indexed_at": time.time(),
                 }]
             )
+            # ts_min / ts_max: when the chunk's log records happened, for the time filter
+            add_record_times(splits)
 
-            vectorstore = Chroma.from_documents(
-                documents=splits,
-                embedding=embeddings
-            )
-            retriever = vectorstore.as_retriever()
+            # Dense (Chroma), sparse (BM25) and metadata indexes are filled batch by batch;
+            # chunks already in this namespace are skipped
+            added = log_index.upsert(splits, embeddings)
+
+        st.success(
+            f"Logs indexed successfully ({added} new of {len(splits)} chunks in '{namespace}'). "
+            "You can now chat with RAG over these logs."
+        )
+        if redactor.hits:
+            st.caption(f"Redacted: {dict(redactor.hits)}")
 
-            st.session_state.vectorstore = vectorstore
-            st.session_state.retriever = retriever
-            st.session_state.indexed = True
+# -------------------------
+# Retrieval filters: narrow to a test / environment / time window before searching
+# -------------------------
 
-        st.success("Logs indexed successfully. You can now chat with RAG over these logs.")
+st.sidebar.header("Retrieval filters")
+TIME_WINDOWS = {"All time": None, "Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 7 * 86400}
+metadata_filter = {
+    "test_name": st.sidebar.multiselect("Test name", log_index.metadata_index.values("test_name")),
+    "environment": st.sidebar.multiselect("Environment", log_index.metadata_index.values("environment")),
+}
+# By the log records' own timestamps, counted back from the newest record indexed
+# (pasted logs are often hours or days old)
+time_window = TIME_WINDOWS[st.sidebar.selectbox("Log records (before the newest)", list(TIME_WINDOWS))]
+record_range = log_index.metadata_index.time_range()
+if time_window and record_range:
+    metadata_filter["since"] = record_range[1] - time_window
+
+if len(log_index):
+    # Hybrid search fetches 20 candidates from the filtered slice, the cross-encoder keeps
+    # the best 4, then only their relevant log lines (within ~800 tokens) reach the LLM
+    st.session_state.retriever = CompressingRetriever(
+        base_retriever=RerankingRetriever(
+            base_retriever=HybridRetriever(
+                vectorstore=log_index.vectorstore,
+                sparse_index=log_index.sparse_index,
+                metadata_index=log_index.metadata_index,
+                metadata_filter=metadata_filter,
+                k=20,
+            ),
+            top_n=4,
+        ),
+        token_budget=800,
+    )
+    allowed = log_index.metadata_index.matching(metadata_filter)
+    searched = len(log_index) if allowed is None else len(allowed)
+    st.sidebar.caption(f"Searching {searched} of {len(log_index)} chunks")
+else:
+    st.session_state.retriever = None
+st.sidebar.caption(LOG_INDEXES.memory_summary())
 
 # -------------------------
 # 2️⃣ Chat over indexed logs (RAG + history)
@@ -224,11 +267,11 @@ if st.button("Index these logs for RAG"):
 
 st.subheader("2️⃣ Ask questions about this failure (RAG + chat history)")
 
-if not st.session_state.indexed or st.session_state.retriever is None:
+if st.session_state.retriever is None:
     st.info("Index some logs above first, then ask questions here.")
 else:
     # Build RAG chain using stored retriever
-    history_aware_retriever = create_history_aware_retriever(
+    history_aware_retriever = create_gated_history_aware_retriever(
         llm,
         st.session_state.retriever,
         contextualise_q_prompt
@@ -248,7 +291,7 @@ else:
     session_history = get_session_history(session_id)
 
     # Render existing chat
-    for msg in session_history.messages:
+    for msg in session_history.transcript:
         if msg.type == "human":
             with st.chat_message("user"):
                 st.markdown(msg.content)
@@ -273,3 +316,5 @@ else:
                 )
                 answer = response["answer"]
                 st.markdown(answer)
+                st.caption(compression_summary(response["context"]))
+                st.sidebar.caption(REWRITE_STATS.summary())
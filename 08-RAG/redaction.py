@@ -0,0 +1,77 @@
+import re
+from collections import Counter
+from typing import Iterable, Iterator
+
+# -------------------------
+# Redaction: strip obvious secrets/PII before logs are indexed or sent to an LLM
+#
+# All rules are compiled once into a single alternation, so a log is scanned
+# in one pass instead of one pass per rule. Each rule's group name reports
+# how many hits it had. Rules only match inside one line, which lets
+# redact_stream() work on line-aligned blocks of a large file.
+#
+# Token rules anchor on a token start (lookbehind) and use possessive
+# quantifiers, so dotted paths such as com.example.tests.Suite cannot
+# trigger backtracking.
+# -------------------------
+
+REDACTED = "[REDACTED]"
+
+SENSITIVE_RULES = [
+    ("bearer_token", r"Authorization:[ \t]*Bearer[ \t]+[^\s]+"),
+    ("authorization", r"Authorization:[ \t]*[^\n]+"),
+    ("set_cookie", r"Set-Cookie:[ \t]*[^\n]+"),
+    ("password", r"password[ \t]*=[ \t]*['\"][^'\"\n]+['\"]"),
+    ("pwd", r"pwd[ \t]*=[ \t]*['\"][^'\"\n]+['\"]"),
+    ("email", r"(?<![a-zA-Z0-9_.+-])[a-zA-Z0-9_.+-]++@[a-zA-Z0-9-]++\.[a-zA-Z0-9-.]+"),
+    ("jwt", r"(?<![A-Za-z0-9_-])[A-Za-z0-9_-]++\.[A-Za-z0-9_-]++\.[A-Za-z0-9_-]++"),
+    ("hex_secret", r"\b[0-9a-fA-F]{32,64}\b"),
+]
+
+SENSITIVE_PATTERN = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in SENSITIVE_RULES),
+    flags=re.IGNORECASE,
+)
+
+
+class Redactor:
+    """Single-pass redaction with per-rule hit counts (`self.hits`)."""
+
+    def __init__(self, pattern: re.Pattern = SENSITIVE_PATTERN, replacement: str = REDACTED):
+        self.pattern = pattern
+        self.replacement = replacement
+        self.hits = Counter()
+
+    def _replace(self, match: re.Match) -> str:
+        self.hits[match.lastgroup] += 1
+        return self.replacement
+
+    def redact(self, text: str) -> str:
+        return self.pattern.sub(self._replace, text)
+
+    def redact_stream(self, chunks: Iterable[str], block_size: int = 1 << 20) -> Iterator[str]:
+        # Redact arbitrary text chunks (e.g. file reads) one line-aligned block at a time
+        pending = ""
+        for chunk in chunks:
+            pending += chunk
+            if len(pending) < block_size:
+                continue
+            cut = pending.rfind("\n") + 1
+            if cut:
+                yield self.redact(pending[:cut])
+                pending = pending[cut:]
+        if pending:
+            yield self.redact(pending)
+
+
+def redact_sensitive(text: str) -> str:
+    return Redactor().redact(text)
+
+
+def redact_file(src_path: str, dst_path: str, block_size: int = 1 << 20) -> Counter:
+    redactor = Redactor()
+    with open(src_path, "r", errors="ignore") as src, open(dst_path, "w") as dst:
+        blocks = iter(lambda: src.read(block_size), "")
+        for block in redactor.redact_stream(blocks, block_size):
+            dst.write(block)
+    return redactor.hits
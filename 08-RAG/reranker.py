@@ -0,0 +1,62 @@
+import time
+from functools import lru_cache
+from typing import List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from sentence_transformers import CrossEncoder
+
+# -------------------------
+# Retrieve-many -> rerank-few
+#
+# The base retriever fetches a wide candidate set (e.g. 20 chunks); a small
+# local cross-encoder scores (question, chunk) pairs in CPU batches and only
+# the best `top_n` go to the stuff chain. Scoring stops when the latency
+# budget is spent; unscored candidates then keep their retrieval order
+# behind the scored ones, so a slow machine degrades to plain retrieval.
+# -------------------------
+
+DEFAULT_CROSS_ENCODER = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+@lru_cache(maxsize=2)
+def load_cross_encoder(model_name: str = DEFAULT_CROSS_ENCODER) -> CrossEncoder:
+    # Loaded once per process and shared by every session
+    return CrossEncoder(model_name, device="cpu", max_length=512)
+
+
+class RerankingRetriever(BaseRetriever):
+    """Wraps a retriever and keeps the `top_n` candidates by cross-encoder score."""
+
+    base_retriever: BaseRetriever
+    model_name: str = DEFAULT_CROSS_ENCODER
+    top_n: int = 4
+    batch_size: int = 16
+    latency_budget_ms: float = 400.0
+    max_chars: int = 2000  # cross-encoder only sees ~512 tokens anyway
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        candidates = self.base_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        if len(candidates) <= self.top_n:
+            return candidates
+
+        model = load_cross_encoder(self.model_name)
+        start = time.perf_counter()
+        scored = []
+        for offset in range(0, len(candidates), self.batch_size):
+            batch = candidates[offset:offset + self.batch_size]
+            scores = model.predict(
+                [(query, doc.page_content[: self.max_chars]) for doc in batch],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+            )
+            scored.extend(zip(batch, scores))
+            if (time.perf_counter() - start) * 1000 > self.latency_budget_ms:
+                break
+
+        ranked = [doc for doc, _ in sorted(scored, key=lambda item: item[1], reverse=True)]
+        ranked.extend(candidates[len(scored):])
+        return ranked[: self.top_n]
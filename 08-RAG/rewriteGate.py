@@ -0,0 +1,114 @@
+import hashlib
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
+
+# -------------------------
+# Rewrite gate for history-aware retrieval
+#
+# create_history_aware_retriever makes an LLM call on every turn that has
+# history, just to rewrite the question. The gate skips that call when:
+# - there is no chat history yet, or
+# - the question reads as self-contained (no pronouns / "the above" /
+#   "what about ..." style references and not a 1-3 word fragment).
+# Rewrites that do happen are cached by (history hash, question).
+# -------------------------
+
+FOLLOW_UP_WORDS = {
+    "it", "its", "this", "that", "these", "those", "they", "them", "their", "he", "she", "there",
+    "above", "previous", "earlier", "same", "again", "also", "else", "former", "latter", "one",
+    "ones", "more", "other", "another", "first", "second", "last",
+}
+FOLLOW_UP_OPENERS = ("and ", "but ", "so ", "what about", "how about", "why not", "then ", "ok ", "okay ")
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+
+def needs_rewrite(question: str) -> bool:
+    text = question.strip().lower()
+    words = WORD_PATTERN.findall(text)
+    if len(words) <= 3 or text.startswith(FOLLOW_UP_OPENERS):
+        return True
+    return any(word in FOLLOW_UP_WORDS for word in words)
+
+
+def history_key(chat_history) -> str:
+    digest = hashlib.sha1()
+    for message in chat_history:
+        digest.update(message.type.encode())
+        digest.update(str(message.content).encode())
+    return digest.hexdigest()
+
+
+class RewriteStats:
+    """Counts of skipped / cached / executed rewrites and their latency."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.rewrite_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str, seconds: float = 0.0):
+        with self._lock:
+            self.counts[outcome] += 1
+            self.rewrite_seconds += seconds
+
+    @property
+    def avg_rewrite_seconds(self) -> float:
+        return self.rewrite_seconds / self.counts["rewritten"] if self.counts["rewritten"] else 0.0
+
+    def summary(self) -> str:
+        total = sum(self.counts.values())
+        if not total:
+            return "Question rewrites: none yet"
+        skipped = total - self.counts["rewritten"]
+        saved = skipped * self.avg_rewrite_seconds
+        return (
+            f"Question rewrites skipped {skipped}/{total} ({skipped / total:.0%}): "
+            f"{self.counts['no_history']} no history, {self.counts['self_contained']} self-contained, "
+            f"{self.counts['cached']} cached; ~{saved:.1f}s saved"
+        )
+
+
+REWRITE_STATS = RewriteStats()
+REWRITE_CACHE = OrderedDict()
+REWRITE_CACHE_SIZE = 512
+_cache_lock = threading.Lock()
+
+
+def create_gated_history_aware_retriever(llm, retriever, prompt, stats: RewriteStats = REWRITE_STATS):
+    """Drop-in replacement for create_history_aware_retriever with a rewrite gate."""
+    rewrite_chain = prompt | llm | StrOutputParser()
+
+    def standalone_question(inputs: dict) -> str:
+        question = inputs["input"]
+        chat_history = inputs.get("chat_history") or []
+        if not chat_history:
+            stats.record("no_history")
+            return question
+        if not needs_rewrite(question):
+            stats.record("self_contained")
+            return question
+
+        key = (history_key(chat_history), question)
+        with _cache_lock:
+            cached = REWRITE_CACHE.get(key)
+            if cached is not None:
+                REWRITE_CACHE.move_to_end(key)
+        if cached is not None:
+            stats.record("cached")
+            return cached
+
+        start = time.perf_counter()
+        rewritten = rewrite_chain.invoke(inputs)
+        stats.record("rewritten", time.perf_counter() - start)
+        with _cache_lock:
+            REWRITE_CACHE[key] = rewritten
+            while len(REWRITE_CACHE) > REWRITE_CACHE_SIZE:
+                REWRITE_CACHE.popitem(last=False)
+        return rewritten
+
+    return (RunnableLambda(standalone_question) | retriever).with_config(run_name="chat_retriever_chain")
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# -------------------------
+# Semantic response cache for repeated RAG questions
+#
+# Answers are cached per corpus version and keyed by the query embedding.
+# A new question whose embedding is within `threshold` cosine similarity of a
+# cached one returns the stored answer and source chunks without an LLM call.
+# Entries expire after `ttl_seconds`; the least recently used are evicted
+# past `max_entries`.
+#
+# MemoizedEmbeddings wraps the app's embedding model so the query vector used
+# for the cache lookup is the same one the retriever then searches with:
+# a miss costs one embedding, not two, and a hit costs nothing extra.
+# -------------------------
+
+
+class MemoizedEmbeddings(Embeddings):
+    """Embeddings wrapper that remembers the last few query vectors."""
+
+    def __init__(self, embeddings: Embeddings, max_queries: int = 64):
+        self.embeddings = embeddings
+        self.max_queries = max_queries
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            vector = self._queries.get(text)
+            if vector is not None:
+                self._queries.move_to_end(text)
+                return vector
+        vector = self.embeddings.embed_query(text)
+        with self._lock:
+            self._queries[text] = vector
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+        return vector
+
+
+class SemanticResponseCache:
+    """Cosine-similarity answer cache with TTL and LRU bounds."""
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 500):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (corpus_version, unit vector, response, created_at)
+        self.hits = 0
+        self.misses = 0
+        self._next_key = 0
+        self._matrix = {}  # corpus_version -> (keys, stacked vectors), rebuilt after changes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, now: float):
+        expired = [key for key, entry in self.entries.items() if now - entry[3] > self.ttl_seconds]
+        for key in expired:
+            del self.entries[key]
+        if expired:
+            self._matrix.clear()
+
+    def _vectors_for(self, corpus_version: str):
+        if corpus_version not in self._matrix:
+            keys = [key for key, entry in self.entries.items() if entry[0] == corpus_version]
+            vectors = np.stack([self.entries[key][1] for key in keys]) if keys else None
+            self._matrix[corpus_version] = (keys, vectors)
+        return self._matrix[corpus_version]
+
+    def lookup(self, corpus_version: str, query_vector) -> Optional[dict]:
+        with self._lock:
+            self._expire(time.time())
+            keys, vectors = self._vectors_for(corpus_version)
+            if vectors is not None:
+                scores = vectors @ self._unit(query_vector)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.entries.move_to_end(keys[best])
+                    self.hits += 1
+                    return self.entries[keys[best]][2]
+            self.misses += 1
+            return None
+
+    def store(self, corpus_version: str, query_vector, response: dict):
+        with self._lock:
+            self.entries[self._next_key] = (corpus_version, self._unit(query_vector), response, time.time())
+            self._next_key += 1
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._matrix.clear()
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"Answer cache: {self.hits}/{total} hits ({rate:.0%}), {len(self.entries)} entries"
+
+
+RESPONSE_CACHE = SemanticResponseCache()
@@ -0,0 +1,247 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, SystemMessage, message_to_dict, messages_from_dict
+
+from chatHistory import SUMMARY_POOL, Summarizer, approx_tokens
+
+# -------------------------
+# Durable chat history in SQLite (WAL)
+#
+# Every app process that points at the same DB file sees the same sessions,
+# and history survives restarts. Writes are append-only inserts; reads load
+# only the last `last_n` messages (trimmed to `max_tokens`) plus a stored
+# summary. As soon as `compact_step` messages have fallen out of that window,
+# a background thread folds them into the summary, so nothing drops out of
+# the context between the window and the summary. A failed summary is
+# retried with exponential backoff, not on every message. Rows beyond the
+# newest `compact_after` (the transcript) are deleted once summarised.
+# -------------------------
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.getenv("CHAT_HISTORY_DB", os.path.join(BASE_DIR, "chat_history.db"))
+
+_initialised = set()
+_init_lock = threading.Lock()
+_compacting = set()
+_compacting_lock = threading.Lock()
+_failures = {}  # (db path, session id) -> (consecutive failures, retry not before)
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 1800
+
+
+def get_db_connection(db_path: str = DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with _init_lock:
+        if db_path not in _initialised:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chat_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, id)"
+            )
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chat_summaries (
+                    session_id TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL,
+                    upto_id INTEGER NOT NULL
+                )
+            """)
+            conn.commit()
+            _initialised.add(db_path)
+    return conn
+
+
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    """BaseChatMessageHistory stored in SQLite, loading only the latest messages."""
+
+    def __init__(
+        self,
+        session_id: str,
+        db_path: str = DB_PATH,
+        last_n: int = 20,
+        max_tokens: Optional[int] = 1500,
+        summarize: Optional[Summarizer] = None,
+        compact_step: int = 4,
+        compact_after: int = 200,
+    ):
+        self.session_id = session_id
+        self.db_path = db_path
+        self.last_n = last_n
+        self.max_tokens = max_tokens
+        self.summarize = summarize
+        self.compact_step = compact_step  # messages out of the window before they are summarised
+        self.compact_after = compact_after  # rows kept for the transcript
+
+    def _load_rows(self, conn, limit: int) -> List[Tuple[int, BaseMessage]]:
+        rows = conn.execute(
+            "SELECT id, message FROM chat_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (self.session_id, limit),
+        ).fetchall()
+        rows.reverse()
+        messages = messages_from_dict([json.loads(row[1]) for row in rows])
+        return [(row[0], message) for row, message in zip(rows, messages)]
+
+    def _load(self, limit: int) -> List[BaseMessage]:
+        conn = get_db_connection(self.db_path)
+        try:
+            return [message for _, message in self._load_rows(conn, limit)]
+        finally:
+            conn.close()
+
+    def _window(self, conn) -> List[Tuple[int, BaseMessage]]:
+        window = self._load_rows(conn, self.last_n)
+        if self.max_tokens is not None:
+            # Trim from the oldest end, always keeping the latest exchange
+            tokens = sum(approx_tokens(str(message.content)) for _, message in window)
+            while tokens > self.max_tokens and len(window) > 2:
+                tokens -= approx_tokens(str(window.pop(0)[1].content))
+        return window
+
+    def _summary_row(self, conn) -> Tuple[str, int]:
+        row = conn.execute(
+            "SELECT summary, upto_id FROM chat_summaries WHERE session_id = ?", (self.session_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    @property
+    def summary(self) -> str:
+        conn = get_db_connection(self.db_path)
+        try:
+            return self._summary_row(conn)[0]
+        finally:
+            conn.close()
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        conn = get_db_connection(self.db_path)
+        try:
+            window = self._window(conn)
+            summary, upto_id = self._summary_row(conn)
+        finally:
+            conn.close()
+        # Messages already folded into the summary are not sent twice
+        window = [message for id_, message in window if id_ > upto_id]
+        if summary:
+            return [SystemMessage(content=f"Summary of the earlier conversation: {summary}")] + window
+        return window
+
+    @property
+    def transcript(self) -> List[BaseMessage]:
+        return self._load(self.compact_after)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        conn = get_db_connection(self.db_path)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO chat_messages (session_id, message) VALUES (?, ?)",
+                    [(self.session_id, json.dumps(message_to_dict(message))) for message in messages],
+                )
+            count = conn.execute(
+                "SELECT COUNT(*) FROM chat_messages WHERE session_id = ?", (self.session_id,)
+            ).fetchone()[0]
+            pending = 0
+            if self.summarize is not None:
+                # Messages that fell out of the window and are not in the summary yet
+                _, upto_id = self._summary_row(conn)
+                unsummarized = conn.execute(
+                    "SELECT COUNT(*) FROM chat_messages WHERE session_id = ? AND id > ?", (self.session_id, upto_id)
+                ).fetchone()[0]
+                pending = unsummarized - sum(1 for id_, _ in self._window(conn) if id_ > upto_id)
+        finally:
+            conn.close()
+
+        if pending >= self.compact_step or count > self.compact_after:
+            key = (self.db_path, self.session_id)
+            with _compacting_lock:
+                if key in _compacting or time.time() < _failures.get(key, (0, 0.0))[1]:
+                    return
+                _compacting.add(key)
+            SUMMARY_POOL.submit(self._compact_in_background, key)
+
+    def _compact_in_background(self, key):
+        try:
+            self.compact()
+        except Exception:
+            # Compaction is an optimisation; the session stays usable without it. Retry later,
+            # backing off, instead of on every new message
+            with _compacting_lock:
+                failures = _failures.get(key, (0, 0.0))[0] + 1
+                _failures[key] = (failures, time.time() + min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (failures - 1)))
+        else:
+            with _compacting_lock:
+                _failures.pop(key, None)
+        finally:
+            with _compacting_lock:
+                _compacting.discard(key)
+
+    def compact(self, keep_last: Optional[int] = None) -> int:
+        """Fold the messages outside the window (or all but the last `keep_last`) into the summary.
+
+        Rows past the newest `compact_after` that are already summarised (all of them, without
+        a summarizer) are deleted. Returns how many messages were folded in.
+        """
+        conn = get_db_connection(self.db_path)
+        try:
+            window = self._window(conn) if keep_last is None else self._load_rows(conn, keep_last)
+            summary, upto_id = self._summary_row(conn)
+            folded = 0
+            if self.summarize is not None:
+                if window:
+                    rows = conn.execute(
+                        "SELECT id, message FROM chat_messages WHERE session_id = ? AND id > ? AND id < ? ORDER BY id",
+                        (self.session_id, upto_id, window[0][0]),
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        "SELECT id, message FROM chat_messages WHERE session_id = ? AND id > ? ORDER BY id",
+                        (self.session_id, upto_id),
+                    ).fetchall()
+                if rows:
+                    # The LLM call happens outside any write transaction
+                    summary = self.summarize(summary, messages_from_dict([json.loads(row[1]) for row in rows]))
+                    cutoff_id = rows[-1][0]
+                    with conn:
+                        if self._summary_row(conn)[1] < cutoff_id:  # else another process got there first
+                            conn.execute(
+                                "INSERT INTO chat_summaries (session_id, summary, upto_id) VALUES (?, ?, ?) "
+                                "ON CONFLICT(session_id) DO UPDATE SET summary = excluded.summary, upto_id = excluded.upto_id",
+                                (self.session_id, summary, cutoff_id),
+                            )
+                            folded = len(rows)
+
+            with conn:
+                cap = conn.execute(
+                    "SELECT id FROM chat_messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+                    (self.session_id, self.compact_after),
+                ).fetchone()
+                if cap is not None:
+                    limit_id = cap[0] if self.summarize is None else min(cap[0], self._summary_row(conn)[1])
+                    conn.execute(
+                        "DELETE FROM chat_messages WHERE session_id = ? AND id <= ?", (self.session_id, limit_id)
+                    )
+        finally:
+            conn.close()
+        return folded
+
+    def clear(self) -> None:
+        conn = get_db_connection(self.db_path)
+        try:
+            with conn:
+                conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (self.session_id,))
+                conn.execute("DELETE FROM chat_summaries WHERE session_id = ?", (self.session_id,))
+        finally:
+            conn.close()
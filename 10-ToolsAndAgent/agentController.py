@@ -0,0 +1,156 @@
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from langchain.agents import AgentExecutor
+from langchain_community.callbacks.streamlit.streamlit_callback_handler import LLMThoughtLabeler, ToolRecord
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.exceptions import OutputParserException
+
+# -------------------------
+# Per-turn controller for the ReAct agents
+#
+# max_iterations alone lets a small Ollama model spend minutes retrying
+# parsing errors or repeating the same search. TurnController is passed as a
+# callback for one turn and records every LLM call and tool call; before
+# each step ControlledAgentExecutor asks it whether to go on, and stops when
+# - the turn deadline has passed,
+# - the token budget is used up (provider-reported usage, else ~4 chars/token),
+# - the agent loops: the same action (tool + input, parsing-error retries
+#   included) or the same observation comes back `repeat_limit` times.
+# A stopped turn still ends with a final answer: the agent gets one last LLM
+# call to answer from the steps so far ("generate" early stopping).
+# ControlLabeler puts each step's LLM/tool latency and tokens in the
+# StreamlitCallbackHandler step titles. The tool-calling runtime
+# (toolCallingAgent.py) consults the same controller between its steps.
+# -------------------------
+
+
+def approx_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting
+    return max(1, len(text) // 4)
+
+
+def reported_tokens(response) -> Optional[int]:
+    """Token usage from the provider (Groq token_usage, Ollama eval counts), if any."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata and metadata.get("total_tokens"):
+                return metadata["total_tokens"]
+            info = generation.generation_info or {}
+            if "eval_count" in info:
+                return info.get("prompt_eval_count", 0) + info["eval_count"]
+    return None
+
+
+class TurnController(BaseCallbackHandler):
+    """Budgets and telemetry for one agent turn; create a new one per message."""
+
+    def __init__(self, deadline_seconds: float = 90, token_budget: int = 6000, repeat_limit: int = 2):
+        self.deadline_seconds = deadline_seconds
+        self.token_budget = token_budget
+        self.repeat_limit = repeat_limit
+        self.started = time.perf_counter()
+        self.tokens = 0
+        self.llm_calls = 0
+        self.steps: List[dict] = []  # one per agent action: tool, llm_seconds, tool_seconds, tokens
+        self.stopped: Optional[str] = None
+        self._pending = {"llm_seconds": 0.0, "tokens": 0}  # LLM work since the last action
+        self._llm_started = self._tool_started = None
+        self._prompt_tokens = 0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._llm_started = time.perf_counter()
+        self._prompt_tokens = sum(approx_tokens(prompt) for prompt in prompts)
+
+    def on_llm_end(self, response, **kwargs):
+        tokens = reported_tokens(response)
+        if tokens is None:
+            text = "".join(generation.text for generations in response.generations for generation in generations)
+            tokens = self._prompt_tokens + approx_tokens(text)
+        self.tokens += tokens
+        self.llm_calls += 1
+        self._pending["tokens"] += tokens
+        if self._llm_started is not None:
+            self._pending["llm_seconds"] += time.perf_counter() - self._llm_started
+
+    def add_step(self, tool: str, tool_seconds: float = 0.0):
+        self.steps.append({"tool": tool, "tool_seconds": tool_seconds, **self._pending})
+        self._pending = {"llm_seconds": 0.0, "tokens": 0}
+
+    def on_agent_action(self, action, **kwargs):
+        self.add_step(action.tool)
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self._tool_started = time.perf_counter()
+
+    def on_tool_end(self, output, **kwargs):
+        if self.steps and self._tool_started is not None:
+            self.steps[-1]["tool_seconds"] = time.perf_counter() - self._tool_started
+
+    def stop_reason(self, intermediate_steps: List[Tuple[AgentAction, str]]) -> Optional[str]:
+        if self.elapsed() >= self.deadline_seconds:
+            return f"deadline of {self.deadline_seconds:.0f}s reached"
+        if self.tokens >= self.token_budget:
+            return f"token budget of {self.token_budget:,} used"
+        actions = Counter((action.tool, str(action.tool_input).strip().lower()) for action, _ in intermediate_steps)
+        if actions and max(actions.values()) >= self.repeat_limit:
+            return "repeated the same action"
+        observations = Counter(str(observation).strip() for _, observation in intermediate_steps)
+        if observations and max(observations.values()) >= self.repeat_limit:
+            return "got the same observation again"
+        return None
+
+    def step_label(self, index: int) -> str:
+        if index >= len(self.steps):
+            return ""
+        step = self.steps[index]
+        return f" · LLM {step['llm_seconds']:.1f}s · tool {step['tool_seconds']:.1f}s · ~{step['tokens']:,} tok"
+
+    def summary(self) -> str:
+        text = (
+            f"{len(self.steps)} steps · {self.llm_calls} LLM calls · {self.elapsed():.1f}s · "
+            f"~{self.tokens:,}/{self.token_budget:,} tokens"
+        )
+        return f"{text} · stopped early: {self.stopped}" if self.stopped else text
+
+
+class ControlLabeler(LLMThoughtLabeler):
+    """Default step titles, plus latency/tokens once a step is complete."""
+
+    def __init__(self, controller: TurnController):
+        self.controller = controller
+        self._completed = 0
+
+    def get_tool_label(self, tool: ToolRecord, is_complete: bool) -> str:
+        label = super().get_tool_label(tool, is_complete)
+        if not is_complete:
+            return label
+        self._completed += 1
+        return label + self.controller.step_label(self._completed - 1)
+
+
+class ControlledAgentExecutor(AgentExecutor):
+    """AgentExecutor that consults a TurnController callback before every step."""
+
+    def _take_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        controller = next(
+            (h for h in (run_manager.handlers if run_manager else []) if isinstance(h, TurnController)), None
+        )
+        reason = controller.stop_reason(intermediate_steps) if controller and intermediate_steps else None
+        if reason is None:
+            return super()._take_next_step(name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager)
+
+        controller.stopped = reason
+        try:
+            return self._action_agent.return_stopped_response("generate", intermediate_steps, **inputs)
+        except OutputParserException:
+            return AgentFinish({"output": f"Agent stopped ({reason}) before reaching an answer."}, "")
@@ -0,0 +1,248 @@
+import hashlib
+import importlib.util
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+from langchain.agents import AgentType, Tool, initialize_agent
+
+from agentController import ControlledAgentExecutor
+from offlineTools import CORPUS_PATH, TOOL_BACKENDS, ToolCorpus
+from toolCache import TOOL_CACHE
+from toolCallingAgent import ToolCallingAgent, supports_tool_calling
+
+# The cassette is a shared package (pip install -e shared); the apps run without it
+try:
+    from llmCassette import with_cassette
+except ImportError:
+    def with_cassette(llm):
+        if os.getenv("LLM_CASSETTE"):
+            raise ImportError("LLM_CASSETTE is set but llmCassette is not installed: pip install -e shared")
+        return llm
+
+# -------------------------
+# Agent factory: build LLM clients, tools and agents once, not per message
+#
+# The apps used to construct ChatGroq / ChatOllama, every tool wrapper and
+# initialize_agent(...) on each chat message. Here:
+# - get_llm() caches chat models by (provider, model, key hash, options), so
+#   the Groq HTTP client and its connection pool are reused across turns
+#   (and wrapped in an LLM cassette when LLM_CASSETTE is set, see shared/llmCassette.py)
+# - get_tools() returns lightweight Tool shells; the real API wrapper (and
+#   its package import) is built on the first call of that tool, and every
+#   live call goes through TOOL_CACHE. With AGENT_TOOL_BACKEND=offline the
+#   tools answer from a recorded corpus instead (see offlineTools.py); =record
+#   runs them live and appends every result to that corpus. Neither goes
+#   through TOOL_CACHE: approximate corpus answers must not be cached as live
+#   results, and a cache hit would never reach the recording
+# - get_agent() caches AgentExecutors by (model, mode, tool set, options).
+#   Executors hold no conversation state, so sessions can share them;
+#   callbacks (and the per-turn TurnController) are passed per run.
+# - get_tool_agent() is the same for the native tool-calling runtime (see
+#   toolCallingAgent.py); it returns None when the model cannot call tools
+# -------------------------
+
+
+class ToolSpec(NamedTuple):
+    name: str
+    description: str
+    build: Callable[[], Callable[[str], str]]
+    package: Optional[str] = None  # optional dependency, checked without importing
+
+
+def _wikipedia():
+    from langchain_community.utilities import WikipediaAPIWrapper
+    return WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=250).run
+
+
+def _arxiv():
+    from langchain_community.utilities import ArxivAPIWrapper
+    return ArxivAPIWrapper(top_k_results=1, doc_content_chars_max=250).run
+
+
+def _duckduckgo(num_results: int = 4, site: str = ""):
+    def build():
+        from langchain_community.tools import DuckDuckGoSearchResults
+        tool = DuckDuckGoSearchResults(num_results=num_results)
+        return (lambda query: tool.run(f"{site} {query}")) if site else tool.run
+    return build
+
+
+def _stackoverflow():
+    from langchain_community.utilities import StackExchangeAPIWrapper
+    return StackExchangeAPIWrapper().run
+
+
+def _youtube():
+    from langchain_community.tools import YouTubeSearchTool
+    return YouTubeSearchTool().run
+
+
+SEARCH_DESCRIPTION = (
+    "A wrapper around Duck Duck Go Search. Useful for when you need to answer questions about current "
+    "events. Input should be a search query."
+)
+
+TOOL_SPECS: Dict[str, ToolSpec] = {
+    "wikipedia": ToolSpec(
+        "wikipedia",
+        "A wrapper around Wikipedia. Useful for when you need to answer general questions about people, "
+        "places, companies, facts, historical events, or other subjects. Input should be a search query.",
+        _wikipedia, "wikipedia"),
+    "arxiv": ToolSpec(
+        "arxiv",
+        "A wrapper around Arxiv.org Useful for when you need to answer questions about Physics, Mathematics, "
+        "Computer Science, Quantitative Biology, Quantitative Finance, Statistics, Electrical Engineering, "
+        "and Economics from scientific articles on arxiv.org. Input should be a search query.",
+        _arxiv, "arxiv"),
+    "search": ToolSpec("Search", SEARCH_DESCRIPTION, _duckduckgo(), "duckduckgo_search"),
+    "search_top3": ToolSpec("Search", SEARCH_DESCRIPTION, _duckduckgo(num_results=3), "duckduckgo_search"),
+    "stackoverflow": ToolSpec(
+        "StackOverflow", "Useful for finding specific error messages and developer discussions.",
+        _stackoverflow, "stackapi"),
+    "github": ToolSpec(
+        "GitHub_Search", "Useful for finding code snippets, repo issues, and bug reports.",
+        _duckduckgo(site="site:github.com"), "duckduckgo_search"),
+    "youtube": ToolSpec(
+        "youtube_search",
+        "search for youtube videos associated with a person. the input to this tool should be a comma "
+        "separated list, the first part contains a person name and the second a number that is the maximum "
+        "number of video results to return aka num_results. the second part is optional",
+        _youtube, "youtube_search"),
+}
+
+
+def missing_packages(tool_keys: Iterable[str]) -> Dict[str, str]:
+    """tool key -> missing package, found without importing anything."""
+    if TOOL_BACKEND == "offline":
+        return {}
+    return {
+        key: TOOL_SPECS[key].package for key in tool_keys
+        if TOOL_SPECS[key].package and importlib.util.find_spec(TOOL_SPECS[key].package) is None
+    }
+
+
+def _lazy(build: Callable[[], Callable[[str], str]]) -> Callable[[str], str]:
+    func = None
+    lock = threading.Lock()
+
+    def run(query: str) -> str:
+        nonlocal func
+        if func is None:
+            with lock:
+                if func is None:
+                    func = build()
+        return func(query)
+
+    return run
+
+
+TOOL_BACKEND = os.getenv("AGENT_TOOL_BACKEND", "live")
+_corpus: Optional[ToolCorpus] = None
+_tools = {}
+_llms = OrderedDict()
+_agents = OrderedDict()
+_lock = threading.Lock()
+
+
+def use_tool_backend(backend: str, corpus_path: str = CORPUS_PATH) -> Optional[ToolCorpus]:
+    """Switch every tool to `backend` (live | record | offline); returns the corpus in use."""
+    global TOOL_BACKEND, _corpus
+    if backend not in TOOL_BACKENDS:
+        raise ValueError(f"Unknown tool backend: {backend}")
+    with _lock:
+        TOOL_BACKEND = backend
+        _corpus = ToolCorpus(corpus_path) if backend != "live" else None
+        _tools.clear()
+        _agents.clear()
+    return _corpus
+
+
+def _backend_func(spec: ToolSpec):
+    global _corpus
+    if TOOL_BACKEND != "live" and _corpus is None:
+        _corpus = ToolCorpus()
+    if TOOL_BACKEND == "offline":
+        return _corpus.offline(spec.name)
+    if TOOL_BACKEND == "record":
+        return _corpus.recording(spec.name, _lazy(spec.build))
+    return _lazy(spec.build)
+
+
+def get_tools(tool_keys: Iterable[str]):
+    with _lock:
+        for key in tool_keys:
+            if key not in _tools:
+                spec = TOOL_SPECS[key]
+                if TOOL_BACKEND == "live":
+                    _tools[key] = TOOL_CACHE.wrap_func(spec.name, _backend_func(spec), spec.description)
+                else:
+                    _tools[key] = Tool(name=spec.name, description=spec.description, func=_backend_func(spec))
+        return [_tools[key] for key in tool_keys]
+
+
+def _remember(cache: OrderedDict, key, build, max_size: int):
+    with _lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    value = build()
+    with _lock:
+        value = cache.setdefault(key, value)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+    return value
+
+
+def get_llm(provider: str, model: str, api_key: str = "", **options):
+    key = (provider, model, hashlib.sha256(api_key.encode()).hexdigest(), repr(sorted(options.items())))
+
+    def build():
+        if provider == "groq":
+            from langchain_groq import ChatGroq
+            return with_cassette(ChatGroq(groq_api_key=api_key, model_name=model, **options))
+        if provider == "ollama":
+            # langchain_ollama's ChatOllama supports tool calling; the community one only text
+            if importlib.util.find_spec("langchain_ollama") is not None:
+                from langchain_ollama import ChatOllama
+            else:
+                from langchain_community.chat_models import ChatOllama
+            return with_cassette(ChatOllama(model=model, **options))
+        raise ValueError(f"Unknown provider: {provider}")
+
+    return _remember(_llms, key, build, max_size=16)
+
+
+def get_agent(llm, tool_keys: Iterable[str], mode: str = "",
+              agent: AgentType = AgentType.ZERO_SHOT_REACT_DESCRIPTION, **agent_options):
+    """Cached initialize_agent(...) for this (llm, mode, tool set, options)."""
+    tool_keys = tuple(tool_keys)
+    key = (id(llm), mode, tool_keys, agent, repr(sorted(agent_options.items())))
+
+    def build():
+        executor = initialize_agent(get_tools(tool_keys), llm, agent=agent, **agent_options)
+        # The same executor (every field initialize_agent set), stepped under a per-turn
+        # TurnController (see agentController.py); unless asked otherwise, an agent stopped
+        # early, including by max_iterations, still writes a final answer
+        fields = {name: getattr(executor, name) for name in type(executor).model_fields}
+        if "early_stopping_method" not in agent_options:
+            fields["early_stopping_method"] = "generate"
+        return ControlledAgentExecutor(**fields)
+
+    return _remember(_agents, key, build, max_size=32)
+
+
+def get_tool_agent(llm, tool_keys: Iterable[str], mode: str = "", **agent_options) -> Optional[ToolCallingAgent]:
+    """Cached ToolCallingAgent for this (llm, mode, tool set, options); None without tool calling."""
+    tool_keys = tuple(tool_keys)
+    key = (id(llm), mode, tool_keys, "tool-calling", repr(sorted(agent_options.items())))
+
+    def build():
+        if not supports_tool_calling(llm):
+            return None
+        return ToolCallingAgent(llm, get_tools(tool_keys), **agent_options)
+
+    tool_agent = _remember(_agents, key, build, max_size=32)
+    # An agent whose model turned out to reject tools at run time is not offered again
+    return tool_agent if tool_agent is not None and tool_agent.supported else None
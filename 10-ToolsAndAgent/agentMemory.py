@@ -0,0 +1,200 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from agentController import approx_tokens
+from errorExtractor import LogError, error_report, extract_errors
+from offlineTools import fts_query
+
+# -------------------------
+# Bounded conversation memory for the agent apps
+#
+# app.py used to hand the agent the whole st.session_state.messages list and
+# app5.py re-sent the first 4000 chars of the pasted log with every
+# follow-up, so the prompt grew (or stayed big) on every turn. A
+# ConversationMemory lives in st.session_state (one per browser session):
+# - recent turns are kept verbatim up to a token budget; older ones are
+#   folded into a rolling summary on a background thread (the turn never
+#   waits for it; until it is ready the previous summary is used)
+# - a pasted log is parsed once per session (LogContext): its distinct
+#   errors (errorExtractor) and an in-memory SQLite FTS5 index over blocks
+#   of lines
+# - context(question) renders summary + error list + only the log blocks
+#   that best match the question (within a token budget) + recent turns,
+#   and records the size of what was sent, so tokens per turn can be shown
+# -------------------------
+
+Summarizer = Callable[[str, List[Tuple[str, str]]], str]
+
+SUMMARY_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="agent-memory-summary")
+
+SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    (
+        "system",
+        "You maintain a running summary of a conversation. Merge the new lines into the summary. "
+        "Keep error names, log lines, root causes, fixes, links, decisions and open questions. "
+        "Reply with the updated summary only, at most 150 words.",
+    ),
+    ("human", "Current summary:\n{summary}\n\nNew lines:\n{lines}"),
+])
+
+# Left out of the full-text query; they match every block of a log
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "did", "for", "from", "how", "i",
+    "in", "is", "it", "its", "me", "my", "of", "on", "or", "that", "the", "this", "to", "was", "we", "what",
+    "when", "where", "which", "who", "why", "with", "you", "your", "log", "logs", "error", "errors",
+}
+
+
+def llm_summarizer(llm) -> Summarizer:
+    chain = SUMMARY_PROMPT | llm | StrOutputParser()
+
+    def summarize(previous: str, turns: List[Tuple[str, str]]) -> str:
+        lines = "\n".join(f"{role}: {content}" for role, content in turns)
+        return chain.invoke({"summary": previous or "(none)", "lines": lines})
+
+    return summarize
+
+
+class LogContext:
+    """A pasted log, parsed once: its distinct errors and a full-text index over blocks of lines."""
+
+    def __init__(self, text: str, block_lines: int = 8, max_block_chars: int = 1200):
+        self.text = text
+        self.errors: List[LogError] = extract_errors(text)
+        self.report = error_report(self.errors)
+        self.blocks = {}  # first line number -> block text
+        self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        self._db.execute("CREATE VIRTUAL TABLE blocks USING fts5(body)")
+        lines = text.splitlines()
+        for start in range(0, len(lines), block_lines):
+            body = "\n".join(lines[start:start + block_lines]).strip()[:max_block_chars]
+            if body:
+                self.blocks[start + 1] = body
+                self._db.execute("INSERT INTO blocks(rowid, body) VALUES (?, ?)", (start + 1, body))
+
+    def relevant(self, question: str, max_tokens: int = 500, max_blocks: int = 6) -> List[Tuple[int, str]]:
+        """Best-matching (line number, block) pairs that fit in max_tokens, in log order."""
+        match = fts_query(question, STOPWORDS)
+        if not match:
+            return []
+        rows = self._db.execute(
+            "SELECT rowid FROM blocks WHERE blocks MATCH ? ORDER BY rank LIMIT ?", (match, max_blocks)
+        ).fetchall()
+        picked, used = [], 0
+        for (line,) in rows:
+            tokens = approx_tokens(self.blocks[line])
+            if used + tokens > max_tokens:
+                continue
+            picked.append((line, self.blocks[line]))
+            used += tokens
+        return sorted(picked)
+
+
+class ConversationMemory:
+    """Rolling summary + recent turns + a once-parsed log, rendered into a bounded prompt."""
+
+    def __init__(self, max_tokens: int = 600, log_tokens: int = 500, summarize: Optional[Summarizer] = None,
+                 background: bool = True):
+        self.max_tokens = max_tokens  # recent turns kept verbatim
+        self.log_tokens = log_tokens  # log blocks sent per question
+        self.summarize = summarize
+        self.background = background
+        self.rolling_summary = ""
+        self.window: List[Tuple[str, str]] = []
+        self.log: Optional[LogContext] = None
+        self.turn_tokens: List[int] = []  # size of every context() sent
+        self._window_tokens = 0
+        self._pending: List[Tuple[str, str]] = []
+        self._summarizing = False
+        self._generation = 0  # bumped by clear(); a summary started before it is dropped
+        self._lock = threading.Lock()
+
+    def set_log(self, text: str) -> LogContext:
+        if self.log is None or self.log.text != text:
+            self.log = LogContext(text)
+        return self.log
+
+    def add(self, role: str, content: str) -> None:
+        with self._lock:
+            self.window.append((role, content))
+            self._window_tokens += approx_tokens(content)
+
+            # Always keep the latest exchange, even if it alone is over budget
+            while self._window_tokens > self.max_tokens and len(self.window) > 2:
+                evicted = self.window.pop(0)
+                self._window_tokens -= approx_tokens(evicted[1])
+                if self.summarize is not None:
+                    self._pending.append(evicted)
+
+            start = bool(self._pending) and not self._summarizing
+            if start:
+                self._summarizing = True
+        if start:
+            if self.background:
+                SUMMARY_POOL.submit(self._summarize_pending)
+            else:
+                self._summarize_pending()
+
+    def _summarize_pending(self):
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                previous, generation = self.rolling_summary, self._generation
+                if not batch or self.summarize is None:
+                    self._summarizing = False
+                    return
+            try:
+                summary = self.summarize(previous, batch)
+            except Exception:
+                # Keep the old summary; a failed summary must not break the chat
+                summary = previous
+            with self._lock:
+                # Cleared while the summary was written: it describes the old conversation
+                if generation == self._generation:
+                    self.rolling_summary = summary
+
+    def context(self, question: str) -> str:
+        with self._lock:
+            summary, window = self.rolling_summary, list(self.window)
+        parts = []
+        if summary:
+            parts.append(f"SUMMARY OF THE EARLIER CONVERSATION:\n{summary}")
+        if self.log is not None:
+            if self.log.errors:
+                parts.append(f"ERRORS EXTRACTED FROM THE USER LOG:\n{self.log.report}")
+            blocks = self.log.relevant(question, self.log_tokens)
+            if blocks:
+                parts.append("RELEVANT LOG LINES:\n" + "\n".join(f"[line {line}]\n{body}" for line, body in blocks))
+        if window:
+            parts.append("RECENT CONVERSATION:\n" + "\n".join(f"{role}: {content}" for role, content in window))
+        parts.append(f"USER QUESTION:\n{question}")
+        text = "\n\n".join(parts)
+        self.turn_tokens.append(approx_tokens(text))
+        return text
+
+    def clear(self) -> None:
+        with self._lock:
+            self.rolling_summary = ""
+            self.window = []
+            self.log = None
+            self.turn_tokens = []
+            self._window_tokens = 0
+            self._pending = []
+            self._generation += 1
+
+    def summary(self) -> str:
+        if not self.turn_tokens:
+            return "Memory: nothing sent yet"
+        text = (
+            f"Memory: ~{self.turn_tokens[-1]:,} context tokens this turn "
+            f"(avg ~{sum(self.turn_tokens) // len(self.turn_tokens):,} over {len(self.turn_tokens)} turns) · "
+            f"{len(self.window)} recent messages" + (" + summary" if self.rolling_summary else "")
+        )
+        if self.log is not None:
+            text += f" · log parsed once: {len(self.log.errors)} errors, {len(self.log.blocks)} blocks indexed"
+        return text
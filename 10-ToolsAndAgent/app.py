@@ -1,9 +1,10 @@
 import streamlit as st
-from langchain_groq import ChatGroq
-from langchain_community.utilities import ArxivAPIWrapper, WikipediaAPIWrapper
-from langchain_community.tools import ArxivQueryRun, WikipediaQueryRun,DuckDuckGoSearchResults
-from langchain.agents import initialize_agent,AgentType
 from langchain import hub
+from agentFactory import get_agent, get_llm, get_tool_agent # Builds the LLM client, tools and agent once and reuses them across chat messages
+from agentController import ControlLabeler, TurnController # Per-turn deadline, token budget and loop detection; adds step timings to the UI
+from toolCallingAgent import StreamlitToolSteps # Draws the tool-calling steps and streams the final answer
+from agentMemory import ConversationMemory, llm_summarizer # Recent turns + rolling summary, so the prompt stays bounded as the chat grows
+from toolCache import TOOL_CACHE # Caches web tool results (per tool + normalised query) on disk, so repeated searches skip the network
 from langchain.callbacks import StreamlitCallbackHandler # Import Streamlit callback to stream LLM output live.It is a listener.It listens to the AI while it’s generating text.Every time new text comes, it sends it to Streamlit UI
 import os
 from dotenv import load_dotenv
@@ -12,24 +13,10 @@ from dotenv import load_dotenv
 
 
 
-## Wikipedia Tool
+## Tools: Wikipedia (1 best result, 250 chars), Arxiv (same limits) and DuckDuckGo "Search".
+## They are defined in agentFactory.py and each one is only built (imported, connected) the first time the agent calls it
 
-### Create an object that knows how to fetch data from Wikipedia
-api_wrapper_wiki = WikipediaAPIWrapper(
-    top_k_results=1,# Get only 1 best search result
-    doc_content_chars_max=250 # Limit article text to 250 characters
-)
-wiki = WikipediaQueryRun(api_wrapper=api_wrapper_wiki) # Create a Wikipedia search tool using the above wrapper
-wiki.name # Get the internal name of the Wikipedia tool (used by LangChain agents to identify it)
-
-##Arxiv tool
-
-# Create an object that knows how to fetch research papers from Arxiv
-api_wrapper_arxiv = ArxivAPIWrapper(top_k_results=1,doc_content_chars_max=250)
-arxiv=ArxivQueryRun(api_wrapper=api_wrapper_arxiv) # Create an Arxiv search tool using the above wrapper
-arxiv.name  ##Get the internal name of the Arxiv tool (used by LangChain)
-
-search= DuckDuckGoSearchResults(name="Search") # # Create a DuckDuckGo search tool for general web search
+TOOL_KEYS=("wikipedia","arxiv","search")
 
 # Set the app title shown on the Streamlit page
 
@@ -38,6 +25,9 @@ st.title("Langchain - Chat with search")
 ## Sidebar for settings
 st.sidebar.title("Settings")
 api_key=st.sidebar.text_input("Enter your GROQ API Key", type="password")
+# Tool calling: the model calls the tools directly (several at once), no Thought/Action text to parse, answer streamed.
+# ReAct: the classic text agent, one tool per LLM round trip
+runtime=st.sidebar.radio("Agent runtime",["Tool calling","ReAct"])
 
 # Initialize chat history if it does not exist
 
@@ -48,6 +38,11 @@ if "messages" not in st.session_state:
             "content":"Hi,I am a chatbot who can search the web.How can I help you?"
         }
     ]
+# Conversation memory for this browser session: the agent gets the recent turns and a summary of older ones,
+# instead of the whole transcript (which grew on every message)
+if "memory" not in st.session_state:
+    st.session_state["memory"] = ConversationMemory(max_tokens=800)
+
     # Display all previous messages from session state
 
 for msg in st.session_state.messages:
@@ -61,33 +56,47 @@ if prompt := st.chat_input(placeholder="What is machine learning"):
     st.session_state.messages.append({"role":"user","content":prompt}) # Take what the user typed --> Save it in chat history --> Mark it as a "user" message
     st.chat_message("user").write(prompt) # Immediately show the user’s message on screen
 
-# Initialize Groq LLM with streaming enabled
+# Groq LLM with streaming enabled. Cached per (model, API key), so its HTTP client is reused on every message
 
-    llm=ChatGroq(groq_api_key=api_key,  # User-provided API key
-                 model_name="llama-3.1-8b-instant", 
-                 streaming=True # Enable token-by-token streaming
+    llm=get_llm("groq",
+                "llama-3.1-8b-instant",
+                api_key=api_key,  # User-provided API key
+                streaming=True # Enable token-by-token streaming
+                )
 
-                 )
-
-    ## Create list of tools.Combine all tools that agent can use
-    tools=[wiki,arxiv,search]
-
-    # Create the agent.Initialize an agent that decides which tool to use automatically
-    search_agent=initialize_agent(
-        tools,
+    # The agent (Reason + Act, ZERO_SHOT_REACT_DESCRIPTION) is created on the first message and reused afterwards.
+    # Every tool is wrapped so a repeated query returns the cached result
+    search_agent=get_agent(
         llm, #Give the agent a brain. The agent uses this LLM to Understand the question, Decide what tool to use,Write the final answer
-        agent= AgentType.ZERO_SHOT_REACT_DESCRIPTION,  # Reason + Act agent type. i.e. The agent thinks first, then acts by choosing a tool.
+        TOOL_KEYS,
         handle_parsing_errors=True # Prevent crashes on wrong format.If the AI response is slightly malformed or confusing, don’t crash — try to recover.
         # with parsing errors agent tries to fix its own mistakes and app keeps running
     )
     ##search_agent = create_react_agent(llm, tools, prompt)
+    tool_agent=get_tool_agent(llm,TOOL_KEYS) if runtime=="Tool calling" else None # None when the model cannot call tools -> ReAct
 # Display assistant message container
 
+    memory=st.session_state.memory
+    memory.summarize=llm_summarizer(llm) # Turns that fall out of the window are summarised by the same model, in the background
+
     with st.chat_message("assistant"): ## Open a chat bubble that belongs to the assistant.Everything inside this block appears as message from the assistant and is aligned on assistant side like chatgpt replies
-        st_cb= StreamlitCallbackHandler(st.container(),expand_new_thoughts=False) # # It watches the AI while it’s “typing”.Shows words gradually on the screen.This works only because streaming=True was enabled in the LLM.
-        response=search_agent.run(st.session_state.messages,callbacks=[st_cb]) # Ask the AI agent to generate a reply using the full chat history Here Agent reads all previous messages -->Thinks about the conversation --> Decides which tool to use -->Gets Information --> Starts Answering --> Streams the answer live to UI
+        controller=TurnController() # Stops the turn on deadline / token budget / repeated actions and forces a final answer
+        if tool_agent is not None:
+            steps=StreamlitToolSteps(st.container(),controller) # One expander per step (its parallel tool calls), then the answer as it streams
+            response=tool_agent.run(memory.context(prompt),callbacks=[controller],on_step=steps.on_step,on_token=steps.on_token)
+        else:
+            st_cb= StreamlitCallbackHandler(st.container(),expand_new_thoughts=False,thought_labeler=ControlLabeler(controller)) # # It watches the AI while it’s “typing”.Shows words gradually on the screen.This works only because streaming=True was enabled in the LLM.
+            response=search_agent.run(memory.context(prompt),callbacks=[controller,st_cb]) # Ask the AI agent to generate a reply using the summary + recent messages + the new question. Agent reads them -->Thinks about the conversation --> Decides which tool to use -->Gets Information --> Starts Answering --> Streams the answer live to UI
+        memory.add("user",prompt)
+        memory.add("assistant",response)
         st.session_state.messages.append({"role":"assistant","content":response}) # Save the assistant’s final reply into memory.Hence,it doesn’t disappear when Streamlit refreshes and future answers remember past messages
-        st.write(response)  # Even though the response was streamed live, this ensures the final completed answer is shown correctly.
+        st.sidebar.caption(TOOL_CACHE.summary()) # How many tool calls were served from the cache
+        st.caption(controller.summary()) # Steps, LLM calls, time and tokens used by this turn
+        st.sidebar.caption(memory.summary()) # Context tokens sent this turn and on average
+        if tool_agent is not None:
+            steps.finish(response) # The streamed answer, replaced by the final text
+        else:
+            st.write(response)  # Even though the response was streamed live, this ensures the final completed answer is shown correctly.
 
         
 
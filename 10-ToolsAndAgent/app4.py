@@ -1,8 +1,9 @@
 import streamlit as st
-from langchain_community.chat_models import ChatOllama
-from langchain_community.tools import DuckDuckGoSearchResults
-from langchain.agents import initialize_agent, AgentType
+from agentFactory import get_agent, get_llm, get_tool_agent
+from errorExtractor import error_report, extract_errors
 from langchain.callbacks import StreamlitCallbackHandler
+from agentController import ControlLabeler, TurnController
+from toolCallingAgent import StreamlitToolSteps, ToolCallingUnsupported
 import os
 from dotenv import load_dotenv
 
@@ -18,10 +19,17 @@ st.caption("Paste your logs. I search the web using your local gemma3:1b.")
 st.sidebar.title("Settings")
 # We no longer need an API Key, but we can let user pick the model name
 model_id = st.sidebar.text_input("Ollama Model Name", value="gemma3:1b")
+# Per-turn limits: the agent is stopped and asked for a final answer when either runs out
+deadline_seconds = st.sidebar.slider("Turn deadline (seconds)", 15, 300, 90)
+token_budget = st.sidebar.number_input("Token budget per turn", 1000, 32000, 6000, step=1000)
+# ReAct by default: gemma3:1b has no tool support. Tool calling needs a model with it (e.g. llama3.1,
+# qwen2.5) and the langchain-ollama package; a model the server rejects tools for falls back to ReAct
+runtime = st.sidebar.radio("Agent runtime", ["ReAct", "Tool calling"])
 
 # --- TOOL SETUP ---
-# num_results=3 gives enough variety without overwhelming the context
-search = DuckDuckGoSearchResults(name="Search", num_results=3)
+# DuckDuckGo with num_results=3 gives enough variety without overwhelming the context.
+# Built lazily on the first search (see agentFactory.py)
+TOOL_KEYS = ("search_top3",)
 
 # Initialize chat history
 if "messages" not in st.session_state:
@@ -42,15 +50,14 @@ if prompt := st.chat_input(placeholder="Paste error logs here..."):
     st.session_state.messages.append({"role": "user", "content": prompt})
     st.chat_message("user").write(prompt)
 
-    # CHANGE 1: Use ChatOllama instead of ChatGroq
-    llm = ChatOllama(
-        model=model_id,
+    # CHANGE 1: Use ChatOllama instead of ChatGroq (cached per model, not rebuilt every message)
+    llm = get_llm(
+        "ollama",
+        model_id,
         temperature=0,      # Keep it factual
         keep_alive="5m"     # Keeps the model loaded in RAM for 5 mins
     )
 
-    tools = [search]
-
     # --- PROMPT SETUP ---
     sys_prompt = """You are an expert Software Reliability Engineer.
 
@@ -62,31 +69,48 @@ if prompt := st.chat_input(placeholder="Paste error logs here..."):
     Your final answer must contain these sections:
     - **Analysis:** [Brief explanation in simple words]
     - **Probable Cause:** [Why it happened]
-    - **Number of Errors:** [Give number of errors present in the logs]
+    - **Number of Errors:** [Copy the "Total Errors Found" number given with the log]
     - **Recommended Solution:** [Code fix/steps]
     - **References:** [URL]
     """
 
-    # Initialize the agent
-    search_agent = initialize_agent(
-        tools,
+    # The agent is built once per model and reused on later messages
+    search_agent = get_agent(
         llm,
-        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        TOOL_KEYS,
         # Helper string to fix the agent if it gets stuck in a loop
         handle_parsing_errors="Check your output format. Do not just output text, you must use the Action format or 'Final Answer'.",
         max_iterations=5,
     )
+    tool_agent = get_tool_agent(llm, TOOL_KEYS) if runtime == "Tool calling" else None
 
     with st.chat_message("assistant"):
-        st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=False)
+        # Listed before st_cb, so each step's timings are recorded before its title is drawn
+        controller = TurnController(deadline_seconds=deadline_seconds, token_budget=token_budget)
         
-        # Truncate prompt to safe limits (approx 1000 chars)
-        truncated_prompt = prompt[:1000]
-        full_prompt = f"{sys_prompt}\n\nUSER ERROR LOG:\n{truncated_prompt}"
+        # The whole log is scanned locally; the agent only gets the distinct errors, already counted.
+        # Input without recognisable errors (e.g. a plain question) is passed as before (approx 1000 chars)
+        errors = extract_errors(prompt)
+        if errors:
+            st.caption(f"{len(errors)} distinct errors found locally in {len(prompt.splitlines())} log lines")
+            full_prompt = f"{sys_prompt}\n\nERRORS EXTRACTED FROM THE USER LOG:\n{error_report(errors)}"
+        else:
+            full_prompt = f"{sys_prompt}\n\nUSER ERROR LOG:\n{prompt[:1000]}"
         
         try:
-            response = search_agent.run(full_prompt, callbacks=[st_cb])
-            st.write(response)
+            response = None
+            if tool_agent is not None:
+                steps = StreamlitToolSteps(st.container(), controller)
+                try:
+                    response = tool_agent.run(full_prompt, callbacks=[controller], on_step=steps.on_step, on_token=steps.on_token)
+                    steps.finish(response)
+                except ToolCallingUnsupported:
+                    st.caption(f"{model_id} does not support tool calling; using the ReAct agent")
+            if response is None:
+                st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=False, thought_labeler=ControlLabeler(controller))
+                response = search_agent.run(full_prompt, callbacks=[controller, st_cb])
+                st.write(response)
+            st.caption(controller.summary())
             st.session_state.messages.append({"role": "assistant", "content": response})
             
         except Exception as e:
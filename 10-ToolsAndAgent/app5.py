@@ -1,8 +1,11 @@
 import streamlit as st
-from langchain_community.chat_models import ChatOllama
-from langchain_community.tools import DuckDuckGoSearchResults
-from langchain.agents import initialize_agent, AgentType
+from agentFactory import get_agent, get_llm, get_tool_agent, get_tools
 from langchain.callbacks import StreamlitCallbackHandler
+from agentController import ControlLabeler, TurnController
+from toolCallingAgent import StreamlitToolSteps, ToolCallingUnsupported
+from toolCache import TOOL_CACHE
+from planExecute import run_plan_execute, timings_summary
+from agentMemory import ConversationMemory, llm_summarizer
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,14 +18,28 @@ st.caption("Paste your logs. I search the web using your local model.")
 st.sidebar.title("Settings")
 model_id = st.sidebar.text_input("Ollama Model Name", value="gemma3:1b")
 
+# Planner/executor: 1 LLM call to list the errors, all searches in parallel, 1 LLM call to answer.
+# The ReAct agent instead makes one LLM round trip per search.
+analysis_mode = st.sidebar.radio("Log analysis mode", ["Planner / executor (parallel)", "Agent"])
+# Agent runtime: native tool calling (several searches per step, streamed answer; needs a model with tool
+# support and langchain-ollama) or ReAct (one search per LLM round trip). Follow-ups always use the agent
+runtime = st.sidebar.radio("Agent runtime", ["ReAct", "Tool calling"])
+max_parallel = st.sidebar.slider("Max parallel searches", 1, 8, 4)
+# ReAct turns stop (and still give a final answer) at the deadline, the token budget, or on a loop
+deadline_seconds = st.sidebar.slider("Turn deadline (seconds)", 15, 300, 120)
+token_budget = st.sidebar.number_input("Token budget per turn", 1000, 32000, 8000, step=1000)
+
 # --- CHANGE 1: RESET BUTTON ---
 # Allows user to clear memory and start fresh
 if st.sidebar.button("🗑️ Reset Conversation"):
     st.session_state.messages = []
     st.session_state.error_log = ""
+    st.session_state.pop("memory", None)
     st.rerun()
 
-search = DuckDuckGoSearchResults(name="Search", num_results=3)
+# DuckDuckGo (3 results), built on first use; repeated error searches are served from the tool cache
+TOOL_KEYS = ("search_top3",)
+search, = get_tools(TOOL_KEYS)
 
 # Initialize chat history
 if "messages" not in st.session_state:
@@ -32,6 +49,13 @@ if "messages" not in st.session_state:
 if "error_log" not in st.session_state:
     st.session_state["error_log"] = ""
 
+# Parsed log + rolling summary of the chat, kept for this session (see agentMemory.py).
+# Follow-ups get the error list, the log lines that match the question and the recent turns,
+# instead of the first 4000 chars of the log every time
+if "memory" not in st.session_state:
+    st.session_state["memory"] = ConversationMemory()
+memory = st.session_state.memory
+
 # Display history
 for msg in st.session_state.messages:
     st.chat_message(msg["role"]).write(msg["content"])
@@ -42,29 +66,38 @@ if prompt := st.chat_input(placeholder="Paste logs OR ask a follow-up..."):
     st.session_state.messages.append({"role": "user", "content": prompt})
     st.chat_message("user").write(prompt)
 
-    llm = ChatOllama(
-        model=model_id,
+    # Cached per model: the client and the agent below are reused across messages
+    llm = get_llm(
+        "ollama",
+        model_id,
         temperature=0,
         keep_alive="5m"
     )
-    tools = [search]
+    memory.summarize = llm_summarizer(llm)
 
     # --- CHANGE 3: CONTEXT AWARENESS LOGIC ---
     # Check if we already have the logs saved
+    use_planner = not st.session_state.error_log and analysis_mode.startswith("Planner")
     if not st.session_state.error_log:
         # CASE A: User just pasted the logs
         st.session_state.error_log = prompt
         
         
-        # Bumped to 5000 (Ollama can handle this).
-        truncated_prompt = prompt[:5000] 
-        full_input = f"USER ERROR LOG:\n{truncated_prompt}"
+        # Every line is scanned locally for distinct error signatures (exact count, deduplicated),
+        # so the agent gets a short list instead of the first 5000 chars of the log.
+        # Parsed once: follow-ups and the planner reuse it
+        log = memory.set_log(prompt)
+        memory_note = f"(pasted a log of {len(prompt.splitlines())} lines, {len(log.errors)} distinct errors)"
+        if log.errors:
+            full_input = f"ERRORS EXTRACTED FROM THE USER LOG:\n{log.report}"
+        else:
+            full_input = f"USER ERROR LOG:\n{prompt[:5000]}"
         
         # PROMPT: Explicitly ask for ALL errors
         sys_prompt = sys_prompt = """You are an expert SRE. 
         
         MISSION:
-        1. Scan entire Log and Identify EVERY distinct error in the log (look for 'Error', 'Failed', 'Denied').
+        1. Take EVERY distinct error from the input (already extracted and counted from the full log).
         2. SEARCH for fixes using the Search tool.
         3. EXTRACT the URLs from the search results. You MUST cite them.
         
@@ -76,7 +109,7 @@ if prompt := st.chat_input(placeholder="Paste logs OR ask a follow-up..."):
         REQUIRED FINAL ANSWER FORMAT:
         
         Final Answer:
-        **Total Errors Found:** [Exact Count of number of errors]
+        **Total Errors Found:** [Copy the "Total Errors Found" number from the input]
 
         **Analysis Table:**
         | Error | Solution | Probable Cause |
@@ -89,35 +122,66 @@ if prompt := st.chat_input(placeholder="Paste logs OR ask a follow-up..."):
         
     else:
         # CASE B: Follow-up question
-        # We combine the saved log with the new question
-        full_input = f"""
-        CONTEXT (Existing Logs): 
-        {st.session_state.error_log[:4000]}...
-        
-        USER FOLLOW-UP QUESTION: 
-        {prompt}
-        """
-        sys_prompt = "You are a helpful assistant. Answer the user's follow-up question based on the error logs provided in context."
+        # Summary + extracted errors + the log lines matching the question + recent turns, within a token budget
+        memory_note = prompt
+        full_input = memory.context(prompt)
+        sys_prompt = "You are a helpful assistant. Answer the user's follow-up question based on the conversation and the error logs provided in context."
 
-    # Initialize agent
-    search_agent = initialize_agent(
-        tools,
+    # Agent for this model (built on first use)
+    search_agent = get_agent(
         llm,
-        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        TOOL_KEYS,
         handle_parsing_errors="You are missing the 'Final Answer:' prefix. Please retry and start your response with 'Final Answer:' followed by the table and References",
         max_iterations=8,
     )
+    tool_agent = get_tool_agent(llm, TOOL_KEYS) if runtime == "Tool calling" else None
+
+    if use_planner:
+        with st.chat_message("assistant"):
+            try:
+                with st.spinner("Extracting errors, searching fixes in parallel, writing the analysis..."):
+                    response, queries, timings = run_plan_execute(
+                        llm, search.run, prompt, max_workers=max_parallel, errors=log.errors
+                    )
+                with st.expander(f"Errors searched ({len(queries)})"):
+                    st.markdown("\n".join(f"- {query}" for query in queries))
+                st.caption(timings_summary(timings, len(queries), max_parallel))
+                st.sidebar.caption(TOOL_CACHE.summary())
+                st.write(response)
+                st.session_state.messages.append({"role": "assistant", "content": response})
+                memory.add("user", memory_note)
+                memory.add("assistant", response)
+            except Exception as e:
+                st.error(f"An error occurred: {e}")
+                st.write("Tip: Ensure Ollama is running.")
+        st.stop()
 
     with st.chat_message("assistant"):
-        st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=False)
+        # Listed before st_cb, so each step's timings are recorded before its title is drawn
+        controller = TurnController(deadline_seconds=deadline_seconds, token_budget=token_budget)
         
         # Combine instructions with input This line glues them together into one long message so the AI receives both the Order and the Ingredients at the same time.
         final_prompt = f"{sys_prompt}\n\nINPUT:\n{full_input}" 
         
         try:
-            response = search_agent.run(final_prompt, callbacks=[st_cb])
-            st.write(response)
+            response = None
+            if tool_agent is not None:
+                steps = StreamlitToolSteps(st.container(), controller)
+                try:
+                    response = tool_agent.run(final_prompt, callbacks=[controller], on_step=steps.on_step, on_token=steps.on_token)
+                    steps.finish(response)
+                except ToolCallingUnsupported:
+                    st.caption(f"{model_id} does not support tool calling; using the ReAct agent")
+            if response is None:
+                st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=False, thought_labeler=ControlLabeler(controller))
+                response = search_agent.run(final_prompt, callbacks=[controller, st_cb])
+                st.write(response)
+            st.caption(controller.summary())
+            st.sidebar.caption(TOOL_CACHE.summary())
             st.session_state.messages.append({"role": "assistant", "content": response})
+            memory.add("user", memory_note)
+            memory.add("assistant", response)
+            st.sidebar.caption(memory.summary())
         except Exception as e:
             st.error(f"An error occurred: {e}")
             st.write("Tip: Ensure Ollama is running.")
\ No newline at end of file
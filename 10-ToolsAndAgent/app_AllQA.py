@@ -6,58 +6,31 @@ st.title("🕵️ QA Super-Copilot: Code, Docs & Video")
 
 # 2. Safe Imports
 try:
-    from langchain_groq import ChatGroq
-    from langchain_community.tools import DuckDuckGoSearchResults
-    from langchain_community.utilities import StackExchangeAPIWrapper
-    from langchain_community.tools import YouTubeSearchTool
-    from langchain.agents import initialize_agent, AgentType, Tool
     from langchain.callbacks import StreamlitCallbackHandler
+    from agentFactory import get_agent, get_llm, get_tool_agent, missing_packages
+    from agentController import ControlLabeler, TurnController
+    from toolCache import TOOL_CACHE
+    from toolCallingAgent import SYSTEM_PROMPT, StreamlitToolSteps
 except ImportError as e:
     st.error(f"❌ Missing Dependencies. Please look at your terminal or install: {e}")
     st.stop()
 
 st.sidebar.title("Settings")
 api_key = st.sidebar.text_input("Enter your GROQ API Key", type="password")
-
-# --- TOOL 1: StackOverflow ---
-try:
-    stack_wrapper = StackExchangeAPIWrapper()
-    stack_tool = Tool(
-        name="StackOverflow",
-        func=stack_wrapper.run,
-        description="Useful for finding specific error messages and developer discussions."
-    )
-except Exception as e:
+# Tool calling: structured tool calls, several searches per step, streamed answer. ReAct: one tool per LLM round trip
+runtime = st.sidebar.radio("Agent runtime", ["Tool calling", "ReAct"])
+
+# --- TOOLS: StackOverflow, GitHub (via DuckDuckGo), YouTube Search ---
+# Defined in agentFactory.py; each is built on its first call and cached per tool + normalised query.
+# Here we only check that the optional packages are installed (no imports on every rerun).
+TOOL_KEYS = ("stackoverflow", "github", "youtube")
+missing = missing_packages(TOOL_KEYS)
+for key, package in missing.items():
     # Use st.warning so the app doesn't crash completely, just disables the tool
-    st.warning(f"⚠️ StackOverflow tool disabled. (Missing 'stackapi'?): {e}")
-    stack_tool = None
+    st.warning(f"⚠️ {key} tool disabled. (Missing '{package}')")
+tool_keys = tuple(key for key in TOOL_KEYS if key not in missing)
 
-# --- TOOL 2: GitHub (via DuckDuckGo) ---
-try:
-    ddg_search = DuckDuckGoSearchResults()
-    def github_search_func(query):
-        return ddg_search.run(f"site:github.com {query}")
-
-    github_tool = Tool(
-        name="GitHub_Search",
-        func=github_search_func,
-        description="Useful for finding code snippets, repo issues, and bug reports."
-    )
-except Exception as e:
-    st.warning(f"⚠️ GitHub/DuckDuckGo tool disabled. (Missing 'duckduckgo-search'?): {e}")
-    github_tool = None
-
-# --- TOOL 3: YouTube Search ---
-try:
-    youtube_tool = YouTubeSearchTool()
-except Exception as e:
-    st.warning(f"⚠️ YouTube tool disabled. (Missing 'youtube-search'?): {e}")
-    youtube_tool = None
-
-# Filter out None tools
-tools = [t for t in [stack_tool, github_tool, youtube_tool] if t is not None]
-
-if not tools:
+if not tool_keys:
     st.error("❌ No tools are available. Please install the required libraries.")
     st.stop()
 
@@ -78,11 +51,8 @@ if prompt := st.chat_input(placeholder="Ex: How to install Appium on Windows tut
         st.info("Please enter your Groq API Key in the sidebar.")
         st.stop()
 
-    llm = ChatGroq(
-        groq_api_key=api_key, 
-        model_name="llama-3.1-8b-instant", 
-        streaming=True
-    )
+    # Reused across messages (same HTTP client) as long as the key and model stay the same
+    llm = get_llm("groq", "llama-3.1-8b-instant", api_key=api_key, streaming=True)
 
     system_prompt = """
     You are an expert QA Technical Lead.
@@ -92,20 +62,32 @@ if prompt := st.chat_input(placeholder="Ex: How to install Appium on Windows tut
     3. **GENERAL:** Use your own knowledge.
     """
 
-    agent = initialize_agent(
-        tools,
+    agent = get_agent(
         llm,
-        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        tool_keys,
         verbose=True,
         handle_parsing_errors=True,
         agent_kwargs={"prefix": system_prompt}
     )
+    # Same routing instructions as the system message; None when the model cannot call tools (ReAct is used)
+    tool_agent = get_tool_agent(
+        llm, tool_keys, system_prompt=system_prompt + "\n" + SYSTEM_PROMPT
+    ) if runtime == "Tool calling" else None
 
     with st.chat_message("assistant"):
-        st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=True)
+        # Deadline, token budget and loop detection for this turn; step timings go into the step titles
+        controller = TurnController()
         try:
-            response = agent.run(prompt, callbacks=[st_cb])
+            if tool_agent is not None:
+                steps = StreamlitToolSteps(st.container(), controller)
+                response = tool_agent.run(prompt, callbacks=[controller], on_step=steps.on_step, on_token=steps.on_token)
+                steps.finish(response)
+            else:
+                st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=True, thought_labeler=ControlLabeler(controller))
+                response = agent.run(prompt, callbacks=[controller, st_cb])
+                st.write(response)
             st.session_state.messages.append({"role": "assistant", "content": response})
-            st.write(response)
+            st.caption(controller.summary())
+            st.sidebar.caption(TOOL_CACHE.summary())
         except Exception as e:
             st.error(f"An error occurred during execution: {e}")
\ No newline at end of file
@@ -1,61 +1,25 @@
 # app.py
 import streamlit as st
-from langchain_groq import ChatGroq
-from langchain_community.utilities import ArxivAPIWrapper, WikipediaAPIWrapper
-from langchain_community.tools import ArxivQueryRun, WikipediaQueryRun, DuckDuckGoSearchResults
-from langchain.agents import initialize_agent, AgentType
 from langchain.callbacks import StreamlitCallbackHandler
+from agentFactory import get_agent, get_llm, get_tool_agent
+from agentController import ControlLabeler, TurnController
+from toolCache import TOOL_CACHE
+from toolCallingAgent import StreamlitToolSteps
+from promptPrefix import MODE_PROMPTS, PREFIX_METER, mode_prompt
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# ---------- helper ----------
-def system_prompt(mode: str) -> str:
-    if mode == "QA – Fix my test failure":
-        return (
-            "You are a senior QA automation engineer.\n"
-            "User will paste test failures, logs, or stack traces.\n\n"
-            "Your job:\n"
-            "1. Explain the failure in simple, clear language.\n"
-            "2. Identify the most likely root cause.\n"
-            "3. Suggest 3 concrete fixes the QA can try now.\n"
-            "4. Say whether this looks like a test issue, environment issue, or product bug.\n\n"
-            "Be practical and specific. Avoid generic theory."
-        )
-    if mode == "QA Manager – Debug team failures":
-        return (
-            "You are a QA Manager assistant.\n"
-            "User will paste failures from multiple tests or builds.\n\n"
-            "Your job:\n"
-            "1. Classify each failure (flaky test, environment, data, product bug, infra).\n"
-            "2. Identify any patterns across failures.\n"
-            "3. Recommend next owner (QA, Dev, Infra/DevOps).\n"
-            "4. Suggest preventive actions to avoid repeat failures.\n\n"
-            "Focus on delivery risk, efficiency, and team-level insights."
-        )
-    if mode == "Company – RCA for failures":
-        return (
-            "You are an incident RCA assistant.\n"
-            "User will paste production or test failure details.\n\n"
-            "Your job:\n"
-            "1. Summarize the incident in business-friendly language.\n"
-            "2. Identify primary and contributing technical causes.\n"
-            "3. Suggest corrective and preventive actions (CAPA).\n"
-            "4. Highlight risk if unresolved.\n\n"
-            "Keep it concise and suitable for RCA / postmortem documents."
-        )
-    return "You are a helpful assistant for debugging software and test failures."
+# ---------- prompts ----------
+# Mode instructions are compiled once per mode (see promptPrefix.py): into the ReAct template, or at the start
+# of the tool-calling agent's question. Prompts put what all modes share first, then the mode, then the user's
+# text, so provider prompt caches can reuse the longest possible prefix
 
 # ---------- tools (unchanged) ----------
-api_wrapper_wiki = WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=250)
-wiki = WikipediaQueryRun(api_wrapper=api_wrapper_wiki)
-
-api_wrapper_arxiv = ArxivAPIWrapper(top_k_results=1, doc_content_chars_max=250)
-arxiv = ArxivQueryRun(api_wrapper=api_wrapper_arxiv)
-
-search = DuckDuckGoSearchResults(name="Search")
-tools = [wiki, arxiv, search]
+# Wikipedia, Arxiv (1 result, 250 chars) and DuckDuckGo, built on first use (see agentFactory.py).
+# Results are cached per tool + normalised query (see toolCache.py)
+TOOL_KEYS = ("wikipedia", "arxiv", "search")
 
 # ---------- UI ----------
 st.set_page_config(page_title="QA Failure Debug Copilot", layout="wide")
@@ -68,12 +32,10 @@ api_key = st.sidebar.text_input("Enter your GROQ API Key (optional)", type="pass
 
 mode = st.sidebar.selectbox(
     "Who are you?",
-    [
-        "QA – Fix my test failure",
-        "QA Manager – Debug team failures",
-        "Company – RCA for failures"
-    ],
+    list(MODE_PROMPTS),  # QA – Fix my test failure / QA Manager – Debug team failures / Company – RCA for failures
 )
+# Tool calling: structured tool calls, several searches per step, streamed answer. ReAct: one tool per LLM round trip
+runtime = st.sidebar.radio("Agent runtime", ["Tool calling", "ReAct"])
 
 # Helpful info area
 with st.expander("How to use (quick)"):
@@ -142,30 +104,40 @@ if user_input:
     else:
         # Try to call real agent but catch exceptions and show friendly message
         try:
-            llm = ChatGroq(
-                groq_api_key=api_key,
-                model_name="llama-3.1-8b-instant",
-                streaming=True,
-            )
+            # LLM client and agent are built on the first message and reused afterwards
+            llm = get_llm("groq", "llama-3.1-8b-instant", api_key=api_key, streaming=True)
 
-            search_agent = initialize_agent(
-                tools,
-                llm,
-                agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-                handle_parsing_errors=True,
+            # One agent per mode, its instructions compiled into the prompt (not prepended to the input)
+            prompt = mode_prompt(mode)
+            search_agent = get_agent(
+                llm, TOOL_KEYS, mode=mode, handle_parsing_errors=True, agent_kwargs=prompt.react_agent_kwargs
             )
-
-            # Compose mode-specific prompt + user input
-            sys_text = system_prompt(mode)
-            full_input = sys_text + "\n\nUser failure details:\n" + user_input
+            # None when the model cannot call tools; then the ReAct agent is used
+            tool_agent = get_tool_agent(llm, TOOL_KEYS) if runtime == "Tool calling" else None
 
             # Stream response if possible
             with st.chat_message("assistant"):
-                st_cb = StreamlitCallbackHandler(st.container(), expand_new_thoughts=False)
+                # Deadline, token budget and loop detection for this turn; step timings go into the step titles
+                controller = TurnController()
                 # agent.run may throw; show error if it does
-                response = search_agent.run(full_input, callbacks=[st_cb])
+                if tool_agent is not None:
+                    steps = StreamlitToolSteps(st.container(), controller)
+                    # Shared system message + tool schemas first, then this mode's instructions and the failure
+                    response = tool_agent.run(
+                        prompt.tool_question(user_input), callbacks=[controller, PREFIX_METER],
+                        on_step=steps.on_step, on_token=steps.on_token,
+                    )
+                    steps.finish(response)
+                else:
+                    st_cb = StreamlitCallbackHandler(
+                        st.container(), expand_new_thoughts=False, thought_labeler=ControlLabeler(controller)
+                    )
+                    response = search_agent.run(user_input, callbacks=[controller, PREFIX_METER, st_cb])
+                    st.write(response)
                 st.session_state["messages"].append({"role": "assistant", "content": response})
-                st.write(response)
+                st.caption(controller.summary())
+                st.sidebar.caption(TOOL_CACHE.summary())
+                st.sidebar.caption(PREFIX_METER.summary())  # Share of prompt tokens a prefix cache can reuse
 
         except Exception as e:
             # Friendly error info instead of blank page
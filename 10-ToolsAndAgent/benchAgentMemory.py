@@ -0,0 +1,140 @@
+import random
+import sys
+import time
+
+from agentController import approx_tokens
+from agentMemory import ConversationMemory, llm_summarizer
+from errorExtractor import error_report, extract_errors
+
+# -------------------------
+# Context tokens per turn over one chat session: replayed transcript vs agentMemory
+#
+# Usage: python benchAgentMemory.py [log file] [turns] [provider] [model]
+#        (defaults: synthetic 3000-line build log, 20 turns, no LLM)
+#
+# A session is one pasted log followed by follow-up questions, with canned
+# assistant answers, so only the context building is measured. Per turn we
+# report the size (~4 chars/token) of what each strategy sends the agent:
+# - transcript: the whole st.session_state.messages list (old app.py)
+# - log[:4000]: first 4000 chars of the saved log + the question (old app5.py)
+# - memory:     ConversationMemory.context() (summary + errors + matching log
+#               blocks + recent turns)
+# Without a provider, older turns are summarised by a deterministic
+# extractive summarizer; with one, by that model (synchronously).
+# -------------------------
+
+ERRORS = [
+    "ERROR [pool-{t}] c.e.Db - java.sql.SQLTransientConnectionException: HikariPool-1 - Connection is not available, request timed out after {n}ms.",
+    "ERROR [main] c.e.LoginTest - org.openqa.selenium.NoSuchElementException: no such element: Unable to locate element: {{\"method\":\"css selector\",\"selector\":\"#login-{n}\"}}",
+    "ERROR [main] c.e.Api - io.restassured.internal.http.HttpResponseException: Bad Gateway",
+    "ERROR [kafka-{t}] o.a.k.c.NetworkClient - org.apache.kafka.common.errors.TimeoutException: Topic orders-{n} not present in metadata after 60000 ms.",
+    "FATAL [main] c.e.Boot - java.lang.OutOfMemoryError: Java heap space",
+    "ERROR [main] npm ERR! code ERESOLVE unable to resolve dependency tree for react@{n}",
+]
+INFO = [
+    "INFO [main] c.e.Runner - Running test case {n}",
+    "DEBUG [pool-{t}] c.e.Http - GET /api/orders/{n} 200 in {t}ms",
+    "INFO [main] o.s.b.StartupInfoLogger - Started Application in {t}.{n} seconds",
+    "INFO [worker-{t}] c.e.Cache - warmed {n} entries",
+]
+QUESTIONS = [
+    "Why does the HikariPool connection time out?",
+    "Is the database pool size the problem or the network?",
+    "Which selector could not be found in LoginTest?",
+    "How do I make the Selenium wait for the login element?",
+    "What does Bad Gateway from the API mean here?",
+    "Could the Bad Gateway and the database timeout be related?",
+    "Why is the Kafka topic not present in metadata?",
+    "How do I create the orders topic automatically?",
+    "What heap size should I give the JVM to avoid OutOfMemoryError?",
+    "Which error happened first in the build?",
+    "How do I fix the npm ERESOLVE dependency tree error?",
+    "Should I use --legacy-peer-deps for the react dependency?",
+    "Summarise the root causes so far.",
+    "Which of these errors are flaky and which are real bugs?",
+    "What should I fix first?",
+    "Give me a Jenkins retry config for the flaky Selenium tests.",
+    "How many times did the HikariPool timeout occur?",
+    "Write a short incident note for the team.",
+    "What logs should I collect next time?",
+]
+
+
+def build_log(rng: random.Random, n_lines: int = 3000) -> str:
+    lines = []
+    for i in range(n_lines):
+        templates = ERRORS if rng.random() < 0.04 else INFO
+        line = rng.choice(templates).format(n=rng.randint(1, 999), t=rng.randint(1, 9))
+        lines.append(f"2024-05-01 10:{i // 60 % 60:02d}:{i % 60:02d},{rng.randint(0, 999):03d} {line}")
+        if "Exception" in line and rng.random() < 0.5:
+            lines.append("    at com.example.Service.call(Service.java:42)")
+    return "\n".join(lines)
+
+
+def canned_answer(rng: random.Random, question: str) -> str:
+    sentence = f"Regarding '{question}': the log shows the failure around this point and the usual fix is to check the configuration."
+    return " ".join([sentence] * rng.randint(3, 8))
+
+
+def extractive_summarizer(previous: str, turns) -> str:
+    # First sentence of every turn, last 150 words kept: deterministic stand-in for the LLM summary
+    firsts = [f"{role}: {content.split('. ')[0][:200]}" for role, content in turns]
+    return " ".join((previous + " " + " ".join(firsts)).split()[-150:])
+
+
+def main():
+    rng = random.Random(42)
+    if len(sys.argv) > 1 and sys.argv[1] != "-":
+        with open(sys.argv[1], encoding="utf-8", errors="replace") as f:
+            log_text = f.read()
+    else:
+        log_text = build_log(rng)
+    turns = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    if len(sys.argv) > 4:
+        from agentFactory import get_llm
+        summarize = llm_summarizer(get_llm(sys.argv[3], sys.argv[4], temperature=0))
+    else:
+        summarize = extractive_summarizer
+
+    start = time.perf_counter()
+    memory = ConversationMemory(summarize=summarize, background=False)
+    log = memory.set_log(log_text)
+    parse_ms = (time.perf_counter() - start) * 1000
+
+    # Turn 1: the pasted log; every strategy sends the extracted error list, the transcript also the log itself
+    messages = [{"role": "assistant", "content": "Hello! Paste your error log below."},
+                {"role": "user", "content": log_text}]
+    first = f"ERRORS EXTRACTED FROM THE USER LOG:\n{error_report(extract_errors(log_text))}"
+    rows = [(1, approx_tokens(str(messages)), approx_tokens(first), approx_tokens(first))]
+    answer = canned_answer(rng, "the pasted log")
+    messages.append({"role": "assistant", "content": answer})
+    memory.add("user", f"(pasted a log of {len(log_text.splitlines())} lines, {len(log.errors)} distinct errors)")
+    memory.add("assistant", answer)
+
+    context_ms = []
+    for turn in range(2, turns + 1):
+        question = QUESTIONS[(turn - 2) % len(QUESTIONS)]
+        messages.append({"role": "user", "content": question})
+        replayed = f"CONTEXT (Existing Logs): \n{log_text[:4000]}...\n\nUSER FOLLOW-UP QUESTION: \n{question}"
+        start = time.perf_counter()
+        context = memory.context(question)
+        context_ms.append((time.perf_counter() - start) * 1000)
+        rows.append((turn, approx_tokens(str(messages)), approx_tokens(replayed), approx_tokens(context)))
+        answer = canned_answer(rng, question)
+        messages.append({"role": "assistant", "content": answer})
+        memory.add("user", question)
+        memory.add("assistant", answer)
+
+    print(f"log: {len(log_text.splitlines()):,} lines, {len(log.errors)} distinct errors, "
+          f"{len(log.blocks)} blocks; parsed once in {parse_ms:.0f} ms, "
+          f"context() {sum(context_ms) / max(1, len(context_ms)):.1f} ms/turn")
+    print(f"{'turn':>4} {'transcript':>11} {'log[:4000]':>11} {'memory':>8}   (~tokens sent)")
+    for row in rows:
+        print(f"{row[0]:>4} {row[1]:>11,} {row[2]:>11,} {row[3]:>8,}")
+    for label, pick in (("mean", lambda xs: sum(xs) // len(xs)), ("max", max), ("total", sum)):
+        print(f"{label:>4} " + " ".join(f"{pick([row[i] for row in rows]):>{w},}" for i, w in ((1, 11), (2, 11), (3, 8))))
+    print(memory.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# A throwaway tool cache, so every run measures the same tool traffic
+os.environ.setdefault("TOOL_CACHE_DB", os.path.join(tempfile.mkdtemp(), "tool_cache.db"))
+
+from agentController import TurnController
+from agentFactory import get_agent, get_llm, get_tool_agent, get_tools, use_tool_backend
+from errorExtractor import error_report, extract_errors
+from offlineTools import CORPUS_PATH
+from planExecute import run_plan_execute
+from toolCache import TOOL_CACHE
+
+# -------------------------
+# Replay benchmark for the agent app modes, with offline tools
+#
+# Usage: python benchAgentReplay.py [provider] [model] [workload.jsonl] [corpus.jsonl]
+#        (defaults: ollama gemma3:1b, built-in workload, tool_corpus.jsonl)
+#        LLM_CASSETTE=agent_cassette.jsonl [LLM_CASSETTE_MODE=replay] python benchAgentReplay.py
+#
+# Tools answer from a recorded corpus (see offlineTools.py; record one with
+# AGENT_TOOL_BACKEND=record while using the apps), so only the LLM touches
+# the network. Each workload line is {"mode": ..., "input": ...}; a turn is
+# run the way the app for that mode runs it, and we report per mode the
+# end-to-end turn latency, LLM calls, tool calls and tokens. Under an LLM
+# cassette (see shared/llmCassette.py) nothing touches the network, replays are
+# deterministic, "model s" is the recorded model time and "overhead s"
+# (turn time - time spent waiting on the model) is our own pipeline's share.
+# The tools* modes run the same inputs on the native tool-calling runtime
+# (toolCallingAgent.py) instead of ReAct, for LLM calls and time per answer;
+# they are skipped when the model has no tool calling.
+# -------------------------
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "jenkins_Analysis")
+
+MODES = {
+    # mode: (apps, tool keys)
+    "react": ("app.py / app_allMode.py", ("wikipedia", "arxiv", "search")),
+    "react-qa": ("app_AllQA.py", ("stackoverflow", "github", "youtube")),
+    "react-log": ("app4.py / app5.py ReAct", ("search_top3",)),
+    "planner": ("app5.py planner", ("search_top3",)),
+    "tools": ("app.py / app_allMode.py", ("wikipedia", "arxiv", "search")),
+    "tools-qa": ("app_AllQA.py", ("stackoverflow", "github", "youtube")),
+    "tools-log": ("app4.py / app5.py", ("search_top3",)),
+}
+
+SAMPLE_LOG = """2024-05-01 10:00:01,123 ERROR [main] c.e.LoginTest - org.openqa.selenium.NoSuchElementException: no such element: Unable to locate element: {"method":"css selector","selector":"#login"}
+    at org.openqa.selenium.remote.RemoteWebDriver.findElement(RemoteWebDriver.java:123)
+2024-05-01 10:00:04,500 ERROR [pool-2] c.e.Db - java.sql.SQLTransientConnectionException: HikariPool-1 - Connection is not available, request timed out after 30000ms.
+2024-05-01 10:00:09,020 ERROR [main] c.e.Api - io.restassured.internal.http.HttpResponseException: Bad Gateway
+"""
+
+
+def default_workload():
+    with open(os.path.join(LOG_DIR, "jenkins.log"), encoding="utf-8") as f:
+        jenkins_log = f.read()
+    workload = [
+        {"mode": "react", "input": "What is a flaky test and how do teams usually quarantine them?"},
+        {"mode": "react", "input": "Find a recent paper on automated test repair for web UI tests."},
+        {"mode": "react-qa", "input": "java.net.ConnectException: Connection refused when Jenkins connects to the database"},
+        {"mode": "react-qa", "input": "How to install Appium on Windows tutorial"},
+        {"mode": "react-log", "input": jenkins_log},
+        {"mode": "react-log", "input": SAMPLE_LOG},
+        {"mode": "planner", "input": jenkins_log},
+        {"mode": "planner", "input": SAMPLE_LOG},
+    ]
+    # The same ReAct turns on the tool-calling runtime
+    return workload + [
+        {"mode": turn["mode"].replace("react", "tools"), "input": turn["input"]}
+        for turn in workload if turn["mode"].startswith("react")
+    ]
+
+
+def react_input(mode: str, text: str) -> str:
+    if not mode.endswith("-log"):
+        return text
+    errors = extract_errors(text)
+    return f"ERRORS EXTRACTED FROM THE USER LOG:\n{error_report(errors)}" if errors else f"USER ERROR LOG:\n{text[:5000]}"
+
+
+def run_turn(llm, mode: str, text: str):
+    """Returns (seconds, llm_calls, tool_calls, tokens, stopped, (model, waited) seconds or None)."""
+    controller = TurnController()
+    tools_before = sum(TOOL_CACHE.counts.values())
+    model_before = (llm.model_seconds, llm.waited_seconds) if hasattr(llm, "model_seconds") else None
+    start = time.perf_counter()
+    if mode == "planner":
+        search, = get_tools(MODES[mode][1])
+        run_plan_execute(llm.with_config(callbacks=[controller]), search.run, text)
+    elif mode.startswith("tools"):
+        agent = get_tool_agent(llm, MODES[mode][1])
+        if agent is None:
+            raise NotImplementedError("this model has no tool calling")
+        agent.run(react_input(mode, text), callbacks=[controller])
+    else:
+        agent = get_agent(llm, MODES[mode][1], handle_parsing_errors=True, max_iterations=8)
+        agent.run(react_input(mode, text), callbacks=[controller])
+    seconds = time.perf_counter() - start
+    tool_calls = sum(TOOL_CACHE.counts.values()) - tools_before
+    model_seconds = None if model_before is None else (
+        llm.model_seconds - model_before[0], llm.waited_seconds - model_before[1]
+    )
+    return seconds, controller.llm_calls, tool_calls, controller.tokens, controller.stopped, model_seconds
+
+
+def main():
+    provider = sys.argv[1] if len(sys.argv) > 1 else "ollama"
+    model = sys.argv[2] if len(sys.argv) > 2 else "gemma3:1b"
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], encoding="utf-8") as f:
+            workload = [json.loads(line) for line in f if line.strip()]
+    else:
+        workload = default_workload()
+    corpus = use_tool_backend("offline", sys.argv[4] if len(sys.argv) > 4 else CORPUS_PATH)
+    if not len(corpus):
+        print(f"Warning: tool corpus {corpus.path} is empty; every tool call returns 'no result'.")
+
+    if provider == "groq":
+        llm = get_llm("groq", model, api_key=os.getenv("GROQ_API_KEY", ""))
+    else:
+        llm = get_llm(provider, model, temperature=0)
+
+    results = {mode: [] for mode in MODES}
+    for i, turn in enumerate(workload, 1):
+        try:
+            result = run_turn(llm, turn["mode"], turn["input"])
+        except Exception as e:
+            print(f"turn {i} ({turn['mode']}) failed: {e}")
+            continue
+        results[turn["mode"]].append(result)
+        print(f"turn {i:>3} {turn['mode']:<10} {result[0]:6.2f}s  llm={result[1]} tools={result[2]} "
+              f"tokens~{result[3]:,}" + (f"  stopped: {result[4]}" if result[4] else ""))
+
+    print(f"\n{provider}:{model}, {len(workload)} turns; {corpus.summary()}")
+    if hasattr(llm, "summary"):
+        print(llm.summary())
+    print(f"{'mode':<10} {'app':<24} {'turns':>5} {'mean s':>7} {'p50 s':>6} {'max s':>6} {'model s':>7} "
+          f"{'overhead s':>10} {'LLM/turn':>8} {'tools/turn':>10} {'tokens/turn':>11} {'stopped':>7}")
+    for mode, rows in results.items():
+        if not rows:
+            continue
+        seconds = [row[0] for row in rows]
+        if rows[0][5] is None:
+            model_s = overhead_s = "-"
+        else:
+            model_s = f"{statistics.mean(row[5][0] for row in rows):.2f}"
+            overhead_s = f"{statistics.mean(row[0] - row[5][1] for row in rows):.3f}"
+        print(
+            f"{mode:<10} {MODES[mode][0]:<24} {len(rows):>5} {statistics.mean(seconds):>7.2f} "
+            f"{statistics.median(seconds):>6.2f} {max(seconds):>6.2f} {model_s:>7} {overhead_s:>10} "
+            f"{statistics.mean(row[1] for row in rows):>8.1f} {statistics.mean(row[2] for row in rows):>10.1f} "
+            f"{statistics.mean(row[3] for row in rows):>11,.0f} {sum(1 for row in rows if row[4]):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
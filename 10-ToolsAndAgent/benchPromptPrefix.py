@@ -0,0 +1,107 @@
+import json
+import os
+import random
+import sys
+import tempfile
+
+os.environ.setdefault("TOOL_CACHE_DB", os.path.join(tempfile.mkdtemp(), "tool_cache.db"))
+
+from langchain.agents import ZeroShotAgent
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from agentFactory import get_tools
+from promptPrefix import MODE_PROMPTS, PrefixCacheMeter, render
+from toolCallingAgent import SYSTEM_PROMPT, tool_schema
+
+# -------------------------
+# Cacheable prompt prefix in app_allMode.py: instructions in the input vs compiled per mode
+#
+# Usage: python benchPromptPrefix.py [turns] [steps per turn]   (defaults: 30, 3)
+#
+# Replays a session of failure reports across the three modes (users mostly
+# stay in one mode) and builds every LLM prompt each runtime would send:
+# ReAct steps (the scratchpad grows by one Thought/Action/Observation per
+# step) and tool-calling steps (one tool call + result per step). For the old
+# layout (mode instructions glued onto the user input), the new one
+# (promptPrefix.MODE_PROMPTS) and, for tool calling, the instructions as a
+# mode-specific system message, PrefixCacheMeter reports the share of prompt
+# tokens that repeat the start of a recent prompt: with a 1-entry history
+# (one cached sequence, like an Ollama model kept alive) and an 8-entry one
+# (a provider prompt cache). No LLM is called.
+# -------------------------
+
+TOOL_KEYS = ("wikipedia", "arxiv", "search")
+
+FAILURES = [
+    "org.openqa.selenium.NoSuchElementException: Unable to locate element: #login-button",
+    "java.sql.SQLTransientConnectionException: HikariPool-1 - Connection is not available, request timed out after 30000ms",
+    "AssertionError: expected status 200 but was 502 in OrdersApiTest.createOrder",
+    "TimeoutException: Topic orders not present in metadata after 60000 ms",
+    "java.lang.OutOfMemoryError: Java heap space during nightly regression suite",
+    "npm ERR! code ERESOLVE unable to resolve dependency tree",
+]
+
+
+def session(rng: random.Random, turns: int):
+    modes = list(MODE_PROMPTS)
+    mode = rng.choice(modes)
+    for _ in range(turns):
+        if rng.random() < 0.3:
+            mode = rng.choice(modes)
+        yield mode, f"{rng.choice(FAILURES)} (build #{rng.randint(100, 999)})"
+
+
+def react_prompts(template, user_input: str, steps: int):
+    scratchpad = ""
+    for step in range(steps):
+        yield template.format(input=user_input, agent_scratchpad=scratchpad)
+        scratchpad += (
+            f" I should search for this error.\nAction: Search\nAction Input: {user_input[:60]}\n"
+            f"Observation: result {step} for {user_input[:40]}\nThought:"
+        )
+
+
+def tool_prompts(system: str, question: str, tools: list, steps: int):
+    messages = [SystemMessage(content=system), HumanMessage(content=question)]
+    for step in range(steps):
+        yield render(messages, tools)
+        call = {"name": "Search", "args": {"query": question[:60]}, "id": f"call_{step}", "type": "tool_call"}
+        messages += [AIMessage(content="", tool_calls=[call]),
+                     ToolMessage(content=f"result {step} for {question[:40]}", tool_call_id=f"call_{step}")]
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    tools = get_tools(TOOL_KEYS)
+    schemas = [tool_schema(tool.name, tool.description) for tool in tools]
+    stock = ZeroShotAgent.create_prompt(tools)
+    per_mode = {mode: ZeroShotAgent.create_prompt(tools, **prompt.react_agent_kwargs) for mode, prompt in MODE_PROMPTS.items()}
+
+    layouts = [("inline", "react"), ("prefix", "react"), ("inline", "tools"), ("prefix", "tools"), ("system", "tools")]
+    meters = {(layout, runtime, history): PrefixCacheMeter(history) for layout, runtime in layouts for history in (1, 8)}
+    for mode, failure in session(random.Random(42), turns):
+        prompt = MODE_PROMPTS[mode]
+        inline_input = f"{prompt.instructions}\n\nUser failure details:\n{failure}"  # old app_allMode
+        built = {
+            ("inline", "react"): list(react_prompts(stock, inline_input, steps)),
+            ("prefix", "react"): list(react_prompts(per_mode[mode], failure, steps)),
+            ("inline", "tools"): list(tool_prompts(SYSTEM_PROMPT, inline_input, schemas, steps)),
+            ("prefix", "tools"): list(tool_prompts(SYSTEM_PROMPT, prompt.tool_question(failure), schemas, steps)),
+            ("system", "tools"): list(tool_prompts(f"{SYSTEM_PROMPT}\n\n{prompt.instructions}",
+                                                  f"User failure details:\n{failure}", schemas, steps)),
+        }
+        for (layout, runtime, history), meter in meters.items():
+            for text in built[(layout, runtime)]:
+                meter.observe(text)
+
+    print(f"{turns} turns x {steps} LLM calls, {len(MODE_PROMPTS)} modes; "
+          f"compiled ReAct templates: {json.dumps({m[:10]: len(t.template) for m, t in per_mode.items()})} chars")
+    print(f"{'layout':<8} {'runtime':<8} {'history':>7} {'prompt tok/call':>15} {'prefix share':>12} {'uncached tok/call':>17}")
+    for (layout, runtime, history), meter in meters.items():
+        print(f"{layout:<8} {runtime:<8} {history:>7} {meter.prompt_tokens / meter.calls:>15,.0f} {meter.share():>12.0%} "
+              f"{(meter.prompt_tokens - meter.prefix_tokens) / meter.calls:>17,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import re
+from collections import OrderedDict
+from typing import List, Optional
+
+# -------------------------
+# Deterministic error extraction for pasted logs
+#
+# app4/app5 used to cut the log to the first 1000/5000 chars and ask a small
+# local model to find and count the errors, which is slow and misses anything
+# after the cut. Instead, one pass over the whole log:
+# - keeps lines that look like errors (Error/Exception/Failed/Denied/...),
+#   skipping stack frames, test-run / "0 errors" summaries and build footers
+# - reduces each to a signature: exception class + message with timestamps,
+#   ids, numbers and quoted values masked, and no timestamp/level/thread prefix;
+#   error codes keep their digits (ORA-00942, E11000, HRESULT 0x80070005)
+# - dedupes by signature, counting occurrences and keeping the first line no.
+# - an error line followed by the exception it logged (on the next line, or
+#   after a Python traceback) is one error, named by the exception
+# - attaches a following "Caused by:" to the error it explains
+# The agent then gets only the compact list, and "Total Errors Found" is the
+# exact number of distinct signatures.
+# -------------------------
+
+ERROR_LINE = re.compile(
+    r"\b(?:error|errors|exception|fail|failed|failure|fatal|denied|refused|timed out|panic|segmentation fault)\b"
+    r"|\w(?:Error|Exception)\b",
+    re.IGNORECASE,
+)
+# Cheap substring test before ERROR_LINE: most log lines contain none of these
+KEYWORDS = ("error", "exception", "fail", "fatal", "denied", "refused", "timed out", "panic", "segmentation fault")
+NOT_AN_ERROR = re.compile(
+    r"\b(?:0|no|zero) (?:errors?|failures?|exceptions?)\b|\b(?:errors?|failures?|failed)\s*[:=]\s*0\b"
+    r"|^(?:finished: failure|build failed|build failure|tests run:)",
+    re.IGNORECASE,
+)
+STACK_FRAME = re.compile(r"^\s*(?:at |File \"|\.\.\. \d+ more|\^|Traceback \(most recent call last\))")
+CAUSED_BY = re.compile(r"^\s*Caused by:\s*", re.IGNORECASE)
+EXCEPTION = re.compile(r"\b((?:[\w$]+\.)*([A-Z][\w$]*(?:Error|Exception|Fault)))\b(?::\s*(.*))?")
+
+PREFIX = re.compile(
+    r"^(?:\s*(?:\[[^\]]*\]"                                         # [thread] / [logger] / [2024-...]
+    r"|\d{4}[-/.]\d{2}[-/.]\d{2}(?:[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+    r"|\d{2}:\d{2}:\d{2}(?:[.,]\d+)?"
+    r"|[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2}"                    # syslog
+    r"|(?:TRACE|DEBUG|INFO|NOTICE|WARN|WARNING|ERROR|SEVERE|FATAL|CRITICAL)\b:?"
+    r"|-|\|))+\s*"
+)
+STAMPS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?Z?"), "<ts>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+]
+# Kept as they are: capitals + digits, optionally joined by -/: (ORA-00942, SQLSTATE:08001, E11000,
+# CS0246), and 8-digit HRESULT / NTSTATUS hex (0x80070005, 0xC0000005)
+CODE = re.compile(r"\b[A-Z][A-Z0-9_]*[-:]?\d+\b|\b0x[89a-fA-F][0-9a-fA-F]{7}\b")
+VOLATILE = [
+    (re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-f]{12,}\b"), "<hex>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "'<s>'"),
+    (re.compile(r"\b\d+\b"), "<n>"),
+]
+PLACEHOLDER = re.compile(r"'?<(?:ts|uuid|hex|ip|s|n)>'?")
+
+
+def _mask_volatile(text: str) -> str:
+    for pattern, placeholder in VOLATILE:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+def mask(text: str) -> str:
+    for pattern, placeholder in STAMPS:
+        text = pattern.sub(placeholder, text)
+    parts, last = [], 0
+    for match in CODE.finditer(text):
+        parts += [_mask_volatile(text[last:match.start()]), match.group()]
+        last = match.end()
+    parts.append(_mask_volatile(text[last:]))
+    return " ".join("".join(parts).split())
+
+
+def signature(line: str, max_chars: int = 160) -> str:
+    """Stable text for one error line: 'ExceptionClass: masked message' or the masked line."""
+    line = CAUSED_BY.sub("", line)
+    match = EXCEPTION.search(line)
+    if match:
+        # Short class name: the same exception logged with/without its package is one error
+        text = match.group(2) + (f": {match.group(3)}" if match.group(3) else "")
+    else:
+        text = PREFIX.sub("", line)
+    return mask(text)[:max_chars]
+
+
+class LogError:
+    """One distinct error signature and where/how often it occurred."""
+
+    def __init__(self, text: str, first_line: int):
+        self.text = text
+        self.count = 1
+        self.first_line = first_line
+        self.cause: Optional[str] = None
+
+    def label(self) -> str:
+        return f"{self.text} (caused by: {self.cause})" if self.cause else self.text
+
+    def query(self, max_chars: int = 120) -> str:
+        """Web search query: the root cause if known, without masked placeholders."""
+        words = PLACEHOLDER.sub(" ", self.cause or self.text).split()
+        return " ".join(word for word in words if any(ch.isalnum() for ch in word))[:max_chars]
+
+
+def extract_errors(log_text: str, max_chars: int = 160) -> List[LogError]:
+    """Distinct errors in first-seen order."""
+    errors = OrderedDict()
+    current = None  # last error, while only its stack trace follows
+    pending = None  # (signature, line no.) of an error line without exception; the exception may follow
+
+    def count(text: str, number: int) -> LogError:
+        key = text.lower()
+        if key in errors:
+            errors[key].count += 1
+        else:
+            errors[key] = LogError(text, number)
+        return errors[key]
+
+    for number, line in enumerate(log_text.splitlines(), 1):
+        if not line.strip() or STACK_FRAME.match(line):
+            continue
+        stripped = line.strip()
+        if pending is not None:
+            text, first = pending
+            pending = None
+            if EXCEPTION.match(stripped):
+                # "ERROR ... - Query failed" + "java.sql.SQLException: ORA-00942: ...": one error
+                current = count(signature(stripped, max_chars), first)
+                continue
+            current = count(text, first)
+        if CAUSED_BY.match(line):
+            if current is not None and current.cause is None:
+                current.cause = signature(line, max_chars)
+            continue
+        lowered = stripped.lower()
+        if not any(keyword in lowered for keyword in KEYWORDS) or not ERROR_LINE.search(stripped) or NOT_AN_ERROR.search(PREFIX.sub("", stripped)):
+            current = None
+            continue
+        text = signature(stripped, max_chars)
+        if EXCEPTION.search(stripped):
+            current = count(text, number)
+        else:
+            pending, current = (text, number), None
+    if pending is not None:
+        count(*pending)
+    return list(errors.values())
+
+
+def error_report(errors: List[LogError], max_errors: int = 20) -> str:
+    """Compact list for the prompt; the total always counts every distinct error."""
+    if not errors:
+        return "Total Errors Found: 0"
+    lines = [f"Total Errors Found: {len(errors)} distinct ({sum(e.count for e in errors)} occurrences)"]
+    for i, error in enumerate(errors[:max_errors], 1):
+        lines.append(f"{i}. [line {error.first_line}, x{error.count}] {error.label()}")
+    if len(errors) > max_errors:
+        lines.append(f"... and {len(errors) - max_errors} more")
+    return "\n".join(lines)
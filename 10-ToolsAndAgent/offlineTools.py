@@ -0,0 +1,112 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from typing import Callable, Collection
+
+from toolCache import DB_PATH, normalize_query
+
+# -------------------------
+# Offline tool backends: recorded responses + local full-text index
+#
+# The agent apps call DuckDuckGo, Wikipedia, Arxiv, StackExchange and
+# YouTube, so they cannot be benchmarked or regression-tested without
+# network. A ToolCorpus is a JSONL file of {"tool", "query", "result"}
+# records (tool = the Tool name the agent sees, e.g. "Search"):
+# - a query recorded before is answered with its recorded result
+#   (same normalisation as the tool cache)
+# - any other query goes to an in-memory SQLite FTS5 index over that
+#   tool's recorded queries and results, and gets the best match
+# - no match returns the tool's usual "no result" text
+# A corpus can be recorded from live runs (AGENT_TOOL_BACKEND=record) or
+# seeded from the tool cache database with export_tool_cache().
+# agentFactory picks the backend from AGENT_TOOL_BACKEND:
+# live (default) | record | offline.
+# -------------------------
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_PATH = os.getenv("TOOL_CORPUS", os.path.join(BASE_DIR, "tool_corpus.jsonl"))
+TOOL_BACKENDS = ("live", "record", "offline")
+
+
+def fts_query(text: str, stopwords: Collection[str] = ()) -> str:
+    # Quoted terms OR-ed together: FTS5 syntax characters in log lines cannot break the query.
+    # Also used by agentMemory.LogContext, with stopwords (lowercase) left out
+    words = "".join(ch if ch.isalnum() else " " for ch in text).split()
+    terms = {word for word in words if len(word) > 1 and word.lower() not in stopwords}
+    return " OR ".join(f'"{term}"' for term in sorted(terms))
+
+
+class ToolCorpus:
+    """Recorded tool results, answered by exact query or by full-text match."""
+
+    def __init__(self, path: str = CORPUS_PATH):
+        self.path = path
+        self.exact = {}
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        self._db.execute("CREATE VIRTUAL TABLE records USING fts5(tool UNINDEXED, query, result)")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._add(record["tool"], record["query"], record["result"])
+
+    def __len__(self):
+        return len(self.exact)
+
+    def _add(self, tool: str, query: str, result: str):
+        key = (tool, normalize_query(query))
+        if key not in self.exact:
+            self._db.execute("INSERT INTO records VALUES (?, ?, ?)", (tool, query, result))
+        self.exact[key] = result
+
+    def record(self, tool: str, query: str, result: str):
+        with self._lock:
+            self._add(tool, query, result)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"tool": tool, "query": query, "result": result}) + "\n")
+
+    def lookup(self, tool: str, query: str) -> str:
+        with self._lock:
+            result = self.exact.get((tool, normalize_query(query)))
+            if result is not None:
+                self.counts["exact"] += 1
+                return result
+            match = fts_query(query)
+            row = self._db.execute(
+                "SELECT result FROM records WHERE records MATCH ? AND tool = ? ORDER BY rank LIMIT 1",
+                (match, tool),
+            ).fetchone() if match else None
+            self.counts["indexed" if row else "missing"] += 1
+            return row[0] if row else f"No good {tool} search result was found"
+
+    def offline(self, tool: str) -> Callable[[str], str]:
+        return lambda query: self.lookup(tool, query)
+
+    def recording(self, tool: str, func: Callable[[str], str]) -> Callable[[str], str]:
+        def run(query: str) -> str:
+            result = func(query)
+            self.record(tool, query, result)
+            return result
+        return run
+
+    def summary(self) -> str:
+        total = sum(self.counts.values())
+        return (
+            f"Offline tools: {len(self)} recorded queries; {total} lookups "
+            f"({self.counts['exact']} exact, {self.counts['indexed']} full-text, {self.counts['missing']} no match)"
+        )
+
+
+def export_tool_cache(db_path: str = DB_PATH, corpus_path: str = CORPUS_PATH) -> int:
+    """Append every positive tool cache entry to a corpus; returns how many were written."""
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT tool, query_key, result FROM tool_results WHERE negative = 0").fetchall()
+    with open(corpus_path, "a", encoding="utf-8") as f:
+        for tool, query, result in rows:
+            f.write(json.dumps({"tool": tool, "query": query, "result": result}) + "\n")
+    return len(rows)
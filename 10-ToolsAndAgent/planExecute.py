@@ -0,0 +1,114 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from errorExtractor import LogError, extract_errors
+
+# -------------------------
+# Planner / executor for multi-error log analysis
+#
+# The ReAct agent makes one LLM round trip per tool call, so a log with six
+# errors costs six-plus sequential LLM steps. Here instead:
+#   1. plan:       the distinct errors are extracted locally from the whole
+#                  log (errorExtractor.py); only if none are recognised does
+#                  one LLM call list them as search queries
+#   2. execute:    all searches run concurrently (capped at max_workers)
+#   3. synthesise: one LLM call writes the final table from the results
+# run_plan_execute returns the answer plus per-phase timings for the UI.
+# -------------------------
+
+PLAN_PROMPT = """You are an expert SRE. List EVERY distinct error in the log below
+(look for 'Error', 'Exception', 'Failed', 'Denied'). Merge repeats of the same error.
+Output one line per error: a short web search query for that error (exception name +
+key message, no timestamps or ids). Output ONLY the lines, nothing else.
+
+LOG:
+{log}"""
+
+SYNTHESIS_PROMPT = """You are an expert SRE. Below are the distinct errors found in a log,
+each with web search results. Write the final answer in EXACTLY this Markdown format.
+Only cite URLs that appear in the search results.
+
+**Total Errors Found:** {count}
+
+**Analysis Table:**
+| Error | Solution | Probable Cause |
+| :--- | :--- | :--- |
+| [Error 1 Name] | [Fix Solution 1] | [Cause] |
+
+**References:** [URLs from the search results]
+
+ERRORS AND SEARCH RESULTS:
+{findings}"""
+
+LIST_PREFIX = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def parse_plan(text: str, max_errors: int = 8) -> List[str]:
+    queries, seen = [], set()
+    for line in text.splitlines():
+        query = LIST_PREFIX.sub("", line).strip().strip("\"'`")
+        if query and query.lower() not in seen:
+            seen.add(query.lower())
+            queries.append(query)
+    return queries[:max_errors]
+
+
+def search_all(search: Callable[[str], str], queries: List[str], max_workers: int = 4) -> List[Tuple[str, str]]:
+    def run(query: str) -> str:
+        try:
+            return search(query)
+        except Exception as e:
+            return f"Search failed: {e}"
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as pool:
+        return list(zip(queries, pool.map(run, queries)))
+
+
+def run_plan_execute(llm, search: Callable[[str], str], log_text: str, max_workers: int = 4,
+                     max_errors: int = 8, max_result_chars: int = 1200, max_log_chars: int = 5000,
+                     errors: Optional[List[LogError]] = None):
+    """Returns (answer, queries, timings) with timings in seconds per phase.
+
+    Pass `errors` when the log was already parsed (e.g. by agentMemory.LogContext).
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    if errors is None:
+        errors = extract_errors(log_text)
+    if errors:
+        # Exact count over the whole log, even when only the first max_errors are searched
+        count = len(errors)
+        labels = [f"x{error.count} {error.label()}" for error in errors[:max_errors]]
+        queries = [error.query() for error in errors[:max_errors]]
+    else:
+        plan = llm.invoke(PLAN_PROMPT.format(log=log_text[:max_log_chars]))
+        queries = parse_plan(plan.content, max_errors)
+        count, labels = len(queries), queries
+    timings["plan"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = search_all(search, queries, max_workers) if queries else []
+    timings["search"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    findings = "\n\n".join(
+        f"ERROR {i}: {error}\nSEARCH RESULTS: {result[:max_result_chars]}"
+        for i, (error, (query, result)) in enumerate(zip(labels, results), 1)
+    ) or "No errors found."
+    if count > len(results):
+        findings += f"\n\n({count - len(results)} more distinct errors were found but not searched.)"
+    answer = llm.invoke(SYNTHESIS_PROMPT.format(count=count, findings=findings))
+    timings["synthesis"] = time.perf_counter() - start
+
+    return answer.content, queries, timings
+
+
+def timings_summary(timings: dict, n_searches: int, max_workers: int) -> str:
+    return (
+        f"Plan {timings['plan']:.1f}s · {n_searches} searches "
+        f"({min(max_workers, max(n_searches, 1))} parallel) {timings['search']:.1f}s · "
+        f"synthesis {timings['synthesis']:.1f}s · total {sum(timings.values()):.1f}s"
+    )
@@ -0,0 +1,177 @@
+import json
+import os
+import threading
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+
+from agentController import approx_tokens
+
+# -------------------------
+# Per-mode prompt prefixes for app_allMode.py, and how much of them is reused
+#
+# app_allMode used to rebuild system_prompt(mode) on every rerun and glue it
+# onto the user's text. Here each mode is compiled once, at import. Prefix
+# caches (Groq prompt caching, Ollama's KV cache while the model is kept
+# alive) reuse the longest common token prefix, so the order is: what all
+# modes share, then the mode's instructions, then the user's text:
+# - ReAct: the instructions go into the agent template itself (suffix, after
+#   the tools and format, right before "Question:"), so get_agent(mode=...)
+#   keeps one executor and one compiled template per mode
+# - tool calling: the generic system message and the tool schemas stay
+#   first; the instructions open the question (tool_prefix). As the system
+#   message they came before the tool schemas, and a mode switch then
+#   re-sent those too (benchPromptPrefix.py: 87% vs 91% shared)
+# PrefixCacheMeter is a callback that measures it: for each LLM call, the
+# share of the prompt equal to the start of a recent prompt (~4 chars per
+# token), plus the cached input tokens the provider reports, if it does.
+# -------------------------
+
+DEFAULT_INSTRUCTIONS = "You are a helpful assistant for debugging software and test failures."
+
+MODE_INSTRUCTIONS: Dict[str, str] = {
+    "QA – Fix my test failure": (
+        "You are a senior QA automation engineer.\n"
+        "User will paste test failures, logs, or stack traces.\n\n"
+        "Your job:\n"
+        "1. Explain the failure in simple, clear language.\n"
+        "2. Identify the most likely root cause.\n"
+        "3. Suggest 3 concrete fixes the QA can try now.\n"
+        "4. Say whether this looks like a test issue, environment issue, or product bug.\n\n"
+        "Be practical and specific. Avoid generic theory."
+    ),
+    "QA Manager – Debug team failures": (
+        "You are a QA Manager assistant.\n"
+        "User will paste failures from multiple tests or builds.\n\n"
+        "Your job:\n"
+        "1. Classify each failure (flaky test, environment, data, product bug, infra).\n"
+        "2. Identify any patterns across failures.\n"
+        "3. Recommend next owner (QA, Dev, Infra/DevOps).\n"
+        "4. Suggest preventive actions to avoid repeat failures.\n\n"
+        "Focus on delivery risk, efficiency, and team-level insights."
+    ),
+    "Company – RCA for failures": (
+        "You are an incident RCA assistant.\n"
+        "User will paste production or test failure details.\n\n"
+        "Your job:\n"
+        "1. Summarize the incident in business-friendly language.\n"
+        "2. Identify primary and contributing technical causes.\n"
+        "3. Suggest corrective and preventive actions (CAPA).\n"
+        "4. Highlight risk if unresolved.\n\n"
+        "Keep it concise and suitable for RCA / postmortem documents."
+    ),
+}
+
+# Same ending as the stock ZERO_SHOT_REACT_DESCRIPTION suffix, with the mode instructions before the question
+REACT_SUFFIX = "{instructions}\n\nBegin!\n\nQuestion: User failure details:\n{{input}}\nThought:{{agent_scratchpad}}"
+
+
+class ModePrompt(NamedTuple):
+    instructions: str
+    react_agent_kwargs: dict  # get_agent(..., agent_kwargs=...)
+    tool_prefix: str  # start of the tool-calling agent's question
+
+    def tool_question(self, details: str) -> str:
+        return self.tool_prefix + details
+
+
+def compile_mode_prompt(instructions: str) -> ModePrompt:
+    escaped = instructions.replace("{", "{{").replace("}", "}}")
+    return ModePrompt(
+        instructions,
+        {"suffix": REACT_SUFFIX.format(instructions=escaped)},
+        f"{instructions}\n\nUser failure details:\n",
+    )
+
+
+MODE_PROMPTS: Dict[str, ModePrompt] = {mode: compile_mode_prompt(text) for mode, text in MODE_INSTRUCTIONS.items()}
+DEFAULT_PROMPT = compile_mode_prompt(DEFAULT_INSTRUCTIONS)
+
+
+def mode_prompt(mode: str) -> ModePrompt:
+    return MODE_PROMPTS.get(mode, DEFAULT_PROMPT)
+
+
+def render(messages: List[BaseMessage], tools: Optional[list] = None) -> str:
+    """Chat request as text, in the order providers lay it out: system, tool schemas, the rest."""
+    parts = [f"{m.type}: {m.content}" for m in messages if m.type == "system"]
+    if tools:
+        parts.append(json.dumps(tools, sort_keys=True))
+    parts += [f"{m.type}: {m.content}" + (json.dumps(getattr(m, "tool_calls", None)) if getattr(m, "tool_calls", None) else "")
+              for m in messages if m.type != "system"]
+    return "\n".join(parts)
+
+
+class PrefixCacheMeter(BaseCallbackHandler):
+    """Share of prompt tokens that repeat the start of one of the last `history` prompts."""
+
+    def __init__(self, history: int = 8):
+        self.recent = deque(maxlen=history)
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.prefix_tokens = 0
+        self.reported_input = 0  # provider usage, when it reports cached tokens
+        self.reported_cached = 0
+        self._lock = threading.Lock()
+
+    def observe(self, prompt: str) -> int:
+        """Record one prompt; returns its ~tokens shared with a recent prompt's start."""
+        with self._lock:
+            shared = max((len(os.path.commonprefix([prompt, previous])) for previous in self.recent), default=0)
+            self.recent.append(prompt)
+            self.calls += 1
+            self.prompt_tokens += approx_tokens(prompt)
+            self.prefix_tokens += shared // 4
+        return shared // 4
+
+    def share(self) -> float:
+        return self.prefix_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        for prompt in prompts:
+            self.observe(prompt)
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        tools = (kwargs.get("invocation_params") or {}).get("tools")
+        for batch in messages:
+            self.observe(render(batch, tools))
+
+    def on_llm_end(self, response, **kwargs):
+        # Only providers that report cache reads count here (usage_metadata, or Groq/OpenAI-style
+        # token_usage.prompt_tokens_details.cached_tokens); others have no provider figure
+        input_tokens, cached, reported = 0, 0, False
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                details = usage.get("input_token_details") or {}
+                if "cache_read" in details:
+                    reported = True
+                    input_tokens += usage.get("input_tokens", 0)
+                    cached += details["cache_read"]
+        if not reported:
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            details = usage.get("prompt_tokens_details") or {}
+            if "cached_tokens" in details:
+                reported = True
+                input_tokens, cached = usage.get("prompt_tokens", 0), details["cached_tokens"] or 0
+        if reported:
+            with self._lock:
+                self.reported_input += input_tokens
+                self.reported_cached += cached
+
+    def summary(self) -> str:
+        if not self.calls:
+            return "Prompt prefix: no LLM calls yet"
+        text = (
+            f"Prompt prefix: ~{self.share():.0%} of ~{self.prompt_tokens:,} prompt tokens repeat a recent "
+            f"prompt's start ({self.calls} LLM calls)"
+        )
+        if self.reported_input:
+            text += f" · provider-cached {self.reported_cached / self.reported_input:.0%}"
+        return text
+
+
+# Shared by every session of the app, like the provider's cache
+PREFIX_METER = PrefixCacheMeter()
@@ -0,0 +1,179 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable
+
+from langchain.agents import Tool
+
+# -------------------------
+# Cache for web tool results (DuckDuckGo, Wikipedia, Arxiv, StackExchange)
+#
+# ReAct agents search the same error strings over and over, within a turn
+# and across sessions. Results are keyed by (tool name, normalised query)
+# and stored in SQLite (WAL), so every app process and restart shares them:
+# - normal results live for `ttl_seconds` (default 1 day)
+# - "no results" answers are cached as negative entries for
+#   `negative_ttl_seconds` (default 10 min), so an empty search is not
+#   retried on every ReAct step
+# - tool failures (timeouts, rate limits, network errors) are returned to
+#   the agent as text but never stored, so the next call retries them
+# - concurrent identical queries (several sessions, or parallel fan-out)
+#   are single-flighted: one caller runs the tool, the others wait for it.
+# Normalisation lowercases, collapses whitespace and masks timestamps, hex
+# ids and long numbers, so the same error from two runs shares an entry.
+# Error codes are not masked: ora-00942 and ora-12154, or HRESULTs such as
+# 0x80070005, are different searches.
+# -------------------------
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.getenv("TOOL_CACHE_DB", os.path.join(BASE_DIR, "tool_cache.db"))
+
+VOLATILE_PATTERNS = [
+    (re.compile(r"\d{4}-\d{2}-\d{2}[ t]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?z?"), "<ts>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"), "<uuid>"),
+    # Not 8-digit HRESULT / NTSTATUS codes (0x80070005, 0xc0000005)
+    (re.compile(r"\b0x(?![89a-f][0-9a-f]{7}\b)[0-9a-f]+\b"), "<hex>"),
+    # Not the digits of a code such as ora-00942 or sqlstate:08001
+    (re.compile(r"(?<![a-z0-9_][-:])\b\d{5,}\b"), "<n>"),
+]
+NO_RESULT_MARKERS = (
+    "no good wikipedia search result",
+    "no good arxiv result",
+    "no good duckduckgo search result",
+    "no relevant results found",
+    "search result was found",  # "No good <tool> search result was found"
+)
+
+
+class _LeaderInterrupted(Exception):
+    """The caller running a single-flighted search was interrupted before it had a result."""
+
+
+def normalize_query(query: str) -> str:
+    text = " ".join(str(query).lower().split()).strip(" \"'`")
+    for pattern, placeholder in VOLATILE_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+def is_negative(result: str) -> bool:
+    text = str(result).strip().lower()
+    return not text or text == "[]" or any(marker in text for marker in NO_RESULT_MARKERS)
+
+
+class ToolResultCache:
+    """Persistent, TTL'd, single-flight cache in front of string-in/string-out tools."""
+
+    def __init__(self, db_path: str = DB_PATH, ttl_seconds: float = 86400, negative_ttl_seconds: float = 600):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.counts = Counter()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tool_results (
+                    tool TEXT NOT NULL,
+                    query_key TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    negative INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (tool, query_key)
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _load(self, tool: str, key: str):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result, negative, created_at FROM tool_results WHERE tool = ? AND query_key = ?",
+                (tool, key),
+            ).fetchone()
+        if row is None:
+            return None
+        result, negative, created_at = row
+        ttl = self.negative_ttl_seconds if negative else self.ttl_seconds
+        return (result, bool(negative)) if time.time() - created_at <= ttl else None
+
+    def _save(self, tool: str, key: str, result: str, negative: bool):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tool_results (tool, query_key, result, negative, created_at) VALUES (?, ?, ?, ?, ?)",
+                (tool, key, result, int(negative), time.time()),
+            )
+
+    def _record(self, outcome: str):
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def run(self, tool: str, query: str, func: Callable[[str], str]) -> str:
+        key = normalize_query(query)
+        cached = self._load(tool, key)
+        if cached is not None:
+            self._record("negative_hit" if cached[1] else "hit")
+            return cached[0]
+
+        with self._lock:
+            future = self._inflight.get((tool, key))
+            leader = future is None
+            if leader:
+                future = self._inflight[(tool, key)] = Future()
+        if not leader:
+            self._record("coalesced")
+            try:
+                return future.result()
+            except _LeaderInterrupted:
+                # Nothing to share: run (or join) the search again
+                return self.run(tool, query, func)
+
+        self._record("miss")
+        try:
+            try:
+                result = str(func(query))
+            except Exception as e:
+                # Transient failures are shared with the current waiters only, never cached
+                self._record("error")
+                result = f"{tool} search failed: {e}"
+                future.set_result(result)
+                return result
+            future.set_result(result)
+            self._save(tool, key, result, is_negative(result))
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop((tool, key), None)
+            # Waiters must not block forever when the leader is interrupted (a BaseException,
+            # e.g. KeyboardInterrupt or a Streamlit rerun)
+            if not future.done():
+                future.set_exception(_LeaderInterrupted(f"{tool} search was interrupted"))
+
+    def wrap(self, tool) -> Tool:
+        """Same name/description as `tool`, results served through the cache."""
+        return self.wrap_func(tool.name, tool.run, tool.description)
+
+    def wrap_func(self, name: str, func: Callable[[str], str], description: str) -> Tool:
+        return Tool(name=name, description=description, func=lambda query: self.run(name, query, func))
+
+    def summary(self) -> str:
+        served = self.counts["hit"] + self.counts["negative_hit"] + self.counts["coalesced"]
+        total = served + self.counts["miss"]
+        if not total:
+            return "Tool cache: no lookups yet"
+        return (
+            f"Tool cache: {served}/{total} served from cache ({served / total:.0%}; "
+            f"{self.counts['negative_hit']} negative, {self.counts['coalesced']} coalesced, "
+            f"{self.counts['error']} failed)"
+        )
+
+
+TOOL_CACHE = ToolResultCache()
@@ -0,0 +1,204 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from langchain_core.agents import AgentAction
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from agentController import TurnController
+
+# -------------------------
+# Native tool-calling agent runtime
+#
+# The ReAct agents make the model write "Thought / Action / Action Input"
+# text that is parsed back with regexes: every step re-sends that
+# scaffolding, small models often break the format (one more round trip
+# per parsing-error retry), and only one tool runs per step. Here the model
+# gets the tools as structured schemas (bind_tools; ChatGroq and
+# langchain_ollama's ChatOllama support it) and answers with tool calls:
+# - all tool calls of one step run in parallel (thread pool), and their
+#   results go back as ToolMessages in one round trip
+# - every model call is streamed; on_token gets the text as it arrives, so
+#   the final answer is shown while it is written
+# - a TurnController among the callbacks is consulted before every step
+#   (deadline, token budget, repeated calls), as by ControlledAgentExecutor;
+#   when it stops the turn, or after max_steps, the model answers once more
+#   without tools from the results so far
+# Models without tool calling (langchain_community's ChatOllama) are
+# reported by supports_tool_calling(), and the apps keep the ReAct agent.
+# langchain_ollama binds tools for any model; the server rejects the request
+# ("does not support tools"), so run() raises ToolCallingUnsupported, the
+# agent is marked unsupported and the apps fall back to ReAct.
+# -------------------------
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant with tools. Call a tool when you need information you do not have; "
+    "when several searches are needed, call them all at once. "
+    "When you have enough information, answer directly without calling tools."
+)
+STOP_PROMPT = "Stop calling tools ({reason}). Answer now, using only the tool results above."
+
+
+class ToolCallingUnsupported(RuntimeError):
+    """The model server rejected the request with tools (e.g. an Ollama model without tool support)."""
+
+
+class ToolCallResult(NamedTuple):
+    name: str
+    query: str
+    output: str
+    seconds: float
+
+
+def tool_schema(name: str, description: str) -> dict:
+    # The tools all take one string; a named "query" argument is easiest for small models to fill in
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": {
+                "type": "object",
+                "properties": {"query": {"type": "string", "description": "Input for the tool"}},
+                "required": ["query"],
+            },
+        },
+    }
+
+
+def supports_tool_calling(llm) -> bool:
+    try:
+        llm.bind_tools([tool_schema("probe", "probe")])
+    except NotImplementedError:
+        return False
+    return True
+
+
+class ToolCallingAgent:
+    """Agent loop on the model's native tool calls; each step runs all its calls in parallel."""
+
+    def __init__(self, llm, tools, system_prompt: str = SYSTEM_PROMPT, max_steps: int = 5,
+                 max_workers: int = 4, max_result_chars: int = 2000):
+        self.llm = llm
+        self.tools = {tool.name: tool for tool in tools}
+        self.model = llm.bind_tools([tool_schema(tool.name, tool.description) for tool in tools])
+        self.system_prompt = system_prompt
+        self.max_steps = max_steps
+        self.max_workers = max_workers
+        self.max_result_chars = max_result_chars
+        self.supported = True  # False once the server rejected the tools
+
+    @staticmethod
+    def _query(call: dict) -> str:
+        args = call.get("args") or {}
+        # Models sometimes rename the argument; the tools take a single string either way
+        return str(args.get("query", " ".join(str(value) for value in args.values())))
+
+    def _call_tool(self, call: dict) -> ToolCallResult:
+        query = self._query(call)
+        start = time.perf_counter()
+        tool = self.tools.get(call["name"])
+        if tool is None:
+            output = f"Unknown tool {call['name']}. Available tools: {', '.join(self.tools)}"
+        else:
+            try:
+                output = str(tool.run(query))
+            except Exception as e:
+                output = f"Tool failed: {e}"
+        return ToolCallResult(call["name"], query, output, time.perf_counter() - start)
+
+    def _ask(self, model, messages: List[BaseMessage], callbacks: list,
+             on_token: Optional[Callable[[str], None]]) -> AIMessage:
+        full = None
+        try:
+            for chunk in model.stream(messages, config={"callbacks": callbacks}):
+                if on_token and chunk.content:
+                    on_token(str(chunk.content))
+                full = chunk if full is None else full + chunk
+        except Exception as e:
+            if model is self.model and "does not support tools" in str(e):
+                self.supported = False
+                raise ToolCallingUnsupported(str(e)) from e
+            raise
+        return full if full is not None else AIMessage(content="")
+
+    def run(self, question: str, callbacks: Optional[list] = None,
+            on_step: Optional[Callable[[int, List[ToolCallResult]], None]] = None,
+            on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Final answer; on_step(step, results) after each parallel batch of tool calls."""
+        callbacks = list(callbacks or [])
+        controller = next((h for h in callbacks if isinstance(h, TurnController)), None)
+        messages: List[BaseMessage] = [SystemMessage(content=self.system_prompt), HumanMessage(content=question)]
+        history: List[Tuple[AgentAction, str]] = []
+
+        reason = f"{self.max_steps} tool steps used"
+        for step in range(self.max_steps):
+            stop = controller.stop_reason(history) if controller and history else None
+            if stop:
+                reason = stop
+                break
+            message = self._ask(self.model, messages, callbacks, on_token)
+            if not message.tool_calls:
+                return str(message.content)
+
+            # Providers that leave ids out still need matching ids on the ToolMessages
+            calls = [{**call, "id": call.get("id") or f"call_{step}_{i}"} for i, call in enumerate(message.tool_calls)]
+            messages.append(AIMessage(content=message.content, tool_calls=calls))
+            # The same call twice in one step runs once; every call id still gets its ToolMessage
+            unique = {}
+            for call in calls:
+                unique.setdefault((call["name"], self._query(call).strip().lower()), call)
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(unique)))) as pool:
+                outputs = dict(zip(unique, pool.map(self._call_tool, unique.values())))
+            for call in calls:
+                output = outputs[(call["name"], self._query(call).strip().lower())].output
+                messages.append(ToolMessage(content=output[:self.max_result_chars], tool_call_id=call["id"]))
+            results = list(outputs.values())
+            # Loop detection counts repeats across steps: within one step, equal results
+            # (e.g. two searches with no result) are one observation
+            seen = set()
+            for result in results:
+                if result.output not in seen:
+                    seen.add(result.output)
+                    history.append((AgentAction(result.name, result.query, ""), result.output))
+                if controller:
+                    controller.add_step(result.name, result.seconds)
+            if on_step:
+                on_step(step, results)
+
+        if controller:
+            controller.stopped = reason
+        messages.append(HumanMessage(content=STOP_PROMPT.format(reason=reason)))
+        return str(self._ask(self.llm, messages, callbacks, on_token).content)
+
+
+class StreamlitToolSteps:
+    """on_step / on_token for ToolCallingAgent.run: one expander per step, then the streamed answer."""
+
+    def __init__(self, container, controller: Optional[TurnController] = None, max_output_chars: int = 1000):
+        self.container = container
+        self.controller = controller
+        self.max_output_chars = max_output_chars
+        self.text = ""
+        self._answer = container.empty()
+
+    def on_token(self, token: str):
+        self.text += token
+        self._answer.markdown(self.text)
+
+    def on_step(self, step: int, results: List[ToolCallResult]):
+        # Text streamed before the tool calls was not the answer
+        self._answer.empty()
+        label = f"Step {step + 1}: {len(results)} tool call{'s' if len(results) > 1 else ''} · " \
+                f"{max(result.seconds for result in results):.1f}s"
+        if self.controller and self.controller.steps:
+            label += f" · ~{sum(s['tokens'] for s in self.controller.steps[-len(results):]):,} tok"
+        box = self.container.expander(label, expanded=False)
+        for result in results:
+            box.markdown(f"**{result.name}** `{result.query}` · {result.seconds:.1f}s\n\n"
+                         f"{result.output[:self.max_output_chars]}")
+        self.text = ""
+        self._answer = self.container.empty()
+
+    def finish(self, response: str):
+        self._answer.markdown(response)
@@ -2,9 +2,21 @@ import sys
 import os
 import sqlite3
 import re
+import time
 from datetime import datetime
 from langchain_ollama import ChatOllama
 
+# LLM cassette (LLM_CASSETTE=file.jsonl, LLM_CASSETTE_MODE=auto|record|replay) for reproducible
+# timing runs without Ollama; a no-op when LLM_CASSETTE is not set. From the shared package
+# (pip install -e shared, see shared/llmCassette.py); the job runs without it
+try:
+    from llmCassette import with_cassette
+except ImportError:
+    def with_cassette(llm):
+        if os.getenv("LLM_CASSETTE"):
+            raise ImportError("LLM_CASSETTE is set but llmCassette is not installed: pip install -e shared")
+        return llm
+
 # --- CONFIG: Use relative path so it matches the API Server ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "jenkins_ai.db")
@@ -110,7 +122,7 @@ node_name = os.environ.get("NODE_NAME", "built-in")
 severity, category, confident = classify_by_rules(log_text)
 
 # Step 2: Ask AI (Using your strict prompt)
-llm = ChatOllama(model="gemma3:1b", temperature=0)
+llm = with_cassette(ChatOllama(model="gemma3:1b", temperature=0))
 
 prompt = f"""
 You are a senior Software Reliability Engineer.
@@ -152,7 +164,11 @@ Log:
 """
 
 print("⏳ Asking AI...")
+ai_start = time.perf_counter()
 ai_summary = llm.invoke(prompt).content
+print(f"⏱️ AI step took {time.perf_counter() - ai_start:.2f}s")
+if hasattr(llm, "summary"):
+    print(llm.summary())
 
 # Step 3: Parse AI response
 # Even if rules were confident, we check if AI found something different/better
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+# -------------------------
+# Record / replay cassette for chat models
+#
+# ChatGroq / ChatOllama answers vary from run to run and need a live
+# service, so nothing built on them can be timed reproducibly. A
+# CassetteChatModel wraps the real model and keeps a JSONL file of
+# episodes: request hash -> response message, its latency, and for
+# streamed calls every chunk with its offset from the start of the call.
+# - record: always call the real model and append the episode
+# - replay: answer only from the cassette (unknown request -> LookupError)
+# - auto:   replay known requests, record the rest
+# Replays return instantly by default, so a benchmark's wall time is our
+# own pipeline overhead; with realtime=True they sleep for the recorded
+# latency / chunk gaps instead. model_seconds adds up the recorded model
+# time of every answer served; waited_seconds only the time actually spent
+# waiting on it (live calls, realtime replays), so wall - waited_seconds is
+# the pipeline's own time.
+#
+# with_cassette(llm) turns this on from the environment:
+#   LLM_CASSETTE=path.jsonl  LLM_CASSETTE_MODE=auto|record|replay  LLM_CASSETTE_REALTIME=1
+# -------------------------
+
+CASSETTE_MODES = ("auto", "record", "replay")
+
+
+def request_key(model_id: str, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: dict) -> str:
+    # Message ids are per run and left out; tool call ids are part of the conversation
+    payload = [
+        model_id,
+        [
+            (m.type, m.content, getattr(m, "tool_calls", None) or None, getattr(m, "tool_call_id", None))
+            for m in messages
+        ],
+        stop,
+        kwargs,
+    ]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _final_message(message: BaseMessage) -> AIMessage:
+    return AIMessage(
+        content=message.content,
+        tool_calls=getattr(message, "tool_calls", []),
+        usage_metadata=getattr(message, "usage_metadata", None),
+        response_metadata=message.response_metadata,
+    )
+
+
+def _chunk(text: str, message: BaseMessage, last: bool) -> AIMessageChunk:
+    # Tool calls and usage travel on the last chunk of a stream
+    return AIMessageChunk(
+        content=text,
+        tool_call_chunks=[
+            {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": n}
+            for n, call in enumerate(getattr(message, "tool_calls", []))
+        ] if last else [],
+        usage_metadata=getattr(message, "usage_metadata", None) if last else None,
+    )
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records the wrapped model's answers and replays them."""
+
+    inner: Optional[BaseChatModel] = None
+    path: str
+    mode: str = "auto"
+    realtime: bool = False
+    model_id: str = ""
+    streaming: bool = False
+
+    _episodes: dict = PrivateAttr(default_factory=dict)
+    _stats: Counter = PrivateAttr(default_factory=Counter)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _model_seconds: float = PrivateAttr(default=0.0)
+    _waited_seconds: float = PrivateAttr(default=0.0)
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {self.mode}")
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        episode = json.loads(line)
+                        self._episodes[episode["key"]] = episode
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    @property
+    def model_seconds(self) -> float:
+        return self._model_seconds
+
+    @property
+    def waited_seconds(self) -> float:
+        return self._waited_seconds
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool schemas go to the wrapped model with every call (and into the request key)
+        if self.inner is not None:
+            self.inner.bind_tools(tools)  # NotImplementedError when the real model has no tool calling
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _lookup(self, key: str) -> Optional[dict]:
+        episode = None if self.mode == "record" else self._episodes.get(key)
+        if episode is None and (self.mode == "replay" or self.inner is None):
+            raise LookupError(f"No recorded answer for this request in {self.path}")
+        return episode
+
+    def _save(self, episode: dict):
+        with self._lock:
+            self._episodes[episode["key"]] = episode
+            self._stats["recorded"] += 1
+            self._model_seconds += episode["seconds"]
+            self._waited_seconds += episode["seconds"]
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(episode) + "\n")
+
+    def _replayed(self, episode: dict):
+        with self._lock:
+            self._stats["replayed"] += 1
+            self._model_seconds += episode["seconds"]
+            if self.realtime:
+                self._waited_seconds += episode["seconds"]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = request_key(self.model_id, messages, stop, kwargs)
+        episode = self._lookup(key)
+        if episode is None:
+            start = time.perf_counter()
+            message = _final_message(self.inner.invoke(messages, stop=stop, **kwargs))
+            episode = {"key": key, "seconds": time.perf_counter() - start, "message": message_to_dict(message)}
+            self._save(episode)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+        if self.realtime:
+            time.sleep(episode["seconds"])
+        self._replayed(episode)
+        message = messages_from_dict([episode["message"]])[0]
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        key = request_key(self.model_id, messages, stop, kwargs)
+        episode = self._lookup(key)
+        if episode is None:
+            chunks, full = [], None
+            start = time.perf_counter()
+            for chunk in self.inner.stream(messages, stop=stop, **kwargs):
+                if not isinstance(chunk, AIMessageChunk):
+                    # Models without their own streaming yield the whole message once
+                    chunk = _chunk(str(chunk.content), chunk, last=True)
+                chunks.append([time.perf_counter() - start, str(chunk.content)])
+                full = chunk if full is None else full + chunk
+                generation = ChatGenerationChunk(message=chunk)
+                if run_manager:
+                    run_manager.on_llm_new_token(str(chunk.content), chunk=generation)
+                yield generation
+            message = _final_message(full if full is not None else AIMessage(content=""))
+            self._save({
+                "key": key, "seconds": time.perf_counter() - start,
+                "message": message_to_dict(message), "chunks": chunks,
+            })
+            return
+
+        message = messages_from_dict([episode["message"]])[0]
+        # Answers recorded without streaming replay as a single chunk
+        chunks = episode.get("chunks") or [[episode["seconds"], message.content]]
+        previous = 0.0
+        for i, (offset, text) in enumerate(chunks):
+            if self.realtime:
+                time.sleep(max(0.0, offset - previous))
+                previous = offset
+            generation = ChatGenerationChunk(message=_chunk(text, message, last=i == len(chunks) - 1))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=generation)
+            yield generation
+        self._replayed(episode)
+
+    def summary(self) -> str:
+        return (
+            f"LLM cassette: {self._stats['replayed']} replayed, {self._stats['recorded']} recorded; "
+            f"model time {self._model_seconds:.2f}s"
+        )
+
+
+def with_cassette(llm: BaseChatModel, path: str = "", mode: str = "", realtime: Optional[bool] = None):
+    """`llm` behind a cassette when one is configured (arguments or LLM_CASSETTE*), else `llm` itself."""
+    path = path or os.getenv("LLM_CASSETTE", "")
+    if not path:
+        return llm
+    return CassetteChatModel(
+        inner=llm,
+        path=path,
+        mode=mode or os.getenv("LLM_CASSETTE_MODE", "auto"),
+        realtime=os.getenv("LLM_CASSETTE_REALTIME", "") == "1" if realtime is None else realtime,
+        model_id=str(getattr(llm, "model_name", None) or getattr(llm, "model", "") or type(llm).__name__),
+        streaming=bool(getattr(llm, "streaming", False)),
+    )